@@ -1,28 +1,75 @@
 from __future__ import annotations
 
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import AsyncIterator
 
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Response
 
-from .routes import elevenlabs
+from .frontend import FrontendFiles
+from .routes import debug, elevenlabs
+from .services.cache import agent_config_cache, cache_invalidations, configure_agent_cache
+from .services.elevenlabs import start_token_pool, stop_token_pool
+from .services.executors import shutdown_executors
+from .services.http_clients import close_http_clients, open_http_clients
+from .services.jobs import job_manager
+from .services.loop_monitor import loop_monitor
+from .services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, render_metrics
+from .services.profiling import ProfilingMiddleware
+from .services.prompt_history import configure_prompt_history, prompt_history
+from .services.suggestion_cache import suggestion_cache
+from .services.transcript_cache import configure_transcript_cache
 
 logger = logging.getLogger(__name__)
 FRONTEND_DIST = Path(__file__).resolve().parent / "static"
+# Paths owned by the API; the frontend never answers them with index.html.
+BACKEND_PATHS = ("/api", "/health", "/metrics")
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Built at import time; re-read settings that may have changed since.
+    configure_agent_cache()
+    configure_transcript_cache()
+    configure_prompt_history()
+    loop_monitor.start()
+    open_http_clients()
+    start_token_pool()
+    job_manager.start()
+    cache_invalidations.start()
+    try:
+        yield
+    finally:
+        await cache_invalidations.stop()
+        await job_manager.stop()
+        await stop_token_pool()
+        await close_http_clients()
+        suggestion_cache.close()
+        agent_config_cache.close()
+        prompt_history.close()
+        shutdown_executors()
+        await loop_monitor.stop()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Voice Test API")
+    app = FastAPI(title="Voice Test API", lifespan=_lifespan)
+    app.add_middleware(MetricsMiddleware)
+    app.add_middleware(ProfilingMiddleware, exclude_prefixes=("/api/debug/",))
 
     @app.get("/health", tags=["health"])
     async def health() -> dict[str, str]:
         return {"status": "ok"}
 
-    app.include_router(elevenlabs.router, prefix="/api")
+    @app.get("/metrics", tags=["health"], include_in_schema=False)
+    async def metrics() -> Response:
+        return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+    app.include_router(elevenlabs.router)
+    app.include_router(debug.router)
 
     if FRONTEND_DIST.exists():
-        app.mount("/", StaticFiles(directory=FRONTEND_DIST, html=True), name="frontend")
+        app.mount("/", FrontendFiles(FRONTEND_DIST, backend_paths=BACKEND_PATHS), name="frontend")
     else:
         logger.warning("Frontend build directory %s not found; serving JSON root response.", FRONTEND_DIST)
 
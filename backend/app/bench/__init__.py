@@ -0,0 +1,18 @@
+"""Offline benchmarks for the backend against local ElevenLabs/OpenAI fakes.
+
+Run ``python -m app.bench --help`` from ``backend/``; ``loadtest --help``
+for the end-to-end session load generator.
+"""
+
+from .fakes import FakeUpstreamConfig, FakeUpstreamServer, build_fake_upstream
+from .runner import BenchConfig, ScenarioResult, format_results, run
+
+__all__ = [
+    "BenchConfig",
+    "FakeUpstreamConfig",
+    "FakeUpstreamServer",
+    "ScenarioResult",
+    "build_fake_upstream",
+    "format_results",
+    "run",
+]
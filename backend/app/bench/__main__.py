@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+from .fakes import FakeUpstreamConfig
+from .runner import BenchConfig, format_results, run
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.bench",
+        description="Benchmark every API route against local ElevenLabs/OpenAI fakes.",
+    )
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per scenario")
+    parser.add_argument("--scenario", action="append", dest="scenarios", help="run only this scenario (repeatable)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="injected upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="extra random upstream latency, up to this much")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--audio-kb", type=int, default=64, help="size of the uploaded audio clip")
+    parser.add_argument(
+        "--audio-preprocess",
+        action="store_true",
+        help="enable AUDIO_PREPROCESS (affects the transcribe_wav scenario)",
+    )
+    parser.add_argument("--prompt-chars", type=int, default=2_000)
+    parser.add_argument("--suggestion-chars", type=int, default=2_000)
+    parser.add_argument("--json", dest="json_path", help="also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    config = BenchConfig(
+        requests=args.requests,
+        concurrency=args.concurrency,
+        warmup=args.warmup,
+        audio_bytes=args.audio_kb * 1024,
+        audio_preprocess=args.audio_preprocess,
+        scenarios=args.scenarios,
+        upstream=FakeUpstreamConfig(
+            latency=args.latency_ms / 1000,
+            jitter=args.jitter_ms / 1000,
+            seed=args.seed,
+            prompt_chars=args.prompt_chars,
+            suggestion_chars=args.suggestion_chars,
+        ),
+    )
+    try:
+        results = run(config)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    print(format_results(results))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            json.dump([result.as_dict() for result in results], handle, indent=2)
+    return 1 if any(result.errors for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
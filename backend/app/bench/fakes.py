@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+
+@dataclass
+class FakeUpstreamConfig:
+    """Shape of the stand-in ElevenLabs/OpenAI responses.
+
+    Every response waits ``latency`` seconds plus up to ``jitter`` more,
+    drawn from a generator seeded with ``seed`` so runs are repeatable.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    seed: int = 1234
+    prompt_chars: int = 2_000
+    transcript_chars: int = 200
+    suggestion_chars: int = 2_000
+    stream_chunks: int = 50
+
+
+def _text(rng: random.Random, chars: int) -> str:
+    words: list[str] = []
+    length = 0
+    while length < chars:
+        word = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9)))
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:chars]
+
+
+def _fake_jwt(ttl: float = 600.0) -> str:
+    def part(data: dict[str, Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+    return ".".join([part({"alg": "none"}), part({"exp": int(time.time() + ttl)}), "sig"])
+
+
+def build_fake_upstream(config: FakeUpstreamConfig) -> Starlette:
+    """One app answering both the ElevenLabs and the OpenAI endpoints we use."""
+    rng = random.Random(config.seed)
+    prompt = _text(rng, config.prompt_chars)
+    transcript = _text(rng, config.transcript_chars)
+    suggestion = _text(rng, config.suggestion_chars)
+    agents: dict[str, dict[str, Any]] = {}
+
+    async def delay() -> None:
+        pause = config.latency + (rng.random() * config.jitter if config.jitter else 0.0)
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+    def agent_doc(agent_id: str) -> dict[str, Any]:
+        return agents.setdefault(agent_id, {
+            "agent_id": agent_id,
+            "name": f"Bench agent {agent_id}",
+            "conversation_config": {
+                "agent": {
+                    "first_message": "Hello! How can I help?",
+                    "prompt": {"prompt": prompt, "llm": "gpt-4o-mini"},
+                },
+            },
+        })
+
+    async def get_agent(request: Request) -> Response:
+        await delay()
+        return JSONResponse(agent_doc(request.path_params["agent_id"]))
+
+    async def patch_agent(request: Request) -> Response:
+        body = await request.json()
+        await delay()
+        doc = agent_doc(request.path_params["agent_id"])
+        patch = (body.get("conversation_config") or {}).get("agent") or {}
+        agent = doc["conversation_config"]["agent"]
+        for key, value in patch.items():
+            if key == "prompt" and isinstance(value, dict):
+                agent["prompt"].update(value)
+            else:
+                agent[key] = value
+        return JSONResponse(doc)
+
+    async def conversation_token(request: Request) -> Response:
+        await delay()
+        return JSONResponse({"token": _fake_jwt()})
+
+    async def speech_to_text(request: Request) -> Response:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        await delay()
+        return JSONResponse({"text": transcript, "language_code": "en", "bytes": size})
+
+    async def chat_completions(request: Request) -> Response:
+        body = await request.json()
+        await delay()
+        if not body.get("stream"):
+            return JSONResponse({"choices": [{"message": {"role": "assistant", "content": suggestion}}]})
+
+        step = max(1, len(suggestion) // max(1, config.stream_chunks))
+
+        async def events() -> AsyncIterator[bytes]:
+            for start in range(0, len(suggestion), step):
+                delta = {"choices": [{"delta": {"content": suggestion[start:start + step]}}]}
+                yield f"data: {json.dumps(delta)}\n\n".encode()
+            yield b"data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return Starlette(routes=[
+        Route("/v1/convai/agents/{agent_id}", get_agent, methods=["GET"]),
+        Route("/v1/convai/agents/{agent_id}", patch_agent, methods=["PATCH"]),
+        Route("/v1/convai/conversation/token", conversation_token, methods=["GET"]),
+        Route("/v1/speech-to-text", speech_to_text, methods=["POST"]),
+        Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+    ])
+
+
+class FakeUpstreamServer:
+    """Serve ``build_fake_upstream`` on a local port from a background thread.
+
+    The fakes get their own thread and event loop so their work is not
+    billed to the app under test.
+    """
+
+    def __init__(self, config: FakeUpstreamConfig, *, host: str = "127.0.0.1", port: int = 0):
+        import uvicorn
+
+        self._server = uvicorn.Server(uvicorn.Config(
+            build_fake_upstream(config),
+            host=host,
+            port=port,
+            log_level="warning",
+            lifespan="off",
+        ))
+        self._thread: Optional[threading.Thread] = None
+        self.base_url = ""
+
+    def start(self) -> "FakeUpstreamServer":
+        self._thread = threading.Thread(target=self._server.run, name="bench-fakes", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("Fake upstream server failed to start")
+            time.sleep(0.01)
+        host, port = self._server.servers[0].sockets[0].getsockname()[:2]
+        self.base_url = f"http://{host}:{port}"
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def __enter__(self) -> "FakeUpstreamServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+__all__ = ["FakeUpstreamConfig", "FakeUpstreamServer", "build_fake_upstream"]
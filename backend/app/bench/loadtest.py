@@ -0,0 +1,474 @@
+"""End-to-end load generator replaying voice-test editing sessions.
+
+Run ``loadtest --help`` (or ``python -m app.bench.loadtest --help``) from
+``backend/``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+
+from .fakes import FakeUpstreamConfig, FakeUpstreamServer
+from .runner import ScenarioResult, bench_environment, format_results
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# Weights of each session kind in the default mix.
+DEFAULT_MIX = {"edit": 6.0, "call": 3.0, "review": 1.0}
+
+
+@dataclass
+class LoadTestConfig:
+    url: Optional[str] = None
+    workers: int = 1
+    concurrency: int = 8
+    rate: Optional[float] = None
+    max_in_flight: int = 256
+    duration: float = 30.0
+    mix: dict[str, float] = field(default_factory=lambda: dict(DEFAULT_MIX))
+    clips: int = 2
+    clip_bytes: int = 64 * 1024
+    agents: list[str] = field(default_factory=lambda: [f"loadtest-agent-{n}" for n in range(500)])
+    think_time: float = 0.0
+    timeout: float = 60.0
+    seed: int = 1234
+    upstream: FakeUpstreamConfig = field(default_factory=FakeUpstreamConfig)
+
+
+@dataclass
+class RouteStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: Counter[str] = field(default_factory=Counter)
+
+
+@dataclass
+class LoadTestReport:
+    elapsed: float
+    sessions: Counter[str]
+    session_latencies: list[float]
+    routes: dict[str, RouteStats]
+
+    def route_results(self) -> list[ScenarioResult]:
+        return [
+            ScenarioResult(name, len(stats.latencies), sum(stats.errors.values()), self.elapsed, stats.latencies)
+            for name, stats in self.routes.items()
+        ]
+
+    @property
+    def failed(self) -> bool:
+        return bool(self.sessions["failed"]) or any(stats.errors for stats in self.routes.values())
+
+    def as_dict(self) -> dict[str, Any]:
+        sessions = ScenarioResult("sessions", len(self.session_latencies), self.sessions["failed"],
+                                  self.elapsed, self.session_latencies)
+        return {
+            "elapsed_seconds": self.elapsed,
+            "sessions": {**dict(self.sessions), **sessions.as_dict()},
+            "routes": [
+                {**result.as_dict(), "error_breakdown": dict(self.routes[result.name].errors)}
+                for result in self.route_results()
+            ],
+        }
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    """``edit=6,call=3`` → weights per session kind."""
+    mix: dict[str, float] = {}
+    for part in filter(None, (item.strip() for item in text.split(","))):
+        kind, _, weight = part.partition("=")
+        if kind not in SESSIONS:
+            raise ValueError(f"Unknown session kind {kind!r}; choose from {', '.join(SESSIONS)}")
+        try:
+            mix[kind] = float(weight or 1)
+        except ValueError:
+            raise ValueError(f"Invalid weight in {part!r}") from None
+        if mix[kind] < 0:
+            raise ValueError(f"Invalid weight in {part!r}")
+    if not sum(mix.values()):
+        raise ValueError("The mix needs at least one session kind with a positive weight")
+    return mix
+
+
+class Session:
+    """One simulated user: an agent, what it has loaded so far, and the shared stats."""
+
+    def __init__(self, load: "LoadTest", index: int, agent_id: str):
+        self.load = load
+        self.index = index
+        self.agent_id = agent_id
+        self.prompt: Optional[str] = None
+        self.etag: Optional[str] = None
+        self.feedback = f"Loadtest session {index}: make the greeting shorter."
+
+    async def request(self, route: str, method: str, url: str, **kwargs: Any) -> Optional[httpx.Response]:
+        """Send a request and record it under ``route``; ``None`` when it failed."""
+        stats = self.load.routes.setdefault(route, RouteStats())
+        started = time.perf_counter()
+        try:
+            response = await self.load.client.request(method, url, **kwargs)
+        except httpx.HTTPError as exc:
+            stats.latencies.append(time.perf_counter() - started)
+            stats.errors[type(exc).__name__] += 1
+            return None
+        stats.latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            stats.errors[str(response.status_code)] += 1
+            return None
+        return response
+
+
+async def _conversation_token(session: Session) -> bool:
+    response = await session.request(
+        "conversation_token", "POST", "/api/elevenlabs/conversation-token",
+        json={"agent_id": session.agent_id},
+    )
+    return response is not None
+
+
+async def _prompt_get(session: Session) -> bool:
+    response = await session.request(
+        "prompt_get", "GET", "/api/elevenlabs/prompt", params={"agent_id": session.agent_id},
+    )
+    if response is None:
+        return False
+    session.prompt = response.json().get("prompt") or ""
+    session.etag = response.headers.get("etag")
+    return True
+
+
+async def _transcribe(session: Session) -> bool:
+    load = session.load
+    for clip in range(load.config.clips):
+        # A unique prefix per clip, so the transcript cache never answers.
+        audio = f"{session.index}:{clip}:".encode() + load.audio
+        response = await session.request(
+            "transcribe_stream", "POST", "/api/elevenlabs/transcribe/stream",
+            params={"format": "webm"},
+            content=audio,
+            headers={"Content-Type": "audio/webm"},
+        )
+        if response is None:
+            return False
+        session.feedback = f"{response.json().get('text', '')} ({session.index}:{clip})"
+        if clip < load.config.clips - 1:
+            await load.think()
+    return True
+
+
+async def _suggest(session: Session) -> bool:
+    response = await session.request(
+        "suggest_stream", "POST", "/api/elevenlabs/prompt/suggest/stream",
+        json={"feedback": session.feedback, "agent_id": session.agent_id, "include_diff": True},
+    )
+    return response is not None
+
+
+async def _prompt_save(session: Session) -> bool:
+    headers = {"If-Match": session.etag} if session.etag else {}
+    response = await session.request(
+        "prompt_save", "PUT", "/api/elevenlabs/prompt",
+        json={
+            "prompt": f"{session.prompt or ''}\n\nLoadtest revision {session.index}.",
+            "agent_id": session.agent_id,
+        },
+        headers=headers,
+    )
+    return response is not None
+
+
+Step = Callable[[Session], Awaitable[bool]]
+
+# What the editor does in each kind of session, in order.
+SESSIONS: dict[str, tuple[Step, ...]] = {
+    # Start a call, listen, dictate feedback, take the suggestion and save it.
+    "edit": (_conversation_token, _prompt_get, _transcribe, _suggest, _prompt_save),
+    # Start a call against the current prompt and leave it at that.
+    "call": (_conversation_token, _prompt_get),
+    # Read the prompt and ask for a suggestion, without voice or saving.
+    "review": (_prompt_get, _suggest),
+}
+
+
+class LoadTest:
+    def __init__(self, config: LoadTestConfig, client: httpx.AsyncClient):
+        self.config = config
+        self.client = client
+        self.rng = random.Random(config.seed)
+        self.audio = self.rng.randbytes(config.clip_bytes)
+        self.kinds = list(config.mix)
+        self.weights = [config.mix[kind] for kind in self.kinds]
+        self.routes: dict[str, RouteStats] = {}
+        self.sessions: Counter[str] = Counter()
+        self.session_latencies: list[float] = []
+        self._next_index = 0
+
+    async def think(self) -> None:
+        if self.config.think_time > 0:
+            await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.config.think_time)
+
+    async def run_session(self) -> None:
+        index, self._next_index = self._next_index, self._next_index + 1
+        kind = self.rng.choices(self.kinds, self.weights)[0]
+        # Round-robin, so concurrent sessions rarely edit the same agent.
+        session = Session(self, index, self.config.agents[index % len(self.config.agents)])
+        self.sessions["started"] += 1
+        started = time.perf_counter()
+        for step in SESSIONS[kind]:
+            if not await step(session):
+                self.sessions["failed"] += 1
+                self.sessions[f"failed_{kind}"] += 1
+                return
+            await self.think()
+        self.session_latencies.append(time.perf_counter() - started)
+        self.sessions["completed"] += 1
+        self.sessions[f"completed_{kind}"] += 1
+
+    async def run_closed(self, deadline: float) -> None:
+        """``concurrency`` users, each starting a new session as soon as one ends."""
+        async def user() -> None:
+            while time.perf_counter() < deadline:
+                await self.run_session()
+
+        await asyncio.gather(*(user() for _ in range(max(1, self.config.concurrency))))
+
+    async def run_open(self, deadline: float, rate: float) -> None:
+        """Poisson session arrivals at ``rate`` per second, whatever the latency.
+
+        Arrivals beyond ``max_in_flight`` concurrent sessions are shed and
+        counted, so an overloaded target shows up instead of slowing the
+        generator down.
+        """
+        in_flight: set[asyncio.Task] = set()
+        next_arrival = time.perf_counter()
+        while next_arrival < deadline:
+            await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+            if len(in_flight) >= self.config.max_in_flight:
+                self.sessions["shed"] += 1
+            else:
+                task = asyncio.create_task(self.run_session())
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            next_arrival += self.rng.expovariate(rate)
+        if in_flight:
+            await asyncio.gather(*in_flight)
+
+    async def run(self) -> LoadTestReport:
+        started = time.perf_counter()
+        deadline = started + self.config.duration
+        if self.config.rate:
+            await self.run_open(deadline, self.config.rate)
+        else:
+            await self.run_closed(deadline)
+        return LoadTestReport(
+            elapsed=time.perf_counter() - started,
+            sessions=self.sessions,
+            session_latencies=self.session_latencies,
+            routes=self.routes,
+        )
+
+
+async def run_load(config: LoadTestConfig, base_url: str) -> LoadTestReport:
+    in_flight = config.max_in_flight if config.rate else config.concurrency
+    limits = httpx.Limits(max_connections=max(1, in_flight), max_keepalive_connections=max(1, in_flight))
+    async with httpx.AsyncClient(base_url=base_url, timeout=config.timeout, limits=limits) as client:
+        return await LoadTest(config, client).run()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_health(process: subprocess.Popen, base_url: str, *, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"The app exited with code {process.returncode} before it was ready")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"The app did not become healthy within {timeout:.0f}s")
+
+
+def spawn_app(fakes_url: str, *, workers: int) -> tuple[subprocess.Popen, str]:
+    """Start uvicorn with ``workers`` processes, pointed at the fakes on ``fakes_url``.
+
+    Other settings (``CACHE_BACKEND``, ``JOB_WORKERS``, ...) are inherited
+    from this process's environment.
+    """
+    port = _free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app:app",
+            "--host", "127.0.0.1",
+            "--port", str(port),
+            "--workers", str(max(1, workers)),
+            "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **bench_environment(fakes_url)},
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_for_health(process, base_url)
+    except BaseException:
+        _stop_app(process)
+        raise
+    return process, base_url
+
+
+def _stop_app(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def run(config: LoadTestConfig) -> LoadTestReport:
+    """Load ``config.url``, or a freshly spawned app in front of local fakes."""
+    if config.url:
+        return asyncio.run(run_load(config, config.url.rstrip("/")))
+
+    with FakeUpstreamServer(config.upstream) as fakes:
+        process, base_url = spawn_app(fakes.base_url, workers=config.workers)
+        try:
+            return asyncio.run(run_load(config, base_url))
+        finally:
+            _stop_app(process)
+
+
+def format_report(report: LoadTestReport) -> str:
+    sessions = report.sessions
+    rate = sessions["completed"] / report.elapsed if report.elapsed else 0.0
+    ordered = sorted(report.session_latencies)
+
+    def pct(value: float) -> float:
+        return ordered[max(1, math.ceil(value / 100 * len(ordered))) - 1] * 1000 if ordered else 0.0
+
+    lines = [
+        f"sessions: {sessions['completed']} completed, {sessions['failed']} failed, "
+        f"{sessions['shed']} shed in {report.elapsed:.1f}s ({rate:.1f}/s); "
+        f"duration p50 {pct(50):.0f} ms, p95 {pct(95):.0f} ms, p99 {pct(99):.0f} ms",
+        "",
+        format_results(report.route_results(), label="route"),
+    ]
+    errors = [
+        f"  {name}: " + ", ".join(f"{kind} x{count}" for kind, count in stats.errors.most_common())
+        for name, stats in report.routes.items()
+        if stats.errors
+    ]
+    if errors:
+        lines += ["", "errors:", *errors]
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="loadtest",
+        description=(
+            "Replay editing sessions (token, prompt, transcribe, suggest, save) against the app. "
+            "Without --url, starts local ElevenLabs/OpenAI fakes and an app in front of them."
+        ),
+    )
+    parser.add_argument("--url", help="base URL of a running instance; its upstreams are left as configured")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers of the spawned app (without --url)")
+    parser.add_argument(
+        "--fakes-only",
+        action="store_true",
+        help="only serve the fakes and print the environment to point an instance at them",
+    )
+    parser.add_argument("--concurrency", type=int, default=8, help="simulated users running sessions back to back")
+    parser.add_argument("--rate", type=float, help="start this many sessions per second instead (open loop)")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="with --rate, shed arrivals beyond this")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to keep starting sessions")
+    parser.add_argument(
+        "--mix",
+        default=",".join(f"{kind}={weight:g}" for kind, weight in DEFAULT_MIX.items()),
+        help=f"session kinds and weights, from {', '.join(SESSIONS)} (default: %(default)s)",
+    )
+    parser.add_argument("--clips", type=int, default=2, help="clips transcribed per edit session")
+    parser.add_argument("--clip-kb", type=int, default=64, help="size of each uploaded clip")
+    parser.add_argument("--agents", type=int, default=500, help="distinct agent ids the sessions spread over")
+    parser.add_argument("--agent", action="append", dest="agent_ids", help="use this agent id (repeatable)")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="average pause between session steps")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="injected latency of the fakes")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="extra random latency of the fakes")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--json", dest="json_path", help="also write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    upstream = FakeUpstreamConfig(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        seed=args.seed,
+    )
+    if args.fakes_only:
+        with FakeUpstreamServer(upstream) as fakes:
+            for name, value in bench_environment(fakes.base_url).items():
+                print(f"export {name}={shlex.quote(value)}")
+            print("# Serving fakes; press Ctrl+C to stop.", file=sys.stderr)
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                return 0
+
+    config = LoadTestConfig(
+        url=args.url,
+        workers=args.workers,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        max_in_flight=args.max_in_flight,
+        duration=args.duration,
+        mix=mix,
+        clips=args.clips,
+        clip_bytes=args.clip_kb * 1024,
+        agents=args.agent_ids or [f"loadtest-agent-{n}" for n in range(max(1, args.agents))],
+        think_time=args.think_ms / 1000,
+        timeout=args.timeout,
+        seed=args.seed,
+        upstream=upstream,
+    )
+    try:
+        report = run(config)
+    except RuntimeError as exc:
+        print(f"loadtest: {exc}", file=sys.stderr)
+        return 2
+
+    print(format_report(report))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            json.dump(report.as_dict(), handle, indent=2)
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
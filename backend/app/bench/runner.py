@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import math
+import os
+import random
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+import httpx
+
+from ..services.audio_preprocess import numpy_available, synthetic_wav
+from .fakes import FakeUpstreamConfig, FakeUpstreamServer
+
+BENCH_AGENT_ID = "bench-agent"
+
+
+@dataclass
+class BenchConfig:
+    requests: int = 200
+    concurrency: int = 8
+    warmup: int = 20
+    audio_bytes: int = 64 * 1024
+    audio_preprocess: bool = False
+    scenarios: Optional[list[str]] = None
+    upstream: FakeUpstreamConfig = field(default_factory=FakeUpstreamConfig)
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    # Builds the httpx request kwargs (url, json, content, headers) for request ``i``.
+    build: Callable[[int], dict[str, Any]]
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    requests: int
+    errors: int
+    elapsed: float
+    latencies: list[float]
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, pct: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        rank = max(1, math.ceil(pct / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "requests": self.requests,
+            "errors": self.errors,
+            "elapsed_seconds": self.elapsed,
+            "throughput_rps": self.throughput,
+            "p50_ms": self.percentile(50) * 1000,
+            "p95_ms": self.percentile(95) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+        }
+
+
+def build_scenarios(config: BenchConfig) -> list[Scenario]:
+    audio = random.Random(config.upstream.seed).randbytes(config.audio_bytes)
+    audio_base64 = base64.b64encode(audio).decode()
+    # Everything but the last few bytes is encoded once; ``transcribe``
+    # rewrites those per request so the transcript cache never answers.
+    audio_split = max(0, (len(audio) - 6) // 3 * 3)
+    audio_prefix = base64.b64encode(audio[:audio_split]).decode()
+
+    def transcribe_request(i: int) -> dict[str, Any]:
+        tail = audio[audio_split:-4] + (i % 2**31).to_bytes(4, "little")
+        return {
+            "url": "/api/elevenlabs/transcribe",
+            "json": {"audio": audio_prefix + base64.b64encode(tail).decode(), "format": "webm"},
+        }
+
+    scenarios = [
+        Scenario("health", "GET", lambda i: {"url": "/health"}),
+        Scenario(
+            "conversation_token",
+            "POST",
+            lambda i: {"url": "/api/elevenlabs/conversation-token", "json": {}},
+        ),
+        Scenario("prompt_get_cached", "GET", lambda i: {"url": "/api/elevenlabs/prompt"}),
+        # A new agent per request, so every read reaches the fake upstream.
+        Scenario(
+            "prompt_get",
+            "GET",
+            lambda i: {"url": "/api/elevenlabs/prompt", "params": {"agent_id": f"bench-{i}"}},
+        ),
+        # Fresh agents each time, so all of them are fetched from the fake upstream.
+        Scenario(
+            "prompt_batch",
+            "POST",
+            lambda i: {
+                "url": "/api/elevenlabs/prompt/batch",
+                "json": {"agent_ids": [f"bench-batch-{i}-{n}" for n in range(20)]},
+            },
+        ),
+        Scenario(
+            "prompt_save",
+            "PUT",
+            lambda i: {"url": "/api/elevenlabs/prompt", "json": {"prompt": f"Bench prompt revision {i}"}},
+        ),
+        Scenario(
+            "suggest",
+            "POST",
+            lambda i: {
+                "url": "/api/elevenlabs/prompt/suggest",
+                "json": {"feedback": f"Be more concise ({i})", "bypass_cache": True},
+            },
+        ),
+        Scenario(
+            "suggest_stream",
+            "POST",
+            lambda i: {
+                "url": "/api/elevenlabs/prompt/suggest/stream",
+                "json": {"feedback": f"Be more concise ({i})", "bypass_cache": True},
+            },
+        ),
+        Scenario("transcribe", "POST", transcribe_request),
+        # The same clip every time: after the first request, transcript cache hits.
+        Scenario(
+            "transcribe_cached",
+            "POST",
+            lambda i: {"url": "/api/elevenlabs/transcribe", "json": {"audio": audio_base64, "format": "webm"}},
+        ),
+        Scenario(
+            "transcribe_stream",
+            "POST",
+            lambda i: {
+                "url": "/api/elevenlabs/transcribe/stream",
+                "content": audio,
+                "headers": {"Content-Type": "audio/webm"},
+            },
+        ),
+    ]
+
+    if numpy_available():
+        # Stereo 48 kHz tone with silence around it, the input AUDIO_PREPROCESS
+        # is meant for. The last sample differs per request so the transcript
+        # cache does not answer; the rest is encoded once.
+        wav = synthetic_wav()
+        split = (len(wav) - 6) // 3 * 3
+        wav_prefix = base64.b64encode(wav[:split]).decode()
+
+        def wav_request(i: int) -> dict[str, Any]:
+            tail = wav[split:-4] + (i % 2**31).to_bytes(4, "little")
+            return {
+                "url": "/api/elevenlabs/transcribe",
+                "json": {"audio": wav_prefix + base64.b64encode(tail).decode(), "format": "wav"},
+            }
+
+        scenarios.append(Scenario("transcribe_wav", "POST", wav_request))
+    return scenarios
+
+
+def bench_environment(base_url: str, *, audio_preprocess: bool = False) -> dict[str, str]:
+    """Environment that points an app instance at the fakes served on ``base_url``."""
+    return {
+        "ELEVENLABS_API_KEY": "bench-key",
+        "ELEVENLABS_AGENT_ID": BENCH_AGENT_ID,
+        "ELEVENLABS_BASE_URL": base_url,
+        "OPENAI_API_KEY": "bench-key",
+        "OPENAI_BASE_URL": base_url,
+        "AUDIO_PREPROCESS": "true" if audio_preprocess else "false",
+        # History is off unless configured; give the bench a throwaway file so
+        # prompt_save includes the history write.
+        "PROMPT_HISTORY_PATH": os.path.join(
+            tempfile.mkdtemp(prefix="voice-test-bench-"), "prompt-history.sqlite3"
+        ),
+    }
+
+
+def configure_environment(base_url: str, *, audio_preprocess: bool = False) -> None:
+    """Point the app at the fakes; must run before the app starts."""
+    from ..config import get_settings
+
+    os.environ.update(bench_environment(base_url, audio_preprocess=audio_preprocess))
+    get_settings.cache_clear()
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    *,
+    requests: int,
+    concurrency: int,
+    warmup: int = 0,
+) -> ScenarioResult:
+    latencies: list[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker(total: int, record: bool) -> None:
+        nonlocal errors, next_index
+        while next_index < total:
+            i = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                response = await client.request(scenario.method, **scenario.build(i))
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            if record:
+                latencies.append(time.perf_counter() - started)
+                errors += failed
+
+    if warmup:
+        await asyncio.gather(*(worker(warmup, False) for _ in range(concurrency)))
+        next_index = 0
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(requests, True) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return ScenarioResult(scenario.name, requests, errors, elapsed, latencies)
+
+
+async def run_benchmarks(config: BenchConfig, base_url: str) -> list[ScenarioResult]:
+    """Drive ``create_app()`` in-process through every selected scenario."""
+    configure_environment(base_url, audio_preprocess=config.audio_preprocess)
+    from .. import create_app
+
+    app = create_app()
+    scenarios = build_scenarios(config)
+    if config.scenarios:
+        unknown = set(config.scenarios) - {scenario.name for scenario in scenarios}
+        if unknown:
+            raise ValueError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        scenarios = [scenario for scenario in scenarios if scenario.name in config.scenarios]
+
+    results: list[ScenarioResult] = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for scenario in scenarios:
+                results.append(await run_scenario(
+                    client,
+                    scenario,
+                    requests=config.requests,
+                    concurrency=config.concurrency,
+                    warmup=config.warmup,
+                ))
+    return results
+
+
+def run(config: BenchConfig) -> list[ScenarioResult]:
+    with FakeUpstreamServer(config.upstream) as fakes:
+        return asyncio.run(run_benchmarks(config, fakes.base_url))
+
+
+def format_results(results: list[ScenarioResult], *, label: str = "scenario") -> str:
+    header = f"{label:<20} {'reqs':>6} {'errors':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    lines = [header, "-" * len(header)]
+    for result in results:
+        lines.append(
+            f"{result.name:<20} {result.requests:>6} {result.errors:>6} {result.throughput:>9.1f} "
+            f"{result.percentile(50) * 1000:>9.2f} {result.percentile(95) * 1000:>9.2f} "
+            f"{result.percentile(99) * 1000:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+__all__ = [
+    "BenchConfig",
+    "Scenario",
+    "ScenarioResult",
+    "bench_environment",
+    "build_scenarios",
+    "configure_environment",
+    "format_results",
+    "run",
+    "run_benchmarks",
+    "run_scenario",
+]
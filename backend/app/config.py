@@ -1,8 +1,34 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import os
 from functools import lru_cache
 
 
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    return int(raw)
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    return float(raw)
+
+
+def _env_list(name: str) -> list[str]:
+    raw = os.getenv(name) or ""
+    return [item.strip() for item in raw.split(",") if item.strip()]
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
 @dataclass
 class Settings:
     elevenlabs_api_key: str | None
@@ -11,6 +37,65 @@ class Settings:
     openai_api_key: str | None
     openai_model: str
     elevenlabs_stt_model: str
+    openai_base_url: str = "https://api.openai.com"
+    elevenlabs_timeout: float = 10.0
+    openai_timeout: float = 20.0
+    elevenlabs_stt_timeout: float = 60.0
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http2_enabled: bool = True
+    agent_cache_ttl: float = 30.0
+    agent_cache_max_entries: int = 256
+    audio_executor_workers: int = 2
+    transcribe_max_bytes: int = 25 * 1024 * 1024
+    stt_partial_interval: float = 1.0
+    stt_partial_window_bytes: int = 256 * 1024
+    stt_partial_max_passes: int = 30
+    token_pool_size: int = 0
+    token_pool_max_age: float = 300.0
+    token_pool_agent_ids: list[str] = field(default_factory=list)
+    suggestion_cache_ttl: float = 7 * 24 * 3600.0
+    suggestion_cache_max_entries: int = 512
+    suggestion_cache_path: str | None = None
+    upstream_concurrency_initial: int = 8
+    upstream_concurrency_min: int = 1
+    upstream_concurrency_max: int = 64
+    upstream_queue_size: int = 16
+    upstream_queue_timeout: float = 2.0
+    upstream_latency_tolerance: float = 2.0
+    upstream_retries: int = 2
+    upstream_retry_base_delay: float = 0.2
+    upstream_retry_max_delay: float = 2.0
+    upstream_hedge_enabled: bool = False
+    upstream_hedge_percentile: float = 95.0
+    upstream_hedge_min_delay: float = 0.05
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout: float = 15.0
+    job_workers: int = 4
+    job_queue_size: int = 64
+    job_ttl: float = 600.0
+    job_max_entries: int = 1000
+    transcript_cache_max_entries: int = 256
+    transcript_cache_max_bytes: int = 2 * 1024 * 1024
+    audio_preprocess_enabled: bool = False
+    audio_target_sample_rate: int = 16_000
+    audio_silence_threshold_db: float = -45.0
+    audio_silence_padding_ms: int = 200
+    cache_backend: str = "memory"
+    cache_path: str | None = None
+    cache_invalidation_interval: float = 0.5
+    diff_cache_ttl: float = 3600.0
+    diff_cache_max_entries: int = 128
+    prompt_history_path: str | None = None
+    prompt_history_snapshot_interval: int = 10
+    batch_concurrency: int = 8
+    batch_max_items: int = 100
+    profiling_secret: str | None = None
+    profiling_sample_interval: float = 0.005
+    profiling_max_profiles: int = 20
+    loop_lag_threshold: float = 0.1
+    loop_lag_interval: float = 0.05
 
     @property
     def has_elevenlabs_credentials(self) -> bool:
@@ -30,6 +115,67 @@ def get_settings() -> Settings:
         elevenlabs_stt_model=os.getenv(
             "ELEVENLABS_STT_MODEL", "scribe_v1"
         ),
+        openai_base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com"),
+        elevenlabs_timeout=_env_float("ELEVENLABS_TIMEOUT", 10.0),
+        openai_timeout=_env_float("OPENAI_TIMEOUT", 20.0),
+        elevenlabs_stt_timeout=_env_float("ELEVENLABS_STT_TIMEOUT", 60.0),
+        http_max_connections=_env_int("HTTP_MAX_CONNECTIONS", 100),
+        http_max_keepalive_connections=_env_int(
+            "HTTP_MAX_KEEPALIVE_CONNECTIONS", 20
+        ),
+        http_keepalive_expiry=_env_float("HTTP_KEEPALIVE_EXPIRY", 30.0),
+        http2_enabled=_env_bool("HTTP2_ENABLED", True),
+        agent_cache_ttl=_env_float("AGENT_CACHE_TTL", 30.0),
+        agent_cache_max_entries=_env_int("AGENT_CACHE_MAX_ENTRIES", 256),
+        audio_executor_workers=_env_int("AUDIO_EXECUTOR_WORKERS", 2),
+        transcribe_max_bytes=_env_int("TRANSCRIBE_MAX_BYTES", 25 * 1024 * 1024),
+        stt_partial_interval=_env_float("STT_PARTIAL_INTERVAL", 1.0),
+        stt_partial_window_bytes=_env_int("STT_PARTIAL_WINDOW_BYTES", 256 * 1024),
+        stt_partial_max_passes=_env_int("STT_PARTIAL_MAX_PASSES", 30),
+        token_pool_size=_env_int("TOKEN_POOL_SIZE", 0),
+        token_pool_max_age=_env_float("TOKEN_POOL_MAX_AGE", 300.0),
+        token_pool_agent_ids=_env_list("TOKEN_POOL_AGENT_IDS"),
+        suggestion_cache_ttl=_env_float("SUGGESTION_CACHE_TTL", 7 * 24 * 3600.0),
+        suggestion_cache_max_entries=_env_int("SUGGESTION_CACHE_MAX_ENTRIES", 512),
+        suggestion_cache_path=os.getenv("SUGGESTION_CACHE_PATH") or None,
+        upstream_concurrency_initial=_env_int("UPSTREAM_CONCURRENCY_INITIAL", 8),
+        upstream_concurrency_min=_env_int("UPSTREAM_CONCURRENCY_MIN", 1),
+        upstream_concurrency_max=_env_int("UPSTREAM_CONCURRENCY_MAX", 64),
+        upstream_queue_size=_env_int("UPSTREAM_QUEUE_SIZE", 16),
+        upstream_queue_timeout=_env_float("UPSTREAM_QUEUE_TIMEOUT", 2.0),
+        upstream_latency_tolerance=_env_float("UPSTREAM_LATENCY_TOLERANCE", 2.0),
+        upstream_retries=_env_int("UPSTREAM_RETRIES", 2),
+        upstream_retry_base_delay=_env_float("UPSTREAM_RETRY_BASE_DELAY", 0.2),
+        upstream_retry_max_delay=_env_float("UPSTREAM_RETRY_MAX_DELAY", 2.0),
+        upstream_hedge_enabled=_env_bool("UPSTREAM_HEDGE_ENABLED", False),
+        upstream_hedge_percentile=_env_float("UPSTREAM_HEDGE_PERCENTILE", 95.0),
+        upstream_hedge_min_delay=_env_float("UPSTREAM_HEDGE_MIN_DELAY", 0.05),
+        circuit_failure_threshold=_env_int("CIRCUIT_FAILURE_THRESHOLD", 5),
+        circuit_reset_timeout=_env_float("CIRCUIT_RESET_TIMEOUT", 15.0),
+        job_workers=_env_int("JOB_WORKERS", 4),
+        job_queue_size=_env_int("JOB_QUEUE_SIZE", 64),
+        job_ttl=_env_float("JOB_TTL", 600.0),
+        job_max_entries=_env_int("JOB_MAX_ENTRIES", 1000),
+        transcript_cache_max_entries=_env_int("TRANSCRIPT_CACHE_MAX_ENTRIES", 256),
+        transcript_cache_max_bytes=_env_int("TRANSCRIPT_CACHE_MAX_BYTES", 2 * 1024 * 1024),
+        audio_preprocess_enabled=_env_bool("AUDIO_PREPROCESS", False),
+        audio_target_sample_rate=_env_int("AUDIO_TARGET_SAMPLE_RATE", 16_000),
+        audio_silence_threshold_db=_env_float("AUDIO_SILENCE_THRESHOLD_DB", -45.0),
+        audio_silence_padding_ms=_env_int("AUDIO_SILENCE_PADDING_MS", 200),
+        cache_backend=os.getenv("CACHE_BACKEND", "memory"),
+        cache_path=os.getenv("CACHE_PATH") or None,
+        cache_invalidation_interval=_env_float("CACHE_INVALIDATION_INTERVAL", 0.5),
+        diff_cache_ttl=_env_float("DIFF_CACHE_TTL", 3600.0),
+        diff_cache_max_entries=_env_int("DIFF_CACHE_MAX_ENTRIES", 128),
+        prompt_history_path=os.getenv("PROMPT_HISTORY_PATH") or None,
+        prompt_history_snapshot_interval=_env_int("PROMPT_HISTORY_SNAPSHOT_INTERVAL", 10),
+        batch_concurrency=_env_int("BATCH_CONCURRENCY", 8),
+        batch_max_items=_env_int("BATCH_MAX_ITEMS", 100),
+        profiling_secret=os.getenv("PROFILING_SECRET") or None,
+        profiling_sample_interval=_env_float("PROFILING_SAMPLE_INTERVAL", 0.005),
+        profiling_max_profiles=_env_int("PROFILING_MAX_PROFILES", 20),
+        loop_lag_threshold=_env_float("LOOP_LAG_THRESHOLD", 0.1),
+        loop_lag_interval=_env_float("LOOP_LAG_INTERVAL", 0.05),
     )
 
 
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, JSONResponse, PlainTextResponse, Response
+from starlette.types import Receive, Scope, Send
+
+# Files up to this size (and index.html, whatever its size) are read once at
+# startup and served from memory, together with their compressed variants.
+_MEMORY_MAX_BYTES = 256 * 1024
+
+# Vite emits content-hashed file names under assets/, so they never change.
+_IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+_REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Precompressed siblings written by the build, in order of preference.
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+_VARIANT_SUFFIXES = tuple(suffix for _, suffix in _ENCODINGS)
+
+
+@dataclass
+class _Variant:
+    path: Path
+    size: int
+    # Strong ETags promise identical bytes, so each encoding gets its own.
+    etag: str
+    body: Optional[bytes] = None
+
+
+@dataclass
+class _StaticFile:
+    media_type: str
+    cache_control: str
+    variants: dict[str, _Variant] = field(default_factory=dict)  # "identity", "br", "gzip"
+
+
+def _accepted_encodings(header: str | None) -> set[str]:
+    accepted: set[str] = set()
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.strip().lower())
+    if "*" in accepted:
+        accepted.update(encoding for encoding, _ in _ENCODINGS)
+    return accepted
+
+
+class FrontendFiles:
+    """ASGI app serving the Vite build directory.
+
+    The directory is scanned once at construction. Each file is served
+    with its build-time ``.br``/``.gz`` sibling when the client accepts
+    that encoding, under a strong ETag of its own (``"<hash>-br"``). Hashed ``assets/*`` are marked
+    immutable; everything else (notably ``index.html``) revalidates.
+    Small files and ``index.html`` are held in memory; larger ones are
+    streamed from disk. Unknown extension-less paths fall back to
+    ``index.html`` so client-side routes survive a reload, except under
+    ``backend_paths``: those belong to the API, so a miss there gets the
+    API's JSON 404 instead of the app shell.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        backend_paths: tuple[str, ...] = (),
+        memory_max_bytes: int = _MEMORY_MAX_BYTES,
+    ):
+        self.directory = directory
+        self._backend_paths = tuple(path.strip("/") for path in backend_paths)
+        self._memory_max_bytes = memory_max_bytes
+        self._files: dict[str, _StaticFile] = {}
+        self._scan()
+
+    def _scan(self) -> None:
+        for path in sorted(self.directory.rglob("*")):
+            if not path.is_file() or path.name.endswith(_VARIANT_SUFFIXES):
+                continue
+            relative = path.relative_to(self.directory).as_posix()
+            content = path.read_bytes()
+            keep_in_memory = relative == "index.html" or len(content) <= self._memory_max_bytes
+
+            media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            if media_type.startswith("text/") or media_type in {"application/javascript", "image/svg+xml"}:
+                media_type += "; charset=utf-8"
+
+            digest = hashlib.sha256(content).hexdigest()[:32]
+            static_file = _StaticFile(
+                media_type=media_type,
+                cache_control=(
+                    _IMMUTABLE_CACHE_CONTROL
+                    if relative.startswith("assets/")
+                    else _REVALIDATE_CACHE_CONTROL
+                ),
+            )
+            static_file.variants["identity"] = _Variant(
+                path=path,
+                size=len(content),
+                etag=f'"{digest}"',
+                body=content if keep_in_memory else None,
+            )
+            for encoding, suffix in _ENCODINGS:
+                compressed = path.with_name(path.name + suffix)
+                if compressed.is_file():
+                    size = compressed.stat().st_size
+                    static_file.variants[encoding] = _Variant(
+                        path=compressed,
+                        size=size,
+                        etag=f'"{digest}-{suffix[1:]}"',
+                        body=compressed.read_bytes() if keep_in_memory else None,
+                    )
+            self._files[relative] = static_file
+
+    def _is_backend_path(self, path: str) -> bool:
+        relative = path.strip("/")
+        return any(
+            relative == prefix or relative.startswith(prefix + "/")
+            for prefix in self._backend_paths
+        )
+
+    def _lookup(self, path: str) -> Optional[_StaticFile]:
+        relative = path.lstrip("/")
+        if not relative or relative.endswith("/"):
+            relative += "index.html"
+        static_file = self._files.get(relative)
+        if static_file is not None:
+            return static_file
+        # SPA fallback: extension-less paths are client-side routes.
+        if "." not in relative.rsplit("/", 1)[-1] and not relative.startswith("assets/"):
+            return self._files.get("index.html")
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            raise RuntimeError("FrontendFiles only handles HTTP requests")
+
+        response = self._response(scope)
+        await response(scope, receive, send)
+
+    def _response(self, scope: Scope) -> Response:
+        if self._is_backend_path(scope["path"]):
+            return JSONResponse({"detail": "Not Found"}, status_code=404)
+
+        method = scope["method"]
+        if method not in {"GET", "HEAD"}:
+            return PlainTextResponse("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+
+        static_file = self._lookup(scope["path"])
+        if static_file is None:
+            return PlainTextResponse("Not Found", status_code=404)
+
+        request_headers = Headers(scope=scope)
+        accepted = _accepted_encodings(request_headers.get("accept-encoding"))
+        encoding = next(
+            (name for name, _ in _ENCODINGS if name in accepted and name in static_file.variants),
+            "identity",
+        )
+        variant = static_file.variants[encoding]
+
+        headers = {
+            "ETag": variant.etag,
+            "Cache-Control": static_file.cache_control,
+        }
+        if len(static_file.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+
+        # Only the tag of the negotiated variant counts: a cached br body is
+        # no use to a client that now gets identity.
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and variant.etag in {
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        }:
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+
+        if variant.body is None:
+            return FileResponse(
+                variant.path,
+                media_type=static_file.media_type,
+                headers=headers,
+                stat_result=variant.path.stat(),
+            )
+
+        headers["Content-Length"] = str(variant.size)
+        return Response(
+            b"" if method == "HEAD" else variant.body,
+            media_type=static_file.media_type,
+            headers=headers,
+        )
+
+
+__all__ = ["FrontendFiles"]
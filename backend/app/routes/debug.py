@@ -0,0 +1,49 @@
+from typing import Any, Literal, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Response, status
+
+from ..config import get_settings
+from ..services.loop_monitor import loop_monitor
+from ..services.profiling import collapsed_stacks, get_profile, secret_matches
+
+router = APIRouter(prefix="/api", tags=["debug"])
+
+
+def _require_secret(x_profile: Optional[str]) -> None:
+    if not get_settings().profiling_secret:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiling is disabled")
+    if not secret_matches(x_profile):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid profiling secret")
+
+
+@router.get(
+    "/debug/profiles/{profile_id}",
+    summary="Download the profile of a request sent with X-Profile",
+)
+async def read_profile(
+    profile_id: str,
+    format: Literal["json", "collapsed"] = "json",
+    x_profile: Optional[str] = Header(default=None),
+) -> Any:
+    _require_secret(x_profile)
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    if format == "collapsed":
+        return Response(
+            collapsed_stacks(profile),
+            media_type="text/plain",
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.txt"'},
+        )
+    return profile
+
+
+@router.get(
+    "/debug/loop-stalls",
+    summary="Recent event loop stalls with the stack that caused them",
+)
+async def read_loop_stalls(
+    x_profile: Optional[str] = Header(default=None),
+) -> dict[str, Any]:
+    _require_secret(x_profile)
+    return loop_monitor.stats()
@@ -1,18 +1,45 @@
-from typing import Any, Optional
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import (
+    APIRouter,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from ..services.elevenlabs import (
     ElevenLabsError,
     create_conversation_token,
+    etag_matches,
+    get_cache_stats,
     get_prompt,
+    get_prompt_revision,
+    get_token_pool_stats,
+    list_prompt_history,
+    prompt_etag,
+    restore_prompt_revision,
+    stream_prompt_suggestion,
     suggest_prompt,
     transcribe_audio,
+    transcribe_audio_stream,
     update_prompt,
 )
+from ..services.batch import batch_conversation_tokens, batch_prompts, prepare_agent_ids
+from ..services.jobs import Job, job_manager
+from ..services.profiling import ProfiledRoute
+from ..services.prompt_diff import prompt_diff
+from ..services.streaming_stt import IncrementalTranscriber
 
-router = APIRouter(tags=["elevenlabs"])
+router = APIRouter(prefix="/api", tags=["elevenlabs"], route_class=ProfiledRoute)
 
 
 class ConversationTokenRequest(BaseModel):
@@ -34,9 +61,59 @@ async def issue_conversation_token(
         raise HTTPException(
             status_code=int(getattr(exc, "status_code", status.HTTP_502_BAD_GATEWAY)),
             detail=str(exc),
+            headers=exc.headers,
         ) from exc
 
 
+@router.get(
+    "/elevenlabs/conversation-token/pool",
+    summary="Report pre-minted conversation token pool size, hit rate and refill latency",
+)
+async def conversation_token_pool_stats() -> dict[str, Any]:
+    return get_token_pool_stats()
+
+
+class AgentBatchRequest(BaseModel):
+    agent_ids: list[str] = Field(
+        min_length=1, description="Agents to fan out to; duplicates are dropped."
+    )
+
+
+def _ndjson_response(items: AsyncIterator[dict[str, Any]]) -> StreamingResponse:
+    async def lines() -> AsyncIterator[bytes]:
+        try:
+            async for item in items:
+                yield (json.dumps(item) + "\n").encode()
+        finally:
+            await items.aclose()
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _prepare_batch(body: AgentBatchRequest) -> list[str]:
+    try:
+        return prepare_agent_ids(body.agent_ids)
+    except ElevenLabsError as exc:
+        raise HTTPException(
+            status_code=int(getattr(exc, "status_code", status.HTTP_502_BAD_GATEWAY)),
+            detail=str(exc),
+            headers=exc.headers,
+        ) from exc
+
+
+@router.post(
+    "/elevenlabs/conversation-token/batch",
+    summary="Mint conversation tokens for many agents, streamed back as NDJSON",
+    response_class=StreamingResponse,
+)
+async def issue_conversation_token_batch(body: AgentBatchRequest) -> StreamingResponse:
+    return _ndjson_response(batch_conversation_tokens(_prepare_batch(body)))
+
+
 class PromptResponse(BaseModel):
     agent_id: str
     display_name: Optional[str] = None
@@ -52,11 +129,46 @@ class PromptUpdateRequest(BaseModel):
     )
 
 
+class PromptRevisionSummary(BaseModel):
+    agent_id: str
+    revision: int
+    created_at: float
+    source: str = Field(description="save, restore, or upstream for a version first seen on ElevenLabs")
+    kind: str = Field(description="snapshot or delta")
+    stored_bytes: int
+    prompt_hash: str
+    restored_from: Optional[int] = None
+
+
+class PromptHistoryResponse(BaseModel):
+    agent_id: str
+    revisions: list[PromptRevisionSummary]
+
+
+class PromptRevisionResponse(PromptRevisionSummary):
+    prompt: str
+    first_message: Optional[str] = None
+
+
+class PromptRestoreRequest(BaseModel):
+    agent_id: Optional[str] = Field(
+        default=None, description="Overrides ELEVENLABS_AGENT_ID for this request."
+    )
+
+
 class PromptSuggestionRequest(BaseModel):
     feedback: str
     agent_id: Optional[str] = Field(
         default=None, description="Overrides ELEVENLABS_AGENT_ID for this request."
     )
+    bypass_cache: bool = Field(
+        default=False,
+        description="Skip cached suggestions and always ask the model (the fresh result is still cached).",
+    )
+    include_diff: bool = Field(
+        default=False,
+        description="Also return the line/word diff from the current to the suggested prompt.",
+    )
 
 
 class PromptSuggestionResponse(BaseModel):
@@ -64,6 +176,31 @@ class PromptSuggestionResponse(BaseModel):
     display_name: Optional[str] = None
     current_prompt: str
     suggested_prompt: str
+    diff: Optional[dict[str, Any]] = Field(
+        default=None, description="Same shape as the /prompt/diff response; set with include_diff."
+    )
+
+
+# Prompts are well below this; it only bounds the work one request can ask for.
+_MAX_DIFF_CHARS = 2_000_000
+
+
+class PromptDiffRequest(BaseModel):
+    base: str = Field(max_length=_MAX_DIFF_CHARS)
+    revised: str = Field(max_length=_MAX_DIFF_CHARS)
+    context: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Unchanged lines kept around each change; omit to return every line.",
+    )
+
+
+class PromptDiffResponse(BaseModel):
+    base_hash: str
+    revised_hash: str
+    context: Optional[int] = None
+    stats: dict[str, int]
+    hunks: list[dict[str, Any]]
 
 
 class TranscriptionRequest(BaseModel):
@@ -86,14 +223,25 @@ class TranscriptionResponse(BaseModel):
     response_model=PromptResponse,
     summary="Fetch the current ElevenLabs agent prompt",
 )
-async def fetch_prompt(agent_id: Optional[str] = None) -> PromptResponse:
+async def fetch_prompt(
+    response: Response,
+    agent_id: Optional[str] = None,
+    if_none_match: Optional[str] = Header(default=None),
+) -> PromptResponse:
     try:
         data = await get_prompt(agent_id=agent_id)
-        return PromptResponse(**data)
+        body = PromptResponse(**data)
+        etag = prompt_etag(body.model_dump())
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+        return body
     except ElevenLabsError as exc:
         raise HTTPException(
             status_code=int(getattr(exc, "status_code", status.HTTP_502_BAD_GATEWAY)),
             detail=str(exc),
+            headers=exc.headers,
         ) from exc
 
 
@@ -115,58 +263,203 @@ async def transcribe(body: TranscriptionRequest) -> TranscriptionResponse:
         raise HTTPException(
             status_code=int(getattr(exc, "status_code", status.HTTP_502_BAD_GATEWAY)),
             detail=str(exc),
+            headers=exc.headers,
+        ) from exc
+
+
+@router.post(
+    "/elevenlabs/transcribe/stream",
+    response_model=TranscriptionResponse,
+    summary="Transcribe a raw audio upload streamed through to ElevenLabs",
+)
+async def transcribe_stream(
+    request: Request,
+    format: Optional[str] = None,
+    language_code: Optional[str] = None,
+    model_id: Optional[str] = None,
+) -> TranscriptionResponse:
+    content_type = request.headers.get("content-type", "")
+    mime_type = content_type.split(";", 1)[0].strip().lower() or None
+    if mime_type and not mime_type.startswith("audio/"):
+        mime_type = None
+    fmt = format or (mime_type.split("/", 1)[1] if mime_type else "webm")
+
+    raw_length = request.headers.get("content-length")
+    content_length = int(raw_length) if raw_length and raw_length.isdigit() else None
+
+    try:
+        data = await transcribe_audio_stream(
+            chunks=request.stream(),
+            fmt=fmt,
+            mime_type=mime_type,
+            content_length=content_length,
+            language_code=language_code,
+            model_id=model_id,
+        )
+        return TranscriptionResponse(**data)
+    except ElevenLabsError as exc:
+        raise HTTPException(
+            status_code=int(getattr(exc, "status_code", status.HTTP_502_BAD_GATEWAY)),
+            detail=str(exc),
+            headers=exc.headers,
         ) from exc
 
 
+@router.websocket("/elevenlabs/transcribe/ws")
+async def transcribe_live(
+    websocket: WebSocket,
+    format: str = "webm",
+    language_code: Optional[str] = None,
+    model_id: Optional[str] = None,
+) -> None:
+    """Live dictation: binary frames carry MediaRecorder chunks, a
+    ``{"type": "stop"}`` text frame ends the clip. The server pushes
+    ``partial`` events while audio arrives and one ``final`` (or ``error``)
+    event at the end."""
+    await websocket.accept()
+
+    async def send_partial(text: str) -> None:
+        await websocket.send_json({"type": "partial", "text": text})
+
+    transcriber = IncrementalTranscriber(
+        on_partial=send_partial,
+        fmt=format,
+        language_code=language_code,
+        model_id=model_id,
+    )
+    transcriber.start()
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes"):
+                transcriber.feed(message["bytes"])
+            elif message.get("text"):
+                try:
+                    event = json.loads(message["text"])
+                except ValueError:
+                    continue
+                if isinstance(event, dict) and event.get("type") == "stop":
+                    break
+
+        text = await transcriber.finish()
+        await websocket.send_json({"type": "final", "text": text})
+        await websocket.close()
+    except ElevenLabsError as exc:
+        await websocket.send_json(
+            {
+                "type": "error",
+                "status_code": int(getattr(exc, "status_code", status.HTTP_502_BAD_GATEWAY)),
+                "detail": str(exc),
+            }
+        )
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await transcriber.aclose()
+
+
 @router.put(
     "/elevenlabs/prompt",
     response_model=PromptResponse,
     summary="Persist a new agent prompt to ElevenLabs",
 )
-async def save_prompt(body: PromptUpdateRequest) -> PromptResponse:
+async def save_prompt(
+    body: PromptUpdateRequest,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+) -> PromptResponse:
     try:
         updated = await update_prompt(
             prompt=body.prompt,
             first_message=body.first_message,
             agent_id=body.agent_id,
+            if_match=if_match,
         )
-        prompt_text = None
-        first_message = None
-        display_name = None
-        try:
-            prompt_text = (
-                updated["conversation_config"]["agent"]["prompt"]["prompt"]
-            )  # type: ignore[index]
-        except (KeyError, TypeError):
-            prompt_text = body.prompt
-        try:
-            first_message = (
-                updated["conversation_config"]["agent"]["first_message"]
-            )  # type: ignore[index]
-        except (KeyError, TypeError):
-            first_message = body.first_message
-        if isinstance(updated, dict):
-            raw_name = updated.get("display_name")
-            if isinstance(raw_name, str):
-                display_name = raw_name.strip() or None
-            elif raw_name is None:
-                display_name = None
-        resolved_agent_id = ""
-        if isinstance(updated, dict):
-            resolved_agent_id = str(updated.get("agent_id") or "")
-        if not resolved_agent_id:
-            resolved_agent_id = body.agent_id or ""
-
-        return PromptResponse(
-            agent_id=resolved_agent_id,
-            display_name=display_name,
-            prompt=prompt_text,
-            first_message=first_message,
-        )
+        saved = PromptResponse(**updated)
+        response.headers["ETag"] = prompt_etag(saved.model_dump())
+        return saved
     except ElevenLabsError as exc:
         raise HTTPException(
             status_code=int(getattr(exc, "status_code", status.HTTP_502_BAD_GATEWAY)),
             detail=str(exc),
+            headers=exc.headers,
+        ) from exc
+
+
+@router.post(
+    "/elevenlabs/prompt/batch",
+    summary="Fetch prompts for many agents, streamed back as NDJSON",
+    response_class=StreamingResponse,
+)
+async def read_prompt_batch(body: AgentBatchRequest) -> StreamingResponse:
+    return _ndjson_response(batch_prompts(_prepare_batch(body)))
+
+
+@router.get(
+    "/elevenlabs/prompt/history",
+    response_model=PromptHistoryResponse,
+    summary="List locally stored prompt revisions, newest first",
+)
+async def prompt_history_list(
+    agent_id: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    before: Optional[int] = Query(default=None, description="Only revisions older than this one."),
+) -> PromptHistoryResponse:
+    try:
+        data = await list_prompt_history(agent_id, limit=limit, before=before)
+        return PromptHistoryResponse(**data)
+    except ElevenLabsError as exc:
+        raise HTTPException(
+            status_code=int(getattr(exc, "status_code", status.HTTP_502_BAD_GATEWAY)),
+            detail=str(exc),
+            headers=exc.headers,
+        ) from exc
+
+
+@router.get(
+    "/elevenlabs/prompt/history/{revision}",
+    response_model=PromptRevisionResponse,
+    summary="Read one prompt revision from the local store",
+)
+async def prompt_history_revision(
+    revision: int, agent_id: Optional[str] = None
+) -> PromptRevisionResponse:
+    try:
+        return PromptRevisionResponse(**await get_prompt_revision(revision, agent_id))
+    except ElevenLabsError as exc:
+        raise HTTPException(
+            status_code=int(getattr(exc, "status_code", status.HTTP_502_BAD_GATEWAY)),
+            detail=str(exc),
+            headers=exc.headers,
+        ) from exc
+
+
+@router.post(
+    "/elevenlabs/prompt/history/{revision}/restore",
+    response_model=PromptResponse,
+    summary="Save a stored revision back to ElevenLabs as the current prompt",
+)
+async def prompt_history_restore(
+    revision: int,
+    body: PromptRestoreRequest,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+) -> PromptResponse:
+    try:
+        restored = PromptResponse(**await restore_prompt_revision(
+            revision, agent_id=body.agent_id, if_match=if_match
+        ))
+        response.headers["ETag"] = prompt_etag(restored.model_dump())
+        return restored
+    except ElevenLabsError as exc:
+        raise HTTPException(
+            status_code=int(getattr(exc, "status_code", status.HTTP_502_BAD_GATEWAY)),
+            detail=str(exc),
+            headers=exc.headers,
         ) from exc
 
 
@@ -179,10 +472,229 @@ async def suggest_prompt_update(
     body: PromptSuggestionRequest,
 ) -> PromptSuggestionResponse:
     try:
-        data = await suggest_prompt(feedback=body.feedback, agent_id=body.agent_id)
+        data = await suggest_prompt(
+            feedback=body.feedback,
+            agent_id=body.agent_id,
+            use_cache=not body.bypass_cache,
+            include_diff=body.include_diff,
+        )
         return PromptSuggestionResponse(**data)
     except ElevenLabsError as exc:
         raise HTTPException(
             status_code=int(getattr(exc, "status_code", status.HTTP_502_BAD_GATEWAY)),
             detail=str(exc),
+            headers=exc.headers,
+        ) from exc
+
+
+@router.post(
+    "/elevenlabs/prompt/diff",
+    response_model=PromptDiffResponse,
+    summary="Diff two prompts into line hunks with word-level detail",
+)
+async def diff_prompt_versions(body: PromptDiffRequest) -> PromptDiffResponse:
+    data = await prompt_diff(body.base, body.revised, context=body.context)
+    return PromptDiffResponse(**data)
+
+
+def _sse_event(event: str, data: Any) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+@router.post(
+    "/elevenlabs/prompt/suggest/stream",
+    summary="Stream a prompt update suggestion as Server-Sent Events",
+    response_class=StreamingResponse,
+)
+async def stream_prompt_suggestion_update(
+    body: PromptSuggestionRequest,
+) -> StreamingResponse:
+    events = stream_prompt_suggestion(
+        feedback=body.feedback,
+        agent_id=body.agent_id,
+        use_cache=not body.bypass_cache,
+        include_diff=body.include_diff,
+    )
+    try:
+        start = await anext(events)
+    except ElevenLabsError as exc:
+        raise HTTPException(
+            status_code=int(getattr(exc, "status_code", status.HTTP_502_BAD_GATEWAY)),
+            detail=str(exc),
+            headers=exc.headers,
+        ) from exc
+
+    async def event_stream():
+        start.pop("type")
+        yield _sse_event("start", start)
+        try:
+            async for event in events:
+                kind = event.pop("type")
+                if kind == "delta":
+                    yield _sse_event("token", event)
+                elif kind == "done":
+                    yield _sse_event(
+                        "done", PromptSuggestionResponse(**event).model_dump()
+                    )
+        except ElevenLabsError as exc:
+            yield _sse_event(
+                "error",
+                {
+                    "status_code": int(getattr(exc, "status_code", status.HTTP_502_BAD_GATEWAY)),
+                    "detail": str(exc),
+                },
+            )
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class JobAcceptedResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str
+    status_url: str
+    events_url: str
+
+
+class JobError(BaseModel):
+    status_code: int
+    detail: str
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str = Field(description="queued, running, succeeded or failed")
+    created_at: float
+    finished_at: Optional[float] = None
+    result: Optional[dict[str, Any]] = None
+    error: Optional[JobError] = None
+
+
+# SSE comment sent while a job runs, so idle-timeout proxies keep the stream open.
+_JOB_KEEPALIVE_SECONDS = 15.0
+
+
+def _accept_job(request: Request, response: Response, job: Job) -> JobAcceptedResponse:
+    status_url = request.app.url_path_for("get_job", job_id=job.id)
+    response.headers["Location"] = status_url
+    return JobAcceptedResponse(
+        job_id=job.id,
+        kind=job.kind,
+        status=job.status,
+        status_url=status_url,
+        events_url=request.app.url_path_for("stream_job_events", job_id=job.id),
+    )
+
+
+def _submit_job(kind: str, work: Callable[[], Awaitable[dict[str, Any]]]) -> Job:
+    try:
+        return job_manager.submit(kind, work)
+    except ElevenLabsError as exc:
+        raise HTTPException(
+            status_code=int(getattr(exc, "status_code", status.HTTP_502_BAD_GATEWAY)),
+            detail=str(exc),
+            headers=exc.headers,
         ) from exc
+
+
+def _lookup_job(job_id: str) -> Job:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown or expired job",
+        )
+    return job
+
+
+@router.post(
+    "/elevenlabs/jobs/transcribe",
+    response_model=JobAcceptedResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue a transcription and return its job id",
+)
+async def submit_transcription_job(
+    body: TranscriptionRequest, request: Request, response: Response
+) -> JobAcceptedResponse:
+    async def work() -> dict[str, Any]:
+        data = await transcribe_audio(
+            audio_base64=body.audio,
+            fmt=body.format,
+            language_code=body.language_code,
+            model_id=body.model_id,
+        )
+        return TranscriptionResponse(**data).model_dump()
+
+    return _accept_job(request, response, _submit_job("transcribe", work))
+
+
+@router.post(
+    "/elevenlabs/jobs/suggest",
+    response_model=JobAcceptedResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue a prompt suggestion and return its job id",
+)
+async def submit_suggestion_job(
+    body: PromptSuggestionRequest, request: Request, response: Response
+) -> JobAcceptedResponse:
+    async def work() -> dict[str, Any]:
+        data = await suggest_prompt(
+            feedback=body.feedback,
+            agent_id=body.agent_id,
+            use_cache=not body.bypass_cache,
+            include_diff=body.include_diff,
+        )
+        return PromptSuggestionResponse(**data).model_dump()
+
+    return _accept_job(request, response, _submit_job("suggest", work))
+
+
+@router.get(
+    "/elevenlabs/jobs/{job_id}",
+    response_model=JobResponse,
+    summary="Poll a background job",
+)
+async def get_job(job_id: str) -> JobResponse:
+    return JobResponse(**_lookup_job(job_id).snapshot())
+
+
+@router.get(
+    "/elevenlabs/jobs/{job_id}/events",
+    summary="Wait for a background job as Server-Sent Events",
+    response_class=StreamingResponse,
+)
+async def stream_job_events(job_id: str) -> StreamingResponse:
+    job = _lookup_job(job_id)
+
+    async def event_stream():
+        yield _sse_event("status", {"job_id": job.id, "status": job.status})
+        while not job.finished:
+            try:
+                await asyncio.wait_for(job.done.wait(), _JOB_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+        if job.error is not None:
+            yield _sse_event("error", job.error)
+        else:
+            yield _sse_event("done", job.result)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/elevenlabs/cache",
+    summary="Report agent config and suggestion cache hit/miss counters",
+)
+async def cache_stats() -> dict[str, Any]:
+    return get_cache_stats()
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import io
+import logging
+import wave
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from .metrics import SIZE_BUCKETS, Counter, Histogram, registry
+
+logger = logging.getLogger(__name__)
+
+# Formats we can decode without ffmpeg: uncompressed PCM in a RIFF container.
+PCM_FORMATS = frozenset({"wav", "wave", "x-wav", "pcm"})
+
+_FRAME_MS = 20
+_DBFS_FLOOR = -100.0
+
+preprocess_outcomes = registry.register(Counter(
+    "voice_test_audio_preprocess_total",
+    "Audio preprocessing attempts by outcome (applied, skipped, unavailable).",
+    ("outcome",),
+))
+preprocess_saved_bytes = registry.register(Histogram(
+    "voice_test_audio_preprocess_saved_bytes",
+    "Upload bytes saved per preprocessed request.",
+    buckets=SIZE_BUCKETS,
+))
+
+
+@dataclass(frozen=True)
+class PreprocessResult:
+    audio: bytes
+    original_bytes: int
+    sample_rate: int
+    trimmed_seconds: float
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - len(self.audio)
+
+
+@lru_cache(maxsize=1)
+def numpy_available() -> bool:
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def preprocess_wav(
+    data: bytes,
+    *,
+    target_rate: int,
+    silence_threshold_db: float,
+    padding_ms: int,
+) -> Optional[PreprocessResult]:
+    """Downmix, resample and silence-trim a PCM WAV clip.
+
+    Returns a 16-bit mono WAV at ``target_rate`` (never upsampled) with
+    leading and trailing frames quieter than ``silence_threshold_db`` dBFS
+    removed, keeping ``padding_ms`` of context on each side. Returns
+    ``None`` when the clip is not PCM WAV, is all silence, or would not get
+    smaller, in which case the original should be sent as-is.
+
+    Blocking and CPU-bound: run it on the ``audio`` executor.
+    """
+    import numpy as np
+
+    try:
+        with wave.open(io.BytesIO(data)) as reader:
+            channels = reader.getnchannels()
+            width = reader.getsampwidth()
+            rate = reader.getframerate()
+            raw = reader.readframes(reader.getnframes())
+    except (wave.Error, EOFError) as exc:
+        logger.debug("Skipping preprocessing of unreadable WAV: %s", exc)
+        return None
+
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    elif width == 4:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        return None
+
+    usable = len(samples) - len(samples) % channels
+    mono = samples[:usable].reshape(-1, channels).mean(axis=1)
+    if mono.size == 0:
+        return None
+
+    if rate > target_rate:
+        # Box-filter low-pass before linear interpolation to limit aliasing.
+        taps = int(np.ceil(rate / target_rate))
+        if taps > 1:
+            mono = np.convolve(mono, np.full(taps, 1.0 / taps, dtype=np.float32), mode="same")
+        duration = mono.size / rate
+        out_size = max(1, int(round(duration * target_rate)))
+        source_times = np.arange(mono.size, dtype=np.float64) / rate
+        target_times = np.arange(out_size, dtype=np.float64) / target_rate
+        mono = np.interp(target_times, source_times, mono).astype(np.float32)
+        rate = target_rate
+
+    # Energy VAD: RMS per 20ms frame in dBFS, vs. the threshold.
+    frame = max(1, rate * _FRAME_MS // 1000)
+    frame_count = mono.size // frame
+    if frame_count == 0:
+        return None
+    frames = mono[: frame_count * frame].reshape(frame_count, frame)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    dbfs = 20 * np.log10(np.maximum(rms, 10 ** (_DBFS_FLOOR / 20)))
+    voiced = np.flatnonzero(dbfs > silence_threshold_db)
+    if voiced.size == 0:
+        return None
+
+    pad = padding_ms * rate // 1000
+    start = max(0, int(voiced[0]) * frame - pad)
+    end = min(mono.size, (int(voiced[-1]) + 1) * frame + pad)
+    trimmed_seconds = (mono.size - (end - start)) / rate
+    mono = mono[start:end]
+
+    pcm = (np.clip(mono, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(rate)
+        writer.writeframes(pcm)
+
+    audio = buffer.getvalue()
+    if len(audio) >= len(data):
+        return None
+    return PreprocessResult(
+        audio=audio,
+        original_bytes=len(data),
+        sample_rate=rate,
+        trimmed_seconds=trimmed_seconds,
+    )
+
+
+def synthetic_wav(
+    *,
+    rate: int = 48_000,
+    channels: int = 2,
+    silence_seconds: float = 1.0,
+    tone_seconds: float = 2.0,
+    frequency: float = 440.0,
+) -> bytes:
+    """A tone padded with silence on both sides, for offline checks and benchmarks."""
+    import numpy as np
+
+    silence = np.zeros(int(rate * silence_seconds), dtype=np.float32)
+    t = np.arange(int(rate * tone_seconds), dtype=np.float32) / rate
+    tone = 0.5 * np.sin(2 * np.pi * frequency * t).astype(np.float32)
+    mono = np.concatenate([silence, tone, silence])
+    interleaved = np.repeat(mono[:, None], channels, axis=1)
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(2)
+        writer.setframerate(rate)
+        writer.writeframes((interleaved * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+__all__ = [
+    "PCM_FORMATS",
+    "PreprocessResult",
+    "numpy_available",
+    "preprocess_wav",
+    "synthetic_wav",
+]
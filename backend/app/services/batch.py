@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from http import HTTPStatus
+from typing import Any, AsyncIterator, Awaitable, Callable, Sequence, TypeVar, Union
+
+from ..config import get_settings
+from .elevenlabs import ElevenLabsError, create_conversation_token, get_prompt, prompt_etag
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def fan_out(
+    items: Sequence[T],
+    fn: Callable[[T], Awaitable[R]],
+    *,
+    concurrency: int,
+) -> AsyncIterator[tuple[int, T, Union[R, Exception]]]:
+    """Run ``fn`` over ``items``, at most ``concurrency`` at a time.
+
+    Yields ``(index, item, result)`` in completion order; a failed item
+    yields its exception as the result instead of stopping the others.
+    Closing the iterator early (e.g. the client went away) cancels
+    whatever is still running.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    finished: asyncio.Queue[tuple[int, T, Union[R, Exception]]] = asyncio.Queue()
+
+    async def run(index: int, item: T) -> None:
+        async with semaphore:
+            try:
+                result: Union[R, Exception] = await fn(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                result = exc
+        finished.put_nowait((index, item, result))
+
+    tasks = [asyncio.create_task(run(index, item)) for index, item in enumerate(items)]
+    try:
+        for _ in tasks:
+            yield await finished.get()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def prepare_agent_ids(agent_ids: Sequence[str]) -> list[str]:
+    """Strip and de-duplicate (keeping order), then enforce ``BATCH_MAX_ITEMS``."""
+    unique = list(dict.fromkeys(agent_id.strip() for agent_id in agent_ids if agent_id.strip()))
+    if not unique:
+        raise ElevenLabsError(
+            "agent_ids must contain at least one agent id",
+            status_code=HTTPStatus.BAD_REQUEST,
+        )
+    limit = get_settings().batch_max_items
+    if len(unique) > limit:
+        raise ElevenLabsError(
+            f"At most {limit} agents per batch",
+            status_code=HTTPStatus.BAD_REQUEST,
+        )
+    return unique
+
+
+def _item(index: int, agent_id: str, result: Union[dict[str, Any], Exception]) -> dict[str, Any]:
+    if isinstance(result, ElevenLabsError):
+        return {
+            "index": index,
+            "agent_id": agent_id,
+            "ok": False,
+            "status_code": int(result.status_code),
+            "detail": str(result),
+        }
+    if isinstance(result, Exception):
+        logger.error("Batch item for agent %s failed", agent_id, exc_info=result)
+        return {
+            "index": index,
+            "agent_id": agent_id,
+            "ok": False,
+            "status_code": int(HTTPStatus.INTERNAL_SERVER_ERROR),
+            "detail": "Unexpected error",
+        }
+    return {"index": index, "agent_id": agent_id, "ok": True, **result}
+
+
+async def _prompt_with_etag(agent_id: str) -> dict[str, Any]:
+    view = await get_prompt(agent_id)
+    return {"prompt": view, "etag": prompt_etag(view)}
+
+
+async def _token(agent_id: str) -> dict[str, Any]:
+    return {"token": await create_conversation_token(agent_id)}
+
+
+async def batch_prompts(agent_ids: Sequence[str]) -> AsyncIterator[dict[str, Any]]:
+    """One result per agent, as each prompt arrives."""
+    results = fan_out(agent_ids, _prompt_with_etag, concurrency=get_settings().batch_concurrency)
+    try:
+        async for index, agent_id, result in results:
+            yield _item(index, agent_id, result)
+    finally:
+        await results.aclose()
+
+
+async def batch_conversation_tokens(agent_ids: Sequence[str]) -> AsyncIterator[dict[str, Any]]:
+    """One conversation token per agent, as each one is minted (or taken from the pool)."""
+    results = fan_out(agent_ids, _token, concurrency=get_settings().batch_concurrency)
+    try:
+        async for index, agent_id, result in results:
+            yield _item(index, agent_id, result)
+    finally:
+        await results.aclose()
+
+
+__all__ = ["batch_conversation_tokens", "batch_prompts", "fan_out", "prepare_agent_ids"]
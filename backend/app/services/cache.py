@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from ..config import Settings, get_settings
+from .cache_backends import CacheBackend, MemoryCacheBackend, SQLiteCacheBackend
+from .executors import run_blocking
+from .metrics import Counter, registry
+
+logger = logging.getLogger(__name__)
+
+shared_cache_lookups = registry.register(Counter(
+    "voice_test_shared_cache_lookups_total",
+    "Lookups in the cross-worker cache tier after a local miss, by namespace and result.",
+    ("namespace", "result"),
+))
+shared_cache_invalidations = registry.register(Counter(
+    "voice_test_shared_cache_invalidations_total",
+    "Cross-worker cache invalidations by namespace and direction (sent or received).",
+    ("namespace", "direction"),
+))
+
+
+class TTLCache:
+    """Small in-process LRU cache whose entries expire after ``ttl`` seconds.
+
+    Values are deep-copied on the way in and out so callers can mutate what
+    they get back without corrupting the cached document.
+    """
+
+    def __init__(self, *, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(value)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def configure(self, *, maxsize: int, ttl: float) -> None:
+        """Apply new limits; entries already cached keep their expiry."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._entries and len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+class SharedCache:
+    """A local ``TTLCache`` in front of one namespace of a ``CacheBackend``.
+
+    Reads try the in-process LRU, then the backend, and keep what they find
+    locally. Writes go to both. With a shared backend, ``set(...,
+    publish=True)`` and ``invalidate`` make the other workers drop their
+    local copy, so their next read picks up the new value from the backend
+    instead of the upstream. Values must be JSON-serialisable.
+    """
+
+    def __init__(self, namespace: str, *, maxsize: int, ttl: float, backend: CacheBackend):
+        self.namespace = namespace
+        self.backend = backend
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.shared_hits = 0
+        self.invalidations_sent = 0
+        self.invalidations_received = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._local.enabled
+
+    @property
+    def shared(self) -> bool:
+        return self.enabled and self.backend.shared
+
+    def get_local(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        return self._local.get(key)
+
+    async def get_shared(self, key: str) -> Optional[Any]:
+        if not self.shared:
+            return None
+
+        raw = await run_blocking("cache", self.backend.get, self.namespace, key)
+        if raw is None:
+            shared_cache_lookups.inc(self.namespace, "miss")
+            return None
+        self.shared_hits += 1
+        shared_cache_lookups.inc(self.namespace, "hit")
+        value = json.loads(raw)
+        self._local.set(key, value)
+        return value
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.get_local(key)
+        if value is None:
+            value = await self.get_shared(key)
+        return value
+
+    async def set(self, key: str, value: Any, *, publish: bool = False) -> None:
+        if not self.enabled:
+            return
+
+        self._local.set(key, value)
+        if self.shared:
+            await run_blocking(
+                "cache",
+                self.backend.set,
+                self.namespace,
+                key,
+                json.dumps(value, separators=(",", ":")),
+                ttl=self._local.ttl,
+                publish=publish,
+            )
+            if publish:
+                self.invalidations_sent += 1
+                shared_cache_invalidations.inc(self.namespace, "sent")
+
+    async def invalidate(self, key: str) -> None:
+        self._local.invalidate(key)
+        if self.shared:
+            await run_blocking("cache", self.backend.delete, self.namespace, key)
+            self.invalidations_sent += 1
+            shared_cache_invalidations.inc(self.namespace, "sent")
+
+    def drop_local(self, key: str) -> None:
+        """Apply an invalidation received from another worker."""
+        self._local.invalidate(key)
+        self.invalidations_received += 1
+        shared_cache_invalidations.inc(self.namespace, "received")
+
+    def configure(self, *, maxsize: int, ttl: float) -> None:
+        self._local.configure(maxsize=maxsize, ttl=ttl)
+
+    def clear(self) -> None:
+        self._local.clear()
+
+    def close(self) -> None:
+        self.backend.close()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self._local.stats(),
+            "backend": self.backend.stats(),
+            "shared_hits": self.shared_hits,
+            "invalidations_sent": self.invalidations_sent,
+            "invalidations_received": self.invalidations_received,
+        }
+
+
+class InvalidationListener:
+    """Apply other workers' invalidations to this worker's local tiers.
+
+    Polls the backend every ``interval`` seconds on the ``cache`` executor;
+    does nothing for a process-local backend.
+    """
+
+    def __init__(self, backend: CacheBackend, *, interval: float):
+        self.backend = backend
+        self.interval = interval
+        self._caches: dict[str, SharedCache] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, cache: SharedCache) -> SharedCache:
+        self._caches[cache.namespace] = cache
+        return cache
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        if self.running or not self.backend.shared or self.interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run(), name="cache-invalidations")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def poll(self) -> int:
+        events = await run_blocking("cache", self.backend.poll_invalidations)
+        for namespace, key in events:
+            cache = self._caches.get(namespace)
+            if cache is not None:
+                cache.drop_local(key)
+        return len(events)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll()
+            except Exception:  # noqa: BLE001
+                logger.exception("Polling shared cache invalidations failed")
+
+
+def _build_cache_backend() -> CacheBackend:
+    settings = get_settings()
+    kind = settings.cache_backend.strip().lower()
+    if kind == "sqlite":
+        path = settings.cache_path or os.path.join(tempfile.gettempdir(), "voice-test-cache.sqlite3")
+        return SQLiteCacheBackend(path)
+    if kind != "memory":
+        logger.warning("Unknown CACHE_BACKEND %r; using the in-memory cache", settings.cache_backend)
+    return MemoryCacheBackend()
+
+
+cache_backend = _build_cache_backend()
+cache_invalidations = InvalidationListener(
+    cache_backend,
+    interval=get_settings().cache_invalidation_interval,
+)
+
+
+def _build_agent_cache() -> SharedCache:
+    settings = get_settings()
+    return cache_invalidations.register(SharedCache(
+        "agents",
+        maxsize=settings.agent_cache_max_entries,
+        ttl=settings.agent_cache_ttl,
+        backend=cache_backend,
+    ))
+
+
+agent_config_cache = _build_agent_cache()
+
+
+def configure_agent_cache(settings: Settings | None = None) -> None:
+    """Apply the current settings to ``agent_config_cache``; called from the app lifespan."""
+    settings = settings or get_settings()
+    agent_config_cache.configure(
+        maxsize=settings.agent_cache_max_entries,
+        ttl=settings.agent_cache_ttl,
+    )
+
+
+__all__ = [
+    "InvalidationListener",
+    "SharedCache",
+    "TTLCache",
+    "agent_config_cache",
+    "cache_backend",
+    "cache_invalidations",
+    "configure_agent_cache",
+]
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Protocol
+
+logger = logging.getLogger(__name__)
+
+# Invalidation events older than this are pruned; every listener polls far
+# more often than that.
+_INVALIDATION_RETENTION = 300.0
+_PRUNE_INTERVAL = 60.0
+
+
+class CacheBackend(Protocol):
+    """Storage shared by the ``SharedCache`` namespaces of one process.
+
+    Values are JSON text. ``shared`` backends are visible to every worker on
+    the node: ``delete``, and ``set`` with ``publish``, also record an
+    invalidation that the other workers pick up from ``poll_invalidations``.
+    Methods may block; callers run them on the ``cache`` executor.
+    """
+
+    shared: bool
+
+    def get(self, namespace: str, key: str) -> Optional[str]: ...
+
+    def set(self, namespace: str, key: str, value: str, *, ttl: float, publish: bool = False) -> None: ...
+
+    def delete(self, namespace: str, key: str) -> None: ...
+
+    def poll_invalidations(self) -> list[tuple[str, str]]: ...
+
+    def stats(self) -> dict[str, Any]: ...
+
+    def close(self) -> None: ...
+
+
+class MemoryCacheBackend:
+    """Process-local backend: the default for a single worker.
+
+    Entries live only in each cache's in-process LRU, so there is nothing
+    further to store, read back or fan out.
+    """
+
+    shared = False
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        return None
+
+    def set(self, namespace: str, key: str, value: str, *, ttl: float, publish: bool = False) -> None:
+        return None
+
+    def delete(self, namespace: str, key: str) -> None:
+        return None
+
+    def poll_invalidations(self) -> list[tuple[str, str]]:
+        return []
+
+    def stats(self) -> dict[str, Any]:
+        return {"kind": "memory"}
+
+    def close(self) -> None:
+        return None
+
+
+class SQLiteCacheBackend:
+    """Node-local backend in a SQLite file in WAL mode.
+
+    Every worker process opens its own connection to the same file. WAL lets
+    readers proceed while one worker writes, so lookups from other workers
+    are never blocked by a save. Invalidations are appended to a log table;
+    each process remembers the last event it has seen and skips the events
+    it published itself. SQLite errors are logged and treated as misses: the
+    caller falls back to the upstream.
+    """
+
+    shared = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self.origin = f"{os.getpid()}-{secrets.token_hex(4)}"
+        self.available = True
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._cursor = 0
+        self._pruned_at = 0.0
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        # Opened lazily, so each forked or spawned worker gets its own.
+        if self._conn is None and self.available:
+            try:
+                conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                with conn:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS cache_entries ("
+                        " namespace TEXT NOT NULL,"
+                        " key TEXT NOT NULL,"
+                        " value TEXT NOT NULL,"
+                        " expires_at REAL NOT NULL,"
+                        " PRIMARY KEY (namespace, key))"
+                    )
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS cache_invalidations ("
+                        " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                        " namespace TEXT NOT NULL,"
+                        " key TEXT NOT NULL,"
+                        " origin TEXT NOT NULL,"
+                        " created_at REAL NOT NULL)"
+                    )
+                self._cursor = conn.execute(
+                    "SELECT COALESCE(MAX(id), 0) FROM cache_invalidations"
+                ).fetchone()[0]
+            except sqlite3.Error as exc:
+                logger.warning("Shared cache file %s unavailable: %s", self.path, exc)
+                self.available = False
+                return None
+            self._conn = conn
+        return self._conn
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    "SELECT value FROM cache_entries"
+                    " WHERE namespace = ? AND key = ? AND expires_at > ?",
+                    (namespace, key, time.time()),
+                ).fetchone()
+            except sqlite3.Error as exc:
+                logger.warning("Shared cache read failed: %s", exc)
+                return None
+        return row[0] if row else None
+
+    def set(self, namespace: str, key: str, value: str, *, ttl: float, publish: bool = False) -> None:
+        """Store ``value``; with ``publish``, also tell other workers to drop their copy."""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at)"
+                        " VALUES (?, ?, ?, ?)",
+                        (namespace, key, value, time.time() + ttl),
+                    )
+                    if publish:
+                        self._publish(conn, namespace, key)
+            except sqlite3.Error as exc:
+                logger.warning("Shared cache write failed: %s", exc)
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                        (namespace, key),
+                    )
+                    self._publish(conn, namespace, key)
+            except sqlite3.Error as exc:
+                logger.warning("Shared cache invalidation failed: %s", exc)
+
+    def _publish(self, conn: sqlite3.Connection, namespace: str, key: str) -> None:
+        conn.execute(
+            "INSERT INTO cache_invalidations (namespace, key, origin, created_at)"
+            " VALUES (?, ?, ?, ?)",
+            (namespace, key, self.origin, time.time()),
+        )
+
+    def poll_invalidations(self) -> list[tuple[str, str]]:
+        """Return keys other workers invalidated since the previous poll."""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return []
+            try:
+                rows = conn.execute(
+                    "SELECT id, namespace, key, origin FROM cache_invalidations"
+                    " WHERE id > ? ORDER BY id",
+                    (self._cursor,),
+                ).fetchall()
+            except sqlite3.Error as exc:
+                logger.warning("Shared cache invalidation poll failed: %s", exc)
+                return []
+            if rows:
+                self._cursor = rows[-1][0]
+
+            now = time.time()
+            if now - self._pruned_at >= _PRUNE_INTERVAL:
+                self._pruned_at = now
+                try:
+                    with conn:
+                        conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+                        conn.execute(
+                            "DELETE FROM cache_invalidations WHERE created_at < ?",
+                            (now - _INVALIDATION_RETENTION,),
+                        )
+                except sqlite3.Error as exc:
+                    logger.warning("Shared cache pruning failed: %s", exc)
+        return [(namespace, key) for _, namespace, key, origin in rows if origin != self.origin]
+
+    def stats(self) -> dict[str, Any]:
+        return {"kind": "sqlite", "path": self.path, "available": self.available}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+__all__ = ["CacheBackend", "MemoryCacheBackend", "SQLiteCacheBackend"]
@@ -1,15 +1,47 @@
 from __future__ import annotations
 
-import asyncio
 import base64
 import binascii
+import copy
+import hashlib
+import json
+import logging
+import secrets
+import time
+from contextlib import asynccontextmanager
 from http import HTTPStatus
-from functools import lru_cache
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Optional
 
 import httpx
 
 from ..config import get_settings
+from .audio_preprocess import (
+    PCM_FORMATS,
+    numpy_available,
+    preprocess_outcomes,
+    preprocess_saved_bytes,
+    preprocess_wav,
+)
+from .cache import agent_config_cache
+from .executors import run_blocking
+from .http_clients import get_elevenlabs_http, get_openai_http
+from .limiter import LimitExceeded, upstream_limiters
+from .metrics import UpstreamCall, track_upstream
+from .prompt_diff import diff_cache, prompt_diff, strip_code_fence
+from .profiling import phase
+from .prompt_history import prompt_history
+from .resilience import CircuitOpen, resilience
+from .singleflight import SingleFlight
+from .suggestion_cache import suggestion_cache, suggestion_cache_key
+from .token_pool import ConversationTokenPool
+from .transcript_cache import (
+    audio_digest,
+    audio_hasher,
+    transcript_cache,
+    transcript_cache_key,
+)
+
+logger = logging.getLogger(__name__)
 
 
 def _extract_display_name(payload: Any) -> Optional[str]:
@@ -45,26 +77,18 @@ def _extract_display_name(payload: Any) -> Optional[str]:
 
 
 class ElevenLabsError(RuntimeError):
-    """Raised when the ElevenLabs SDK encounters an error."""
-
-    def __init__(self, message: str, *, status_code: int = HTTPStatus.BAD_GATEWAY):
+    """Raised when an ElevenLabs (or OpenAI) upstream call fails."""
+
+    def __init__(
+        self,
+        message: str,
+        *,
+        status_code: int = HTTPStatus.BAD_GATEWAY,
+        headers: Optional[dict[str, str]] = None,
+    ):
         super().__init__(message)
         self.status_code = status_code
-
-
-@lru_cache(maxsize=1)
-def _build_client(api_key: str | None, base_url: str):
-    if not api_key:
-        raise ElevenLabsError(
-            "ELEVENLABS_API_KEY is not configured",
-            status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
-        )
-    from elevenlabs import ElevenLabs  # local import to avoid circular issues
-
-    return ElevenLabs(
-        api_key=api_key,
-        base_url=base_url,
-    )
+        self.headers = headers
 
 
 def _resolve_agent_id(requested_id: Optional[str]) -> str:
@@ -76,13 +100,103 @@ def _resolve_agent_id(requested_id: Optional[str]) -> str:
     return requested_id
 
 
+def _retry_after_headers(response: httpx.Response) -> Optional[dict[str, str]]:
+    retry_after = response.headers.get("retry-after")
+    return {"Retry-After": retry_after} if retry_after else None
+
+
+@asynccontextmanager
+async def _upstream_call(upstream: str, operation: str) -> AsyncIterator[UpstreamCall]:
+    """Guard one upstream call and record its metrics.
+
+    Fails fast with 503 and Retry-After while the upstream's circuit is
+    open or the operation's wait queue is full. Otherwise holds a
+    concurrency slot for the call; its latency (excluding time spent
+    queued) and outcome feed the adaptive limit, the circuit breaker and
+    the hedging latency window.
+    """
+    breaker = resilience.breaker(upstream)
+    try:
+        probe = breaker.before_call()
+    except CircuitOpen as exc:
+        raise ElevenLabsError(
+            f"{upstream} is unavailable; retry shortly",
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+
+    limiter = upstream_limiters.get(operation)
+    if limiter is not None:
+        try:
+            await limiter.acquire()
+        except BaseException as exc:
+            breaker.record(failed=None, probe=probe)
+            if isinstance(exc, LimitExceeded):
+                raise ElevenLabsError(
+                    f"Too many concurrent {operation} requests; retry shortly",
+                    status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                    headers={"Retry-After": str(exc.retry_after)},
+                ) from exc
+            raise
+
+    async with track_upstream(upstream, operation) as call:
+        started = time.perf_counter()
+        # None: abandoned before any upstream outcome (cancelled, local error).
+        failed: Optional[bool] = None
+        try:
+            yield call
+        except ElevenLabsError as exc:
+            if exc.status_code >= 500:
+                failed = True
+            raise
+        finally:
+            latency = time.perf_counter() - started
+            if call.status is not None:
+                failed = call.status >= 500
+                if call.status < 400:
+                    resilience.latencies(operation).add(latency)
+            breaker.record(failed=failed, probe=probe)
+            if limiter is not None:
+                overloaded = bool(failed) or call.status == 429
+                limiter.release(latency, dropped=overloaded)
+
+
+def _retry_delay(exc: BaseException) -> Optional[float]:
+    """Retry-After for retryable upstream errors, ``None`` for the rest.
+
+    Our own fail-fast 503s (open circuit, shed request) are never retried.
+    """
+    if not isinstance(exc, ElevenLabsError) or isinstance(exc.__cause__, (LimitExceeded, CircuitOpen)):
+        return None
+    if exc.status_code != HTTPStatus.TOO_MANY_REQUESTS and exc.status_code < 500:
+        return None
+    retry_after = (exc.headers or {}).get("Retry-After")
+    try:
+        return max(0.0, float(retry_after)) if retry_after else 0.0
+    except ValueError:  # HTTP-date form
+        return 0.0
+
+
+def _content_length(request: httpx.Request) -> Optional[int]:
+    # Streamed uploads are sent chunked and have no length up front.
+    value = request.headers.get("content-length")
+    return int(value) if value and value.isdigit() else None
+
+
 async def _request_json(
     method: str,
     path: str,
     *,
+    operation: str,
     api_key: str | None,
-    base_url: str,
+    idempotent: bool = False,
     json: Optional[dict[str, Any]] = None,
+    params: Optional[dict[str, Any]] = None,
+    data: Optional[dict[str, Any]] = None,
+    files: Optional[dict[str, Any]] = None,
+    content: Any = None,
+    extra_headers: Optional[dict[str, str]] = None,
+    timeout: Optional[float] = None,
 ) -> dict[str, Any]:
     if not api_key:
         raise ElevenLabsError(
@@ -93,70 +207,163 @@ async def _request_json(
     headers = {"xi-api-key": api_key}
     if json is not None:
         headers["Content-Type"] = "application/json"
+    if extra_headers:
+        headers.update(extra_headers)
+
+    async def attempt() -> dict[str, Any]:
+        async with _upstream_call("elevenlabs", operation) as call:
+            try:
+                client = get_elevenlabs_http()
+                response = await client.request(
+                    method,
+                    path,
+                    json=json,
+                    params=params,
+                    data=data,
+                    files=files,
+                    content=content,
+                    headers=headers,
+                    timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+                )
+            except httpx.RequestError as exc:  # pragma: no cover - network failure
+                raise ElevenLabsError(
+                    f"Failed to reach ElevenLabs API: {exc}",
+                    status_code=HTTPStatus.BAD_GATEWAY,
+                ) from exc
+
+            call.status = response.status_code
+            call.request_bytes = _content_length(response.request)
+            call.response_bytes = len(response.content)
+
+        if response.status_code >= 400:
+            try:
+                detail: Any = response.json()
+            except ValueError:
+                detail = response.text
+            raise ElevenLabsError(
+                f"ElevenLabs API error ({response.status_code}): {detail}",
+                status_code=response.status_code,
+                headers=_retry_after_headers(response),
+            )
 
-    try:
-        async with httpx.AsyncClient(base_url=base_url, timeout=10.0) as client:
-            response = await client.request(method, path, json=json, headers=headers)
-    except httpx.RequestError as exc:  # pragma: no cover - network failure
-        raise ElevenLabsError(
-            f"Failed to reach ElevenLabs API: {exc}",
-            status_code=HTTPStatus.BAD_GATEWAY,
-        ) from exc
-
-    if response.status_code >= 400:
         try:
-            detail: Any = response.json()
-        except ValueError:
-            detail = response.text
-        raise ElevenLabsError(
-            f"ElevenLabs API error ({response.status_code}): {detail}",
-            status_code=response.status_code,
-        )
+            return response.json()
+        except ValueError as exc:
+            raise ElevenLabsError(
+                "Invalid JSON response from ElevenLabs API",
+                status_code=HTTPStatus.BAD_GATEWAY,
+            ) from exc
 
-    try:
-        return response.json()
-    except ValueError as exc:
-        raise ElevenLabsError(
-            "Invalid JSON response from ElevenLabs API",
-            status_code=HTTPStatus.BAD_GATEWAY,
-        ) from exc
+    if idempotent:
+        return await resilience.retrying(operation, attempt, retryable=_retry_delay)
+    return await attempt()
 
 
-async def create_conversation_token(agent_id: str | None = None) -> dict[str, Any]:
+_agent_flights = SingleFlight()
+
+
+async def _load_agent(agent_id: str) -> dict[str, Any]:
     settings = get_settings()
-    resolved_agent_id = _resolve_agent_id(agent_id or settings.elevenlabs_agent_id)
+    agent = await _request_json(
+        "GET",
+        f"/v1/convai/agents/{agent_id}",
+        operation="get_agent",
+        idempotent=True,
+        api_key=settings.elevenlabs_api_key,
+    )
+    if isinstance(agent, dict):
+        await agent_config_cache.set(agent_id, agent)
+    return agent
 
-    client = _build_client(settings.elevenlabs_api_key, settings.elevenlabs_base_url)
 
-    try:
-        result = await asyncio.to_thread(
-            client.conversational_ai.conversations.get_webrtc_token,
-            agent_id=resolved_agent_id,
-        )
-    except Exception as exc:  # noqa: BLE001
-        raise ElevenLabsError(str(exc)) from exc
+async def _load_shared_or_upstream(agent_id: str) -> dict[str, Any]:
+    # Another worker may already have fetched (or just saved) this agent.
+    shared = await agent_config_cache.get_shared(agent_id)
+    if shared is not None:
+        return shared
+    return await _load_agent(agent_id)
+
+
+async def _fetch_agent(agent_id: str) -> dict[str, Any]:
+    cached = agent_config_cache.get_local(agent_id)
+    if cached is not None:
+        return cached
+
+    agent = await _agent_flights.do(agent_id, lambda: _load_shared_or_upstream(agent_id))
+    # Coalesced callers share one document; hand each of them its own copy.
+    return copy.deepcopy(agent)
+
+
+def get_cache_stats() -> dict[str, Any]:
+    return {
+        "agents": {
+            **agent_config_cache.stats(),
+            "upstream_fetches": _agent_flights.calls,
+            "coalesced": _agent_flights.shared,
+            "in_flight": _agent_flights.in_flight(),
+        },
+        "suggestions": suggestion_cache.stats(),
+        "transcripts": transcript_cache.stats(),
+        "diffs": diff_cache.stats(),
+    }
+
+
+async def _mint_conversation_token(agent_id: str) -> dict[str, Any]:
+    settings = get_settings()
+    payload = await _request_json(
+        "GET",
+        "/v1/convai/conversation/token",
+        operation="conversation_token",
+        idempotent=True,
+        api_key=settings.elevenlabs_api_key,
+        params={"agent_id": agent_id},
+    )
 
-    payload = result.model_dump() if hasattr(result, "model_dump") else result
     if isinstance(payload, dict):
-        payload.setdefault("agent_id", resolved_agent_id)
+        payload.setdefault("agent_id", agent_id)
         display_name = _extract_display_name(payload)
         if display_name:
             payload.setdefault("display_name", display_name)
         return payload
 
-    raise ElevenLabsError(f"Unexpected ElevenLabs response: {type(result)!r}")
+    raise ElevenLabsError(f"Unexpected ElevenLabs response: {type(payload)!r}")
 
 
-async def get_prompt(agent_id: str | None = None) -> dict[str, Optional[str]]:
+conversation_token_pool = ConversationTokenPool(
+    mint=_mint_conversation_token,
+    size=get_settings().token_pool_size,
+    max_age=get_settings().token_pool_max_age,
+)
+
+
+def start_token_pool() -> None:
     settings = get_settings()
-    resolved_agent_id = _resolve_agent_id(agent_id or settings.elevenlabs_agent_id)
-    agent = await _request_json(
-        "GET",
-        f"/v1/convai/agents/{resolved_agent_id}",
-        api_key=settings.elevenlabs_api_key,
-        base_url=settings.elevenlabs_base_url,
+    agent_ids = settings.token_pool_agent_ids or (
+        [settings.elevenlabs_agent_id] if settings.elevenlabs_agent_id else []
     )
+    if settings.elevenlabs_api_key:
+        conversation_token_pool.start(agent_ids)
 
+
+async def stop_token_pool() -> None:
+    await conversation_token_pool.stop()
+
+
+def get_token_pool_stats() -> dict[str, Any]:
+    return conversation_token_pool.stats()
+
+
+async def create_conversation_token(agent_id: str | None = None) -> dict[str, Any]:
+    settings = get_settings()
+    resolved_agent_id = _resolve_agent_id(agent_id or settings.elevenlabs_agent_id)
+
+    pooled = conversation_token_pool.take(resolved_agent_id)
+    if pooled is not None:
+        return pooled
+    return await _mint_conversation_token(resolved_agent_id)
+
+
+def _prompt_view(agent_id: str, agent: Any) -> dict[str, Optional[str]]:
     prompt = (
         agent.get("conversation_config", {})
         .get("agent", {})
@@ -175,82 +382,227 @@ async def get_prompt(agent_id: str | None = None) -> dict[str, Optional[str]]:
     display_name = _extract_display_name(agent)
 
     return {
-        "agent_id": resolved_agent_id,
+        "agent_id": agent_id,
         "display_name": display_name,
         "prompt": prompt,
         "first_message": first_message,
     }
 
 
+_PROMPT_VIEW_FIELDS = ("agent_id", "display_name", "prompt", "first_message")
+
+
+def prompt_etag(view: dict[str, Any]) -> str:
+    """Strong ETag for a prompt representation (agent, name, prompt, first message)."""
+    fields = {key: view.get(key) for key in _PROMPT_VIEW_FIELDS}
+    canonical = json.dumps(fields, sort_keys=True, separators=(",", ":"))
+    return '"' + hashlib.sha256(canonical.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """Evaluate an If-Match / If-None-Match header against ``etag``."""
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+async def get_prompt(agent_id: str | None = None) -> dict[str, Optional[str]]:
+    settings = get_settings()
+    resolved_agent_id = _resolve_agent_id(agent_id or settings.elevenlabs_agent_id)
+    agent = await _fetch_agent(resolved_agent_id)
+    return _prompt_view(resolved_agent_id, agent)
+
+
 async def update_prompt(
     *,
     prompt: str,
     agent_id: str | None = None,
     first_message: str | None = None,
-) -> dict[str, Any]:
+    if_match: str | None = None,
+    restored_from: int | None = None,
+) -> dict[str, Optional[str]]:
+    """Save the prompt (and first message) and return the new prompt view.
+
+    The PATCH carries only the fields being saved, but always carries them:
+    the cached agent config may be stale, so it is never used to decide that
+    a field (or the whole save) can be skipped. For the same reason
+    ``if_match`` is checked against a fresh upstream read, never the cache.
+    Saves are appended to the local prompt history, preceded by the version
+    they replace when that fresh read shows one.
+    """
     if not prompt.strip():
         raise ElevenLabsError(
             "Prompt cannot be empty",
             status_code=HTTPStatus.BAD_REQUEST,
-    )
+        )
 
     settings = get_settings()
     resolved_agent_id = _resolve_agent_id(agent_id or settings.elevenlabs_agent_id)
-    agent = await _request_json(
-        "GET",
-        f"/v1/convai/agents/{resolved_agent_id}",
-        api_key=settings.elevenlabs_api_key,
-        base_url=settings.elevenlabs_base_url,
-    )
 
-    conversation_config = (
-        agent.get("conversation_config") if isinstance(agent, dict) else None
-    )
-    if not isinstance(conversation_config, dict):
-        conversation_config = {}
-
-    agent_config = conversation_config.get("agent")
-    if not isinstance(agent_config, dict):
-        agent_config = {}
+    # The cached copy may be AGENT_CACHE_TTL old or another worker's; it is
+    # good for display fields, but a precondition needs the current version.
+    current_view: Optional[dict[str, Optional[str]]] = None
+    if if_match:
+        current_view = _prompt_view(resolved_agent_id, await _load_agent(resolved_agent_id))
+        known_view = current_view
+    else:
+        known = await agent_config_cache.get(resolved_agent_id)
+        known_view = _prompt_view(resolved_agent_id, known) if known is not None else None
 
-    prompt_config = agent_config.get("prompt")
-    if not isinstance(prompt_config, dict):
-        prompt_config = {}
+    if if_match and not etag_matches(if_match, prompt_etag(current_view or {})):
+        raise ElevenLabsError(
+            "Prompt was modified since it was loaded; reload before saving",
+            status_code=HTTPStatus.PRECONDITION_FAILED,
+        )
 
-    prompt_config = {**prompt_config, "prompt": prompt}
-    agent_config["prompt"] = prompt_config
+    agent_patch: dict[str, Any] = {"prompt": {"prompt": prompt}}
     if first_message is not None:
-        agent_config["first_message"] = first_message
-    conversation_config["agent"] = agent_config
+        agent_patch["first_message"] = first_message
 
     updated_agent = await _request_json(
         "PATCH",
         f"/v1/convai/agents/{resolved_agent_id}",
+        operation="update_agent",
         api_key=settings.elevenlabs_api_key,
-        base_url=settings.elevenlabs_base_url,
-        json={"conversation_config": conversation_config},
+        json={"conversation_config": {"agent": agent_patch}},
     )
 
-    display_name = _extract_display_name(updated_agent)
+    if isinstance(updated_agent, dict) and isinstance(
+        updated_agent.get("conversation_config"), dict
+    ):
+        # Publish, so other workers drop their copy and read this one.
+        await agent_config_cache.set(resolved_agent_id, updated_agent, publish=True)
+        view = _prompt_view(resolved_agent_id, updated_agent)
+    else:
+        await agent_config_cache.invalidate(resolved_agent_id)
+        view = {**(known_view or {}), "agent_id": resolved_agent_id}
 
-    if isinstance(updated_agent, dict):
-        updated_agent.setdefault("agent_id", resolved_agent_id)
-        updated_agent["display_name"] = display_name
-    elif display_name:
-        updated_agent = {
-            "agent_id": resolved_agent_id,
-            "display_name": display_name,
-            "conversation_config": conversation_config,
-        }
+    if view.get("prompt") is None:
+        view["prompt"] = prompt
+    if view.get("first_message") is None and first_message is not None:
+        view["first_message"] = first_message
+    if not view.get("display_name"):
+        view["display_name"] = (known_view or {}).get("display_name")
 
-    return updated_agent
+    await _record_history(resolved_agent_id, current_view, view, restored_from=restored_from)
+    return view
 
 
-async def suggest_prompt(
+async def _record_history(
+    agent_id: str,
+    before: Optional[dict[str, Optional[str]]],
+    after: dict[str, Optional[str]],
     *,
-    feedback: str,
+    restored_from: int | None,
+) -> None:
+    """Best-effort: a history write failure never fails the save itself.
+
+    ``before`` must come from a fresh upstream read, or be ``None``: it is
+    stored as the upstream version the save replaced.
+    """
+    if not prompt_history.enabled:
+        return
+
+    def record() -> None:
+        # Keep the version being replaced too, if it came from elsewhere.
+        if before is not None and before.get("prompt") is not None:
+            prompt_history.record(
+                agent_id,
+                prompt=before["prompt"] or "",
+                first_message=before.get("first_message"),
+                source="upstream",
+            )
+        prompt_history.record(
+            agent_id,
+            prompt=after.get("prompt") or "",
+            first_message=after.get("first_message"),
+            source="restore" if restored_from is not None else "save",
+            restored_from=restored_from,
+        )
+
+    try:
+        await run_blocking("history", record)
+    except Exception:  # noqa: BLE001
+        logger.exception("Recording prompt history for agent %s failed", agent_id)
+
+
+def _require_history() -> None:
+    if not prompt_history.enabled:
+        raise ElevenLabsError(
+            "Prompt history is disabled (set PROMPT_HISTORY_PATH)",
+            status_code=HTTPStatus.NOT_FOUND,
+        )
+
+
+async def list_prompt_history(
     agent_id: str | None = None,
-) -> dict[str, str]:
+    *,
+    limit: int = 50,
+    before: int | None = None,
+) -> dict[str, Any]:
+    """Saved revisions for an agent, newest first, from the local store only."""
+    settings = get_settings()
+    resolved_agent_id = _resolve_agent_id(agent_id or settings.elevenlabs_agent_id)
+    _require_history()
+    revisions = await run_blocking(
+        "history", prompt_history.revisions, resolved_agent_id, limit=limit, before=before
+    )
+    return {
+        "agent_id": resolved_agent_id,
+        "revisions": [revision.as_dict() for revision in revisions],
+    }
+
+
+async def get_prompt_revision(revision: int, agent_id: str | None = None) -> dict[str, Any]:
+    settings = get_settings()
+    resolved_agent_id = _resolve_agent_id(agent_id or settings.elevenlabs_agent_id)
+    _require_history()
+    stored = await run_blocking("history", prompt_history.get, resolved_agent_id, revision)
+    if stored is None:
+        raise ElevenLabsError(
+            f"Revision {revision} not found for agent {resolved_agent_id}",
+            status_code=HTTPStatus.NOT_FOUND,
+        )
+    return stored
+
+
+async def restore_prompt_revision(
+    revision: int,
+    *,
+    agent_id: str | None = None,
+    if_match: str | None = None,
+) -> dict[str, Optional[str]]:
+    """Save an older revision as the current prompt; recorded as a new revision."""
+    stored = await get_prompt_revision(revision, agent_id)
+    return await update_prompt(
+        prompt=stored["prompt"],
+        first_message=stored.get("first_message"),
+        agent_id=stored["agent_id"],
+        if_match=if_match,
+        restored_from=revision,
+    )
+
+
+_SUGGESTION_SYSTEM_PROMPT = (
+    "You assist with refining voice agent system prompts. "
+    "Given the existing prompt and developer feedback, propose an improved prompt that "
+    "addresses the feedback while preserving helpful instructions. Return only the full prompt text."
+)
+_SUGGESTION_TEMPERATURE = 0.2
+
+
+async def _prepare_suggestion(
+    *, feedback: str, agent_id: str | None
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Validate input and return the current prompt plus the OpenAI payload."""
     if not feedback.strip():
         raise ElevenLabsError(
             "Feedback cannot be empty",
@@ -267,12 +619,6 @@ async def suggest_prompt(
             status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
         )
 
-    system_prompt = (
-        "You assist with refining voice agent system prompts. "
-        "Given the existing prompt and developer feedback, propose an improved prompt that "
-        "addresses the feedback while preserving helpful instructions. Return only the full prompt text."
-    )
-
     user_prompt = (
         "Current prompt:\n" f"""```\n{current_prompt}\n```""" "\n\n"
         "Developer feedback:\n"
@@ -283,38 +629,99 @@ async def suggest_prompt(
     payload = {
         "model": settings.openai_model,
         "messages": [
-            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": _SUGGESTION_SYSTEM_PROMPT},
             {"role": "user", "content": user_prompt},
         ],
-        "temperature": 0.2,
+        "temperature": _SUGGESTION_TEMPERATURE,
+    }
+    return current, payload
+
+
+def _openai_headers() -> dict[str, str]:
+    settings = get_settings()
+    return {
+        "Authorization": f"Bearer {settings.openai_api_key}",
+        "Content-Type": "application/json",
     }
 
+
+def _openai_error(response: httpx.Response) -> ElevenLabsError:
+    detail: Any = response.text
     try:
-        async with httpx.AsyncClient(timeout=20.0) as client:
+        detail = response.json()
+    except ValueError:
+        pass
+    return ElevenLabsError(
+        f"OpenAI API error ({response.status_code}): {detail}",
+        status_code=response.status_code,
+        headers=_retry_after_headers(response),
+    )
+
+
+def _suggestion_result(
+    current: dict[str, Any], agent_id: str | None, suggested_prompt: str
+) -> dict[str, str]:
+    settings = get_settings()
+    resolved_agent_id = current.get("agent_id") or _resolve_agent_id(
+        agent_id or settings.elevenlabs_agent_id
+    )
+    current_display_name = current.get("display_name")
+    if not current_display_name:
+        current_display_name = _extract_display_name(current)
+
+    return {
+        "agent_id": resolved_agent_id,
+        "display_name": current_display_name,
+        "current_prompt": current.get("prompt") or "",
+        "suggested_prompt": suggested_prompt,
+    }
+
+
+async def _with_diff(result: dict[str, Any], include_diff: bool) -> dict[str, Any]:
+    """Attach the diff between the prompts as the editor will show them."""
+    if include_diff:
+        result["diff"] = await prompt_diff(
+            strip_code_fence(result["current_prompt"]),
+            strip_code_fence(result["suggested_prompt"]),
+        )
+    return result
+
+
+async def suggest_prompt(
+    *,
+    feedback: str,
+    agent_id: str | None = None,
+    use_cache: bool = True,
+    include_diff: bool = False,
+) -> dict[str, Any]:
+    current, payload = await _prepare_suggestion(feedback=feedback, agent_id=agent_id)
+
+    cache_key = suggestion_cache_key(payload)
+    if use_cache:
+        cached = await suggestion_cache.get(cache_key)
+        if cached is not None:
+            return await _with_diff(_suggestion_result(current, agent_id, cached), include_diff)
+
+    async with _upstream_call("openai", "chat_completion") as call:
+        try:
+            client = get_openai_http()
             response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
+                "/v1/chat/completions",
                 json=payload,
-                headers={
-                    "Authorization": f"Bearer {settings.openai_api_key}",
-                    "Content-Type": "application/json",
-                },
+                headers=_openai_headers(),
             )
-    except httpx.RequestError as exc:  # pragma: no cover - network failure
-        raise ElevenLabsError(
-            f"Failed to reach OpenAI API: {exc}",
-            status_code=HTTPStatus.BAD_GATEWAY,
-        ) from exc
+        except httpx.RequestError as exc:  # pragma: no cover - network failure
+            raise ElevenLabsError(
+                f"Failed to reach OpenAI API: {exc}",
+                status_code=HTTPStatus.BAD_GATEWAY,
+            ) from exc
+
+        call.status = response.status_code
+        call.request_bytes = _content_length(response.request)
+        call.response_bytes = len(response.content)
 
     if response.status_code >= 400:
-        detail = response.text
-        try:
-            detail = response.json()
-        except ValueError:
-            pass
-        raise ElevenLabsError(
-            f"OpenAI API error ({response.status_code}): {detail}",
-            status_code=response.status_code,
-        )
+        raise _openai_error(response)
 
     data = response.json()
     try:
@@ -325,19 +732,121 @@ async def suggest_prompt(
             status_code=HTTPStatus.BAD_GATEWAY,
         )
 
-    resolved_agent_id = current.get("agent_id") or _resolve_agent_id(
-        agent_id or settings.elevenlabs_agent_id
-    )
-    current_display_name = current.get("display_name")
-    if not current_display_name:
-        current_display_name = _extract_display_name(current)
+    await suggestion_cache.set(cache_key, suggested_prompt)
+    return await _with_diff(_suggestion_result(current, agent_id, suggested_prompt), include_diff)
 
-    return {
-        "agent_id": resolved_agent_id,
-        "display_name": current_display_name,
-        "current_prompt": current_prompt,
-        "suggested_prompt": suggested_prompt,
-    }
+
+async def stream_prompt_suggestion(
+    *,
+    feedback: str,
+    agent_id: str | None = None,
+    use_cache: bool = True,
+    include_diff: bool = False,
+) -> AsyncIterator[dict[str, Any]]:
+    """Stream a suggestion as ``start``, ``delta``... and ``done`` events.
+
+    Validation, the prompt fetch and the OpenAI status check all happen
+    before the ``start`` event, so callers can turn failures up to that
+    point into a regular HTTP error.
+    """
+    current, payload = await _prepare_suggestion(feedback=feedback, agent_id=agent_id)
+
+    metadata = _suggestion_result(current, agent_id, "")
+    del metadata["suggested_prompt"]
+
+    cache_key = suggestion_cache_key(payload)
+    if use_cache:
+        cached = await suggestion_cache.get(cache_key)
+        if cached is not None:
+            yield {"type": "start", **metadata}
+            yield {"type": "delta", "text": cached}
+            result = await _with_diff(_suggestion_result(current, agent_id, cached), include_diff)
+            yield {"type": "done", **result}
+            return
+
+    async with _upstream_call("openai", "chat_completion_stream") as call:
+        client = get_openai_http()
+        request = client.build_request(
+            "POST",
+            "/v1/chat/completions",
+            json={**payload, "stream": True},
+            headers=_openai_headers(),
+        )
+        try:
+            response = await client.send(request, stream=True)
+            call.status = response.status_code
+            call.request_bytes = _content_length(request)
+            call.response_bytes = 0
+        except httpx.RequestError as exc:  # pragma: no cover - network failure
+            raise ElevenLabsError(
+                f"Failed to reach OpenAI API: {exc}",
+                status_code=HTTPStatus.BAD_GATEWAY,
+            ) from exc
+
+        try:
+            if response.status_code >= 400:
+                await response.aread()
+                raise _openai_error(response)
+
+            yield {"type": "start", **metadata}
+
+            parts: list[str] = []
+            try:
+                async for line in response.aiter_lines():
+                    call.response_bytes += len(line) + 1
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        choices = json.loads(data).get("choices") or []
+                        delta = (choices[0].get("delta") or {}).get("content") if choices else None
+                    except (ValueError, AttributeError, TypeError):
+                        raise ElevenLabsError(
+                            "Unexpected response from OpenAI API",
+                            status_code=HTTPStatus.BAD_GATEWAY,
+                        )
+                    if delta:
+                        parts.append(delta)
+                        yield {"type": "delta", "text": delta}
+            except httpx.RequestError as exc:  # pragma: no cover - network failure
+                raise ElevenLabsError(
+                    f"OpenAI stream interrupted: {exc}",
+                    status_code=HTTPStatus.BAD_GATEWAY,
+                ) from exc
+
+            suggested_prompt = "".join(parts).strip()
+            if not suggested_prompt:
+                raise ElevenLabsError(
+                    "Unexpected response from OpenAI API",
+                    status_code=HTTPStatus.BAD_GATEWAY,
+                )
+            await suggestion_cache.set(cache_key, suggested_prompt)
+            result = await _with_diff(
+                _suggestion_result(current, agent_id, suggested_prompt), include_diff
+            )
+            yield {"type": "done", **result}
+        finally:
+            await response.aclose()
+
+
+def _transcript_from_response(response: Any) -> dict[str, str]:
+    text: Optional[str] = None
+    if isinstance(response, dict):
+        text = response.get("text") or response.get("transcription")
+
+    if not text or not text.strip():
+        raise ElevenLabsError(
+            "Speech-to-text transcription returned no text",
+            status_code=HTTPStatus.BAD_GATEWAY,
+        )
+
+    return {"text": text.strip()}
+
+
+# Base64 payloads above this size are decoded off the event loop.
+_INLINE_DECODE_LIMIT = 256 * 1024
 
 
 async def transcribe_audio(
@@ -347,10 +856,14 @@ async def transcribe_audio(
     language_code: str | None = None,
     model_id: str | None = None,
 ) -> dict[str, str]:
-    settings = get_settings()
-
     try:
-        audio_bytes = base64.b64decode(audio_base64, validate=True)
+        with phase("decode"):
+            if len(audio_base64) > _INLINE_DECODE_LIMIT:
+                audio_bytes = await run_blocking(
+                    "audio", base64.b64decode, audio_base64, validate=True
+                )
+            else:
+                audio_bytes = base64.b64decode(audio_base64, validate=True)
     except (ValueError, binascii.Error) as exc:  # type: ignore[name-defined]
         raise ElevenLabsError(
             "Invalid audio payload",
@@ -363,51 +876,220 @@ async def transcribe_audio(
             status_code=HTTPStatus.BAD_REQUEST,
         )
 
-    filename = f"feedback.{fmt}"
-    mime_type = f"audio/{fmt}"
+    return await transcribe_audio_bytes(
+        audio_bytes,
+        fmt=fmt,
+        language_code=language_code,
+        model_id=model_id,
+    )
 
-    client = _build_client(settings.elevenlabs_api_key, settings.elevenlabs_base_url)
 
-    kwargs: dict[str, Any] = {
-        "model_id": model_id or settings.elevenlabs_stt_model,
-        "file": (filename, audio_bytes, mime_type),
-    }
+_numpy_missing_logged = False
+
+
+async def _preprocess_audio(audio_bytes: bytes) -> bytes:
+    """Downmix/resample/trim a PCM WAV clip off-loop; fall back to the original."""
+    global _numpy_missing_logged
+
+    if not numpy_available():
+        preprocess_outcomes.inc("unavailable")
+        if not _numpy_missing_logged:
+            _numpy_missing_logged = True
+            logger.warning("AUDIO_PREPROCESS is enabled but numpy is not installed; sending audio as-is.")
+        return audio_bytes
+
+    settings = get_settings()
+    result = await run_blocking(
+        "audio",
+        preprocess_wav,
+        audio_bytes,
+        target_rate=settings.audio_target_sample_rate,
+        silence_threshold_db=settings.audio_silence_threshold_db,
+        padding_ms=settings.audio_silence_padding_ms,
+    )
+    if result is None:
+        preprocess_outcomes.inc("skipped")
+        return audio_bytes
+
+    preprocess_outcomes.inc("applied")
+    preprocess_saved_bytes.observe(result.bytes_saved)
+    logger.debug(
+        "Preprocessed audio: %d -> %d bytes (%.2fs silence trimmed, %d Hz)",
+        result.original_bytes,
+        len(result.audio),
+        result.trimmed_seconds,
+        result.sample_rate,
+    )
+    return result.audio
+
+
+async def transcribe_audio_bytes(
+    audio_bytes: bytes,
+    *,
+    fmt: str = "webm",
+    mime_type: str | None = None,
+    language_code: str | None = None,
+    model_id: str | None = None,
+    use_cache: bool = True,
+) -> dict[str, str]:
+    settings = get_settings()
+    model_id = model_id or settings.elevenlabs_stt_model
+
+    cache_key: Optional[str] = None
+    if use_cache and transcript_cache.enabled:
+        if len(audio_bytes) > _INLINE_DECODE_LIMIT:
+            digest = await run_blocking("audio", audio_digest, audio_bytes)
+        else:
+            digest = audio_digest(audio_bytes)
+        cache_key = transcript_cache_key(digest, model_id=model_id, language_code=language_code)
+        cached = transcript_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    if settings.audio_preprocess_enabled and fmt.lower() in PCM_FORMATS:
+        audio_bytes = await _preprocess_audio(audio_bytes)
+
+    filename = f"feedback.{fmt}"
+    mime_type = mime_type or f"audio/{fmt}"
+
+    data: dict[str, Any] = {"model_id": model_id}
     if language_code:
-        kwargs["language_code"] = language_code
+        data["language_code"] = language_code
 
-    try:
-        response = await asyncio.to_thread(
-            client.speech_to_text.convert,
-            **kwargs,
-        )
-    except Exception as exc:  # noqa: BLE001
-        raise ElevenLabsError(str(exc)) from exc
+    response = await _request_json(
+        "POST",
+        "/v1/speech-to-text",
+        operation="speech_to_text",
+        api_key=settings.elevenlabs_api_key,
+        data=data,
+        files={"file": (filename, audio_bytes, mime_type)},
+        timeout=settings.elevenlabs_stt_timeout,
+    )
 
-    text: Optional[str] = None
-    if hasattr(response, "text"):
-        text = getattr(response, "text")
-    elif hasattr(response, "model_dump"):
-        data = response.model_dump()  # type: ignore[attr-defined]
-        text = data.get("text") or data.get("transcription")
-    elif isinstance(response, dict):
-        text = response.get("text") or response.get("transcription")
-    else:
-        text = str(response)
+    result = _transcript_from_response(response)
+    if cache_key is not None:
+        transcript_cache.set(cache_key, result)
+    return result
 
-    if not text or not text.strip():
+
+async def transcribe_audio_stream(
+    *,
+    chunks: AsyncIterator[bytes],
+    fmt: str = "webm",
+    mime_type: str | None = None,
+    content_length: int | None = None,
+    language_code: str | None = None,
+    model_id: str | None = None,
+) -> dict[str, str]:
+    """Stream a raw audio upload through to ElevenLabs speech-to-text.
+
+    The multipart body is assembled on the fly around the incoming chunks,
+    so only one chunk is held in memory at a time regardless of clip length.
+    """
+    settings = get_settings()
+    max_bytes = settings.transcribe_max_bytes
+
+    if content_length is not None and content_length > max_bytes:
         raise ElevenLabsError(
-            "Speech-to-text transcription returned no text",
-            status_code=HTTPStatus.BAD_GATEWAY,
+            f"Audio payload exceeds the {max_bytes} byte limit",
+            status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
         )
 
-    return {"text": text.strip()}
+    # Pull the first non-empty chunk before contacting ElevenLabs so empty
+    # uploads are rejected locally.
+    first_chunk = b""
+    async for chunk in chunks:
+        if chunk:
+            first_chunk = chunk
+            break
+    if not first_chunk:
+        raise ElevenLabsError(
+            "Audio payload is empty",
+            status_code=HTTPStatus.BAD_REQUEST,
+        )
+    if len(first_chunk) > max_bytes:
+        raise ElevenLabsError(
+            f"Audio payload exceeds the {max_bytes} byte limit",
+            status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+        )
+
+    model_id = model_id or settings.elevenlabs_stt_model
+    fields: dict[str, str] = {"model_id": model_id}
+    if language_code:
+        fields["language_code"] = language_code
+
+    boundary = secrets.token_hex(16)
+    # The whole clip is never in memory here, so the transcript cache can
+    # only be filled (for later base64 submissions), not consulted.
+    hasher = audio_hasher() if transcript_cache.enabled else None
+
+    async def multipart_body() -> AsyncIterator[bytes]:
+        for name, value in fields.items():
+            yield (
+                f"--{boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f"{value}\r\n"
+            ).encode()
+        yield (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="feedback.{fmt}"\r\n'
+            f"Content-Type: {mime_type or f'audio/{fmt}'}\r\n\r\n"
+        ).encode()
+
+        received = len(first_chunk)
+        if hasher is not None:
+            hasher.update(first_chunk)
+        yield first_chunk
+        async for chunk in chunks:
+            received += len(chunk)
+            if received > max_bytes:
+                raise ElevenLabsError(
+                    f"Audio payload exceeds the {max_bytes} byte limit",
+                    status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                )
+            if hasher is not None:
+                hasher.update(chunk)
+            yield chunk
+        yield f"\r\n--{boundary}--\r\n".encode()
+
+    response = await _request_json(
+        "POST",
+        "/v1/speech-to-text",
+        operation="speech_to_text_stream",
+        api_key=settings.elevenlabs_api_key,
+        content=multipart_body(),
+        extra_headers={
+            "Content-Type": f"multipart/form-data; boundary={boundary}"
+        },
+        timeout=settings.elevenlabs_stt_timeout,
+    )
+
+    result = _transcript_from_response(response)
+    if hasher is not None:
+        transcript_cache.set(
+            transcript_cache_key(hasher.hexdigest(), model_id=model_id, language_code=language_code),
+            result,
+        )
+    return result
 
 
 __all__ = [
     "ElevenLabsError",
     "create_conversation_token",
+    "etag_matches",
+    "get_cache_stats",
     "get_prompt",
+    "get_prompt_revision",
+    "get_token_pool_stats",
+    "list_prompt_history",
+    "prompt_etag",
+    "restore_prompt_revision",
+    "start_token_pool",
+    "stream_prompt_suggestion",
+    "stop_token_pool",
     "update_prompt",
     "suggest_prompt",
     "transcribe_audio",
+    "transcribe_audio_bytes",
+    "transcribe_audio_stream",
 ]
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from ..config import get_settings
+from .profiling import current_profile
+
+T = TypeVar("T")
+
+# Settings attribute holding the worker count for each operation class.
+_WORKER_SETTINGS = {
+    "audio": "audio_executor_workers",
+}
+
+_executors: dict[str, ThreadPoolExecutor] = {}
+
+
+def _get_executor(operation: str) -> ThreadPoolExecutor:
+    executor = _executors.get(operation)
+    if executor is None:
+        settings = get_settings()
+        workers = getattr(settings, _WORKER_SETTINGS.get(operation, ""), 2)
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, workers),
+            thread_name_prefix=f"{operation}-worker",
+        )
+        _executors[operation] = executor
+    return executor
+
+
+async def run_blocking(
+    operation: str, fn: Callable[..., T], *args: Any, **kwargs: Any
+) -> T:
+    """Run blocking work on the dedicated executor for ``operation``.
+
+    Each operation class gets its own sized pool, so slow work of one kind
+    (e.g. decoding large audio clips) cannot starve the default executor or
+    other operations.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(fn, *args, **kwargs)
+    profile = current_profile()
+    if profile is None:
+        return await loop.run_in_executor(_get_executor(operation), call)
+
+    # Split the wait for a free worker from the work itself.
+    submitted = time.perf_counter()
+    started: list[float] = []
+
+    def timed() -> T:
+        started.append(time.perf_counter())
+        return call()
+
+    try:
+        return await loop.run_in_executor(_get_executor(operation), timed)
+    finally:
+        if started:
+            profile.add(f"queue.{operation}", started[0] - submitted)
+            profile.add(f"exec.{operation}", time.perf_counter() - started[0])
+
+
+def shutdown_executors() -> None:
+    executors = list(_executors.values())
+    _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+__all__ = ["run_blocking", "shutdown_executors"]
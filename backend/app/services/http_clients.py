@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+import httpx
+
+from ..config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+_elevenlabs_client: Optional[httpx.AsyncClient] = None
+_openai_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_supported() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_http_client(
+    settings: Settings, *, base_url: str, timeout: float
+) -> httpx.AsyncClient:
+    http2 = settings.http2_enabled and _http2_supported()
+    if settings.http2_enabled and not http2:
+        logger.warning("HTTP/2 requested but the h2 package is missing; using HTTP/1.1.")
+
+    return httpx.AsyncClient(
+        base_url=base_url,
+        timeout=timeout,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+    )
+
+
+def open_http_clients(settings: Settings | None = None) -> None:
+    """Create the pooled upstream clients; called from the app lifespan."""
+    global _elevenlabs_client, _openai_client
+
+    settings = settings or get_settings()
+    if _elevenlabs_client is None:
+        _elevenlabs_client = _build_http_client(
+            settings,
+            base_url=settings.elevenlabs_base_url,
+            timeout=settings.elevenlabs_timeout,
+        )
+    if _openai_client is None:
+        _openai_client = _build_http_client(
+            settings,
+            base_url=settings.openai_base_url,
+            timeout=settings.openai_timeout,
+        )
+
+
+async def close_http_clients() -> None:
+    """Close the pooled upstream clients and drop their connections."""
+    global _elevenlabs_client, _openai_client
+
+    clients = [_elevenlabs_client, _openai_client]
+    _elevenlabs_client = None
+    _openai_client = None
+    for client in clients:
+        if client is not None:
+            await client.aclose()
+
+
+def get_elevenlabs_http() -> httpx.AsyncClient:
+    if _elevenlabs_client is None:
+        # Outside the app lifespan (scripts, REPL) fall back to lazy creation.
+        open_http_clients()
+    assert _elevenlabs_client is not None
+    return _elevenlabs_client
+
+
+def get_openai_http() -> httpx.AsyncClient:
+    if _openai_client is None:
+        open_http_clients()
+    assert _openai_client is not None
+    return _openai_client
+
+
+__all__ = [
+    "close_http_clients",
+    "get_elevenlabs_http",
+    "get_openai_http",
+    "open_http_clients",
+]
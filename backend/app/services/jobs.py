@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Optional
+
+from ..config import get_settings
+from .elevenlabs import ElevenLabsError
+from .metrics import Counter, Gauge, registry
+
+logger = logging.getLogger(__name__)
+
+jobs_total = registry.register(Counter(
+    "voice_test_jobs_total",
+    "Finished background jobs by kind and final status.",
+    ("kind", "status"),
+))
+jobs_queued = registry.register(Gauge(
+    "voice_test_jobs_queued",
+    "Background jobs waiting for a worker.",
+))
+
+JobWork = Callable[[], Awaitable[dict[str, Any]]]
+
+
+@dataclass(slots=True)
+class Job:
+    id: str
+    kind: str
+    status: str = "queued"  # queued -> running -> succeeded | failed
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    result: Optional[dict[str, Any]] = None
+    error: Optional[dict[str, Any]] = None
+    work: Optional[JobWork] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in {"succeeded", "failed"}
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """Run upstream work in the background on a bounded worker pool.
+
+    ``submit`` queues the work and returns immediately; ``workers`` tasks
+    drain a queue of at most ``queue_size`` jobs. Records live in an
+    insertion-ordered dict: finished jobs are dropped ``ttl`` seconds after
+    they finish, and the oldest finished ones go first once there are more
+    than ``max_entries``.
+    """
+
+    def __init__(self, *, workers: int, queue_size: int, ttl: float, max_entries: int):
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._queue: Optional[asyncio.Queue[Job]] = None
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{index}")
+            for index in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job in self._jobs.values():
+            if not job.finished:
+                self._finish(job, error={
+                    "status_code": HTTPStatus.SERVICE_UNAVAILABLE,
+                    "detail": "Server shut down before the job finished",
+                })
+        self._queue = None
+
+    def submit(self, kind: str, work: JobWork) -> Job:
+        if not self.running:
+            self.start()
+        assert self._queue is not None
+        self._evict()
+
+        job = Job(id=secrets.token_urlsafe(12), kind=kind, work=work)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise ElevenLabsError(
+                "Too many queued jobs; retry shortly",
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            ) from None
+        jobs_queued.inc()
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._evict()
+        return self._jobs.get(job_id)
+
+    def stats(self) -> dict[str, Any]:
+        counts: dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers if self.running else 0,
+            "queue_size": self.queue_size,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "jobs": counts,
+        }
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        while True:
+            job = await queue.get()
+            jobs_queued.dec()
+            work, job.work = job.work, None
+            job.status = "running"
+            try:
+                assert work is not None
+                self._finish(job, result=await work())
+            except asyncio.CancelledError:
+                raise
+            except ElevenLabsError as exc:
+                self._finish(job, error={"status_code": int(exc.status_code), "detail": str(exc)})
+            except Exception:  # noqa: BLE001
+                logger.exception("Job %s (%s) failed", job.id, job.kind)
+                self._finish(job, error={
+                    "status_code": HTTPStatus.INTERNAL_SERVER_ERROR,
+                    "detail": "Job failed unexpectedly",
+                })
+            finally:
+                queue.task_done()
+
+    def _finish(
+        self,
+        job: Job,
+        *,
+        result: Optional[dict[str, Any]] = None,
+        error: Optional[dict[str, Any]] = None,
+    ) -> None:
+        job.status = "failed" if error is not None else "succeeded"
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        job.done.set()
+        jobs_total.inc(job.kind, job.status)
+
+    def _evict(self) -> None:
+        cutoff = time.time() - self.ttl
+        overflow = len(self._jobs) - self.max_entries
+        for job_id in list(self._jobs):
+            job = self._jobs[job_id]
+            if not job.finished:
+                continue
+            if job.finished_at is not None and job.finished_at < cutoff:
+                del self._jobs[job_id]
+                overflow -= 1
+            elif overflow > 0:
+                del self._jobs[job_id]
+                overflow -= 1
+
+
+def _build_job_manager() -> JobManager:
+    settings = get_settings()
+    return JobManager(
+        workers=settings.job_workers,
+        queue_size=settings.job_queue_size,
+        ttl=settings.job_ttl,
+        max_entries=settings.job_max_entries,
+    )
+
+
+job_manager = _build_job_manager()
+
+
+__all__ = ["Job", "JobManager", "job_manager"]
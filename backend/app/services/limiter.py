@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import math
+from collections import deque
+from typing import Any, Optional
+
+from ..config import get_settings
+from .metrics import Counter, Gauge, registry
+
+# Weight of each new sample in the smoothed no-overload latency.
+_BASELINE_ALPHA = 0.05
+# Multiplicative decrease applied to the limit on an overload signal.
+_BACKOFF_RATIO = 0.9
+
+concurrency_limit = registry.register(Gauge(
+    "voice_test_upstream_concurrency_limit",
+    "Current adaptive concurrency limit per upstream operation.",
+    ("operation",),
+))
+queue_depth = registry.register(Gauge(
+    "voice_test_upstream_queue_depth",
+    "Requests waiting for an upstream concurrency slot.",
+    ("operation",),
+))
+shed_requests = registry.register(Counter(
+    "voice_test_upstream_shed_total",
+    "Requests rejected with 503 because the wait queue was full or the wait timed out.",
+    ("operation", "reason"),
+))
+
+
+class LimitExceeded(Exception):
+    """No slot became available; the caller should retry after ``retry_after`` seconds."""
+
+    def __init__(self, operation: str, reason: str, retry_after: int):
+        super().__init__(f"{operation} is overloaded ({reason})")
+        self.operation = operation
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit for one upstream operation.
+
+    Each finished call feeds back its latency and whether it was an
+    overload signal (429, 5xx, timeout). Overload signals, or a latency
+    above ``tolerance`` times the smoothed baseline, shrink the limit by
+    10%; successes while the limit is actually in use grow it by about one
+    slot per limit's worth of calls. Callers beyond the limit wait in a
+    FIFO queue of at most ``queue_size`` entries for at most
+    ``queue_timeout`` seconds before ``LimitExceeded`` is raised.
+    """
+
+    def __init__(
+        self,
+        operation: str,
+        *,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        queue_size: int,
+        queue_timeout: float,
+        tolerance: float,
+    ):
+        self.operation = operation
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.tolerance = tolerance
+        self.in_flight = 0
+        self.baseline: Optional[float] = None
+        self.shed = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        concurrency_limit.set(self.limit, operation)
+
+    async def acquire(self) -> None:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+
+        if len(self._waiters) >= self.queue_size:
+            self._shed("queue_full")
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        queue_depth.inc(self.operation)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on.
+                self.release(None, dropped=False)
+            else:
+                waiter.cancel()
+                self._remove_waiter(waiter)
+            if isinstance(exc, asyncio.TimeoutError):
+                self._shed("queue_timeout")
+            raise
+
+    def release(self, latency: Optional[float], *, dropped: bool) -> None:
+        self.in_flight -= 1
+        if latency is not None:
+            self._adapt(latency, dropped)
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            queue_depth.dec(self.operation)
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "baseline_latency": self.baseline,
+            "shed": self.shed,
+        }
+
+    def retry_after(self) -> int:
+        # Roughly how long it takes the current backlog to drain.
+        per_call = self.baseline or 1.0
+        backlog = (len(self._waiters) + self.in_flight) / max(1.0, self.limit)
+        return max(1, math.ceil(per_call * backlog))
+
+    def _adapt(self, latency: float, dropped: bool) -> None:
+        if dropped or (self.baseline is not None and latency > self.baseline * self.tolerance):
+            self.limit = max(float(self.minimum), self.limit * _BACKOFF_RATIO)
+        elif self.in_flight + 1 >= self.limit / 2:
+            self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+
+        if not dropped:
+            self.baseline = latency if self.baseline is None else (
+                self.baseline + _BASELINE_ALPHA * (latency - self.baseline)
+            )
+        concurrency_limit.set(self.limit, self.operation)
+
+    def _remove_waiter(self, waiter: asyncio.Future[None]) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            return
+        queue_depth.dec(self.operation)
+
+    def _shed(self, reason: str) -> None:
+        self.shed += 1
+        shed_requests.inc(self.operation, reason)
+        raise LimitExceeded(self.operation, reason, self.retry_after())
+
+
+class UpstreamLimiters:
+    """Lazily created ``AdaptiveLimiter`` per upstream operation."""
+
+    def __init__(self) -> None:
+        self._limiters: dict[str, AdaptiveLimiter] = {}
+
+    def get(self, operation: str) -> Optional[AdaptiveLimiter]:
+        limiter = self._limiters.get(operation)
+        if limiter is None:
+            settings = get_settings()
+            if settings.upstream_concurrency_max <= 0:
+                return None
+            limiter = self._limiters[operation] = AdaptiveLimiter(
+                operation,
+                initial=settings.upstream_concurrency_initial,
+                minimum=settings.upstream_concurrency_min,
+                maximum=settings.upstream_concurrency_max,
+                queue_size=settings.upstream_queue_size,
+                queue_timeout=settings.upstream_queue_timeout,
+                tolerance=settings.upstream_latency_tolerance,
+            )
+        return limiter
+
+    def stats(self) -> dict[str, Any]:
+        return {operation: limiter.stats() for operation, limiter in self._limiters.items()}
+
+
+upstream_limiters = UpstreamLimiters()
+
+
+__all__ = ["AdaptiveLimiter", "LimitExceeded", "UpstreamLimiters", "upstream_limiters"]
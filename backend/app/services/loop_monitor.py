@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Optional
+
+from ..config import get_settings
+from .metrics import Counter, Histogram, registry
+
+logger = logging.getLogger(__name__)
+
+_MAX_STALLS = 50
+# Frames of a stall's stack that go to the log; the debug route has all of them.
+_LOGGED_FRAMES = 8
+
+loop_lag = registry.register(Histogram(
+    "voice_test_event_loop_lag_seconds",
+    "How late the event loop monitor woke up compared to its schedule.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+))
+loop_stalls = registry.register(Counter(
+    "voice_test_event_loop_stalls_total",
+    "Event loop stalls longer than LOOP_LAG_THRESHOLD.",
+))
+
+
+class LoopLagMonitor:
+    """Measure event loop lag and catch the code behind long stalls.
+
+    A task on the loop sleeps ``interval`` seconds at a time; how late it
+    wakes is the loop's lag. By the time the loop is free again, whatever
+    blocked it has returned, so a watchdog thread looks at the loop while
+    it is still stuck: once the task is overdue by half the threshold, it
+    captures the loop thread's stack. Stalls over ``threshold`` are logged
+    and kept, with that stack, for ``/api/debug/loop-stalls``.
+    """
+
+    def __init__(self, *, threshold: float, interval: float):
+        self.threshold = threshold
+        self.interval = max(0.001, interval)
+        self.stalls: deque[dict[str, Any]] = deque(maxlen=_MAX_STALLS)
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._loop_thread = 0
+        self._beat = 0.0
+        self._stack: Optional[tuple[float, list[str]]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        if self.running or not self.enabled:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._done.clear()
+        self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        watchdog, self._watchdog = self._watchdog, None
+        self._done.set()
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if watchdog is not None:
+            watchdog.join()
+
+    async def _run(self) -> None:
+        while True:
+            beat = time.perf_counter()
+            self._beat = beat
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - beat - self.interval)
+            loop_lag.observe(lag)
+            if lag >= self.threshold:
+                self._record(beat, lag)
+
+    def _record(self, beat: float, lag: float) -> None:
+        with self._lock:
+            captured, self._stack = self._stack, None
+        stack = captured[1] if captured is not None and captured[0] == beat else None
+        loop_stalls.inc()
+        self.stalls.append({"at": time.time(), "lag_ms": lag * 1000, "stack": "".join(stack) if stack else None})
+        if stack:
+            logger.warning(
+                "Event loop stalled for %.0f ms in:\n%s", lag * 1000, "".join(stack[-_LOGGED_FRAMES:])
+            )
+        else:
+            logger.warning("Event loop stalled for %.0f ms", lag * 1000)
+
+    def _watch(self) -> None:
+        while not self._done.wait(min(self.interval, self.threshold / 4)):
+            beat = self._beat
+            if time.perf_counter() - beat - self.interval < self.threshold / 2:
+                continue
+            with self._lock:
+                if self._stack is not None and self._stack[0] == beat:
+                    continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = traceback.format_stack(frame)
+            with self._lock:
+                self._stack = (beat, stack)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold * 1000,
+            "interval_ms": self.interval * 1000,
+            "stalls": list(reversed(self.stalls)),
+        }
+
+
+def _build_loop_monitor() -> LoopLagMonitor:
+    settings = get_settings()
+    return LoopLagMonitor(
+        threshold=settings.loop_lag_threshold,
+        interval=settings.loop_lag_interval,
+    )
+
+
+loop_monitor = _build_loop_monitor()
+
+
+__all__ = ["LoopLagMonitor", "loop_monitor"]
@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterable, Optional, TypeVar
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .profiling import record_phase
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = tuple[str, ...]
+M = TypeVar("M", bound="_Metric")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+    def _header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        *,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        # Per label set: [per-bucket counts..., +Inf count], sum.
+        self._series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collects metrics and renders them in the Prometheus text format.
+
+    Everything is updated from the event loop thread, so plain dicts are
+    enough; recording a sample is a dict lookup and an addition.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: M) -> M:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "voice_test_http_requests_total",
+    "HTTP requests handled, by route template, method and status code.",
+    ("route", "method", "status"),
+))
+http_in_flight = registry.register(Gauge(
+    "voice_test_http_requests_in_flight",
+    "HTTP requests currently being handled.",
+    ("method",),
+))
+http_latency = registry.register(Histogram(
+    "voice_test_http_request_duration_seconds",
+    "Time to the end of the HTTP response body.",
+    ("route", "method"),
+))
+http_request_bytes = registry.register(Histogram(
+    "voice_test_http_request_size_bytes",
+    "HTTP request body size.",
+    ("route", "method"),
+    buckets=SIZE_BUCKETS,
+))
+http_response_bytes = registry.register(Histogram(
+    "voice_test_http_response_size_bytes",
+    "HTTP response body size.",
+    ("route", "method"),
+    buckets=SIZE_BUCKETS,
+))
+upstream_requests = registry.register(Counter(
+    "voice_test_upstream_requests_total",
+    "Calls to ElevenLabs and OpenAI, by operation and status code ('error' when no response arrived).",
+    ("upstream", "operation", "status"),
+))
+upstream_in_flight = registry.register(Gauge(
+    "voice_test_upstream_requests_in_flight",
+    "Upstream calls currently in progress.",
+    ("upstream", "operation"),
+))
+upstream_latency = registry.register(Histogram(
+    "voice_test_upstream_request_duration_seconds",
+    "Upstream call duration, including reading a streamed body.",
+    ("upstream", "operation"),
+))
+upstream_request_bytes = registry.register(Histogram(
+    "voice_test_upstream_request_size_bytes",
+    "Upstream request body size, when known up front.",
+    ("upstream", "operation"),
+    buckets=SIZE_BUCKETS,
+))
+upstream_response_bytes = registry.register(Histogram(
+    "voice_test_upstream_response_size_bytes",
+    "Upstream response body size.",
+    ("upstream", "operation"),
+    buckets=SIZE_BUCKETS,
+))
+
+
+class UpstreamCall:
+    """Outcome of one upstream call, filled in by the caller."""
+
+    __slots__ = ("status", "request_bytes", "response_bytes")
+
+    def __init__(self) -> None:
+        self.status: Optional[int] = None
+        self.request_bytes: Optional[int] = None
+        self.response_bytes: Optional[int] = None
+
+
+@asynccontextmanager
+async def track_upstream(upstream: str, operation: str) -> AsyncIterator[UpstreamCall]:
+    call = UpstreamCall()
+    upstream_in_flight.inc(upstream, operation)
+    started = time.perf_counter()
+    try:
+        yield call
+    finally:
+        upstream_in_flight.dec(upstream, operation)
+        elapsed = time.perf_counter() - started
+        upstream_latency.observe(elapsed, upstream, operation)
+        record_phase(f"upstream.{operation}", elapsed)
+        status = str(call.status) if call.status is not None else "error"
+        upstream_requests.inc(upstream, operation, status)
+        if call.request_bytes is not None:
+            upstream_request_bytes.observe(call.request_bytes, upstream, operation)
+        if call.response_bytes is not None:
+            upstream_response_bytes.observe(call.response_bytes, upstream, operation)
+
+
+def route_label(scope: Scope) -> str:
+    """Full path template of the route that handled the request, or ``other``.
+
+    ``route.path`` is relative to the app it belongs to, so a route inside a
+    ``Mount`` gets the mount's prefix (``root_path`` beyond the app's own)
+    put back. Routers carry their ``/api`` prefix themselves: since
+    FastAPI 0.143 a prefix given to ``include_router`` is not part of
+    ``route.path``.
+    """
+    path = getattr(scope.get("route"), "path", None)
+    if not path:
+        return "other"
+    mount_prefix = ""
+    if "app_root_path" in scope:
+        mount_prefix = scope.get("root_path", "").removeprefix(scope["app_root_path"])
+    return mount_prefix + path
+
+
+class MetricsMiddleware:
+    """Record count, latency and body sizes of every HTTP request.
+
+    Requests are labelled with the matched route template rather than the
+    raw path, so label cardinality stays bounded; anything that reaches no
+    route, including the frontend mount, is ``other``.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        request_bytes = 0
+        response_bytes = 0
+
+        async def counting_receive() -> Message:
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message: Message) -> None:
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec(method)
+            route = route_label(scope)
+            http_requests.inc(route, method, str(status))
+            http_latency.observe(elapsed, route, method)
+            http_request_bytes.observe(request_bytes, route, method)
+            http_response_bytes.observe(response_bytes, route, method)
+
+
+def render_metrics() -> str:
+    return registry.render()
+
+
+__all__ = [
+    "CONTENT_TYPE",
+    "MetricsMiddleware",
+    "UpstreamCall",
+    "render_metrics",
+    "route_label",
+    "track_upstream",
+]
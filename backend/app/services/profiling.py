@@ -0,0 +1,318 @@
+from __future__ import annotations
+
+import functools
+import hmac
+import inspect
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import CodeType, FrameType
+from typing import Any, Callable, Iterator, Optional
+
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..config import get_settings
+
+PROFILE_HEADER = "x-profile"
+
+# Innermost frames of a thread that is waiting for work rather than doing any.
+_IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+_current: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+
+
+def secret_matches(value: Optional[str]) -> bool:
+    secret = get_settings().profiling_secret
+    return bool(secret and value) and hmac.compare_digest(value.encode(), secret.encode())
+
+
+class RequestProfile:
+    """Phase timings of one profiled request.
+
+    Phases are named spans whose durations add up per name, so repeated
+    work (three upstream calls, two executor hops) shows as one total with a
+    count. Everything runs on the event loop, so no locking is needed.
+    """
+
+    def __init__(self) -> None:
+        self.id = secrets.token_hex(8)
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.phases: dict[str, list[float]] = {}
+        self.body_received: Optional[float] = None
+        self.handler_finished: Optional[float] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        entry = self.phases.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def server_timing(self, now: float) -> str:
+        entries = [
+            f'{name};dur={seconds * 1000:.2f}' + (f';desc="{int(count)} calls"' if count > 1 else "")
+            for name, (seconds, count) in self.phases.items()
+        ]
+        entries.append(f"total;dur={(now - self.started) * 1000:.2f}")
+        return ", ".join(entries)
+
+    def phase_list(self) -> list[dict[str, Any]]:
+        return [
+            {"name": name, "duration_ms": seconds * 1000, "count": int(count)}
+            for name, (seconds, count) in self.phases.items()
+        ]
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _current.get()
+
+
+def record_phase(name: str, seconds: float) -> None:
+    profile = _current.get()
+    if profile is not None:
+        profile.add(name, seconds)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time the block as ``name`` when the current request is being profiled."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - started)
+
+
+_labels: dict[CodeType, str] = {}
+
+
+def _label(code: CodeType) -> str:
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename.replace(os.sep, "/").rsplit("/", 2)[-2:]
+        label = _labels[code] = f"{code.co_name} ({'/'.join(path)})"
+    return label
+
+
+def _collapse(frame: FrameType) -> Optional[str]:
+    """``outer;...;inner`` frame labels, or ``None`` for an idle thread."""
+    code = frame.f_code
+    if (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES:
+        return None
+    labels: list[str] = []
+    current: Optional[FrameType] = frame
+    while current is not None:
+        labels.append(_label(current.f_code))
+        current = current.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class StackSampler(threading.Thread):
+    """Sample the event loop thread and the ``run_blocking`` workers.
+
+    Stacks are kept in the collapsed format (``thread;outer;...;inner``
+    with a count) read by flamegraph.pl and speedscope. Idle samples of the
+    loop count as ``<idle>``, i.e. time spent waiting on I/O; idle workers
+    are skipped. Other requests in flight at the same time share these
+    threads and appear in the samples too.
+    """
+
+    def __init__(self, loop_thread: int, *, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.loop_thread = loop_thread
+        self.interval = max(0.001, interval)
+        self.samples = 0
+        self.stacks: Counter[str] = Counter()
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == self.loop_thread:
+                    thread = "event-loop"
+                else:
+                    name = names.get(ident, "")
+                    if "-worker" not in name:
+                        continue
+                    thread = name.rsplit("_", 1)[0]
+                stack = _collapse(frame)
+                if stack is None:
+                    if ident != self.loop_thread:
+                        continue
+                    stack = "<idle>"
+                self.stacks[f"{thread};{stack}"] += 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+
+_profiles: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+
+def _store(profile: dict[str, Any]) -> None:
+    _profiles[profile["id"]] = profile
+    while len(_profiles) > max(1, get_settings().profiling_max_profiles):
+        _profiles.popitem(last=False)
+
+
+def get_profile(profile_id: str) -> Optional[dict[str, Any]]:
+    return _profiles.get(profile_id)
+
+
+def collapsed_stacks(profile: dict[str, Any]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in profile["stacks"].items())
+
+
+class ProfilingMiddleware:
+    """Profile requests that carry ``X-Profile: <PROFILING_SECRET>``.
+
+    The response gets a ``Server-Timing`` header with the phases known when
+    it starts (``receive``, ``validate``, ``handler``, ``serialize``, plus
+    upstream calls, executor queueing and audio decoding) and an
+    ``X-Profile-Id`` under which the complete profile, including sampled
+    stacks and the time spent sending the body, can be downloaded. Without
+    a configured secret, or without the header, requests pass straight
+    through.
+    """
+
+    def __init__(self, app: ASGIApp, *, exclude_prefixes: tuple[str, ...] = ()):
+        self.app = app
+        self.exclude_prefixes = exclude_prefixes
+
+    def _wants_profile(self, scope: Scope) -> bool:
+        if scope["type"] != "http" or not get_settings().profiling_secret:
+            return False
+        if scope["path"].startswith(self.exclude_prefixes):
+            return False
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER.encode():
+                return secret_matches(value.decode("latin-1"))
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        settings = get_settings()
+        profile = RequestProfile()
+        sampler = StackSampler(threading.get_ident(), interval=settings.profiling_sample_interval)
+        status = 500
+        response_started: Optional[float] = None
+
+        async def timed_receive() -> Message:
+            started = time.perf_counter()
+            message = await receive()
+            now = time.perf_counter()
+            if message["type"] == "http.request":
+                profile.add("receive", now - started)
+                if not message.get("more_body", False):
+                    profile.body_received = now
+            return message
+
+        async def timed_send(message: Message) -> None:
+            nonlocal status, response_started
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_started = time.perf_counter()
+                if profile.handler_finished is not None:
+                    profile.add("serialize", response_started - profile.handler_finished)
+                message = {
+                    **message,
+                    "headers": [
+                        *message.get("headers", []),
+                        (b"server-timing", profile.server_timing(response_started).encode()),
+                        (b"x-profile-id", profile.id.encode()),
+                    ],
+                }
+            await send(message)
+
+        token = _current.set(profile)
+        sampler.start()
+        try:
+            await self.app(scope, timed_receive, timed_send)
+        finally:
+            sampler.stop()
+            _current.reset(token)
+            finished = time.perf_counter()
+            if response_started is not None:
+                profile.add("send", finished - response_started)
+            _store({
+                "id": profile.id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(scope.get("route"), "path", None),
+                "status": status,
+                "started_at": profile.started_at,
+                "duration_ms": (finished - profile.started) * 1000,
+                "phases": profile.phase_list(),
+                "sample_interval_ms": sampler.interval * 1000,
+                "samples": sampler.samples,
+                "stacks": dict(sampler.stacks.most_common()),
+            })
+
+
+def _timed_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(endpoint)
+    async def timed(**values: Any) -> Any:
+        profile = _current.get()
+        if profile is None:
+            return await endpoint(**values)
+        started = time.perf_counter()
+        profile.add("validate", started - (profile.body_received or profile.started))
+        try:
+            return await endpoint(**values)
+        finally:
+            profile.handler_finished = time.perf_counter()
+            profile.add("handler", profile.handler_finished - started)
+
+    timed._profiled = True  # type: ignore[attr-defined]
+    return timed
+
+
+class ProfiledRoute(APIRoute):
+    """``APIRoute`` that marks where the endpoint starts and returns.
+
+    That splits a profiled request into body parsing/validation, the
+    handler itself and response serialization. The wrapper keeps the
+    endpoint's signature (``functools.wraps``), so FastAPI sees the same
+    parameters and return type.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        if inspect.iscoroutinefunction(endpoint) and not getattr(endpoint, "_profiled", False):
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+__all__ = [
+    "PROFILE_HEADER",
+    "ProfiledRoute",
+    "ProfilingMiddleware",
+    "RequestProfile",
+    "StackSampler",
+    "collapsed_stacks",
+    "current_profile",
+    "get_profile",
+    "phase",
+    "record_phase",
+    "secret_matches",
+]
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import difflib
+import hashlib
+import re
+from bisect import bisect_left
+from typing import Any, Optional, Sequence
+
+from ..config import get_settings
+from .cache import SharedCache, cache_backend
+from .executors import run_blocking
+
+# Regions without a unique common line fall back to difflib, but only when
+# small enough for its matcher to stay cheap; larger ones become a replace.
+_FALLBACK_MAX_CELLS = 250_000
+# Word-level detail is only computed for replaced blocks up to this size.
+_WORD_DIFF_MAX_CHARS = 20_000
+
+_CODE_FENCE = re.compile(r"^```[\w-]*\n([\s\S]*?)\n```$")
+_WORD = re.compile(r"\s+|\w+|[^\w\s]")
+
+
+def strip_code_fence(text: str | None) -> str:
+    """Mirror of the frontend's ``stripCodeFence``: what the editor shows."""
+    if not text:
+        return ""
+    trimmed = text.strip()
+    match = _CODE_FENCE.match(trimmed)
+    return match.group(1).strip() if match else trimmed
+
+
+def content_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def _unique_anchors(
+    a: Sequence[str], b: Sequence[str], alo: int, ahi: int, blo: int, bhi: int
+) -> list[tuple[int, int]]:
+    """Longest increasing run of lines that occur exactly once on each side."""
+    counts: dict[str, list[int]] = {}
+    for i in range(alo, ahi):
+        entry = counts.setdefault(a[i], [0, 0, i, -1])
+        entry[0] += 1
+    for j in range(blo, bhi):
+        entry = counts.get(b[j])
+        if entry is not None:
+            entry[1] += 1
+            entry[3] = j
+
+    candidates = sorted(
+        (i, j) for count_a, count_b, i, j in counts.values() if count_a == 1 and count_b == 1
+    )
+    if not candidates:
+        return []
+
+    # Patience sorting: piles hold the smallest b index ending a run of each length.
+    tails: list[int] = []
+    tail_index: list[int] = []
+    previous: list[int] = [-1] * len(candidates)
+    for index, (_, j) in enumerate(candidates):
+        pile = bisect_left(tails, j)
+        if pile:
+            previous[index] = tail_index[pile - 1]
+        if pile == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[pile] = j
+            tail_index[pile] = index
+
+    anchors: list[tuple[int, int]] = []
+    index = tail_index[-1]
+    while index != -1:
+        anchors.append(candidates[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def _fallback_pairs(
+    a: Sequence[str], b: Sequence[str], alo: int, ahi: int, blo: int, bhi: int
+) -> list[tuple[int, int]]:
+    if (ahi - alo) * (bhi - blo) > _FALLBACK_MAX_CELLS:
+        return []
+    matcher = difflib.SequenceMatcher(None, a[alo:ahi], b[blo:bhi], autojunk=False)
+    return [
+        (alo + block.a + offset, blo + block.b + offset)
+        for block in matcher.get_matching_blocks()
+        for offset in range(block.size)
+    ]
+
+
+def _matched_pairs(a: Sequence[str], b: Sequence[str]) -> list[tuple[int, int]]:
+    """Patience diff: index pairs of the items kept from ``a`` in ``b``.
+
+    Common prefixes and suffixes are matched first, then lines unique to
+    both sides anchor the alignment and the gaps between anchors are solved
+    the same way. An explicit stack keeps deep recursion off the C stack.
+    """
+    pairs: list[tuple[int, int]] = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            pairs.append((alo, blo))
+            alo += 1
+            blo += 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            pairs.append((ahi, bhi))
+        if alo == ahi or blo == bhi:
+            continue
+
+        anchors = _unique_anchors(a, b, alo, ahi, blo, bhi)
+        if not anchors:
+            pairs.extend(_fallback_pairs(a, b, alo, ahi, blo, bhi))
+            continue
+        next_a, next_b = alo, blo
+        for i, j in anchors:
+            stack.append((next_a, i, next_b, j))
+            pairs.append((i, j))
+            next_a, next_b = i + 1, j + 1
+        stack.append((next_a, ahi, next_b, bhi))
+
+    pairs.sort()
+    return pairs
+
+
+def opcodes(a: Sequence[str], b: Sequence[str]) -> list[tuple[str, int, int, int, int]]:
+    """``difflib``-style ``(tag, i1, i2, j1, j2)`` opcodes from a patience diff."""
+    codes: list[tuple[str, int, int, int, int]] = []
+    i = j = 0
+    for pair_a, pair_b in [*_matched_pairs(a, b), (len(a), len(b))]:
+        if i < pair_a or j < pair_b:
+            tag = "replace" if i < pair_a and j < pair_b else ("delete" if i < pair_a else "insert")
+            codes.append((tag, i, pair_a, j, pair_b))
+        if pair_a < len(a):
+            if codes and codes[-1][0] == "equal":
+                _, i1, _, j1, _ = codes[-1]
+                codes[-1] = ("equal", i1, pair_a + 1, j1, pair_b + 1)
+            else:
+                codes.append(("equal", pair_a, pair_a + 1, pair_b, pair_b + 1))
+        i, j = pair_a + 1, pair_b + 1
+    return codes
+
+
+def word_diff(removed: str, added: str) -> list[list[str]]:
+    """Word-level ``[op, text]`` segments turning ``removed`` into ``added``."""
+    a = _WORD.findall(removed)
+    b = _WORD.findall(added)
+    segments: list[list[str]] = []
+
+    def emit(op: str, tokens: Sequence[str]) -> None:
+        if not tokens:
+            return
+        if segments and segments[-1][0] == op:
+            segments[-1][1] += "".join(tokens)
+        else:
+            segments.append([op, "".join(tokens)])
+
+    for tag, i1, i2, j1, j2 in opcodes(a, b):
+        if tag == "equal":
+            emit("equal", a[i1:i2])
+        else:
+            emit("delete", a[i1:i2])
+            emit("insert", b[j1:j2])
+    return segments
+
+
+def diff_prompts(base: str, revised: str, *, context: Optional[int] = None) -> dict[str, Any]:
+    """Line diff of two prompts as compact hunks, with word detail on replacements.
+
+    Every hunk carries ``op`` and its line ranges (``base_start``/``base_count``
+    and ``revised_start``/``revised_count``). ``equal`` hunks carry ``text``,
+    ``delete``/``insert``/``replace`` carry ``removed`` and/or ``added``, and
+    ``replace`` hunks also carry word-level ``words`` segments when small
+    enough. With ``context``, unchanged runs longer than twice that keep only
+    ``context`` lines on each side; the rest becomes a ``skip`` hunk.
+
+    CPU-bound: run it on the ``diff`` executor.
+    """
+    a = base.splitlines(keepends=True)
+    b = revised.splitlines(keepends=True)
+    hunks: list[dict[str, Any]] = []
+    stats = {"added": 0, "removed": 0, "unchanged": 0}
+
+    def hunk(op: str, i1: int, i2: int, j1: int, j2: int, **fields: Any) -> None:
+        hunks.append({
+            "op": op,
+            "base_start": i1,
+            "base_count": i2 - i1,
+            "revised_start": j1,
+            "revised_count": j2 - j1,
+            **fields,
+        })
+
+    codes = opcodes(a, b)
+    for index, (tag, i1, i2, j1, j2) in enumerate(codes):
+        if tag == "equal":
+            stats["unchanged"] += i2 - i1
+            head = 0 if index == 0 else (context if context is not None else i2 - i1)
+            tail = 0 if index == len(codes) - 1 else (context if context is not None else i2 - i1)
+            if context is None or head + tail >= i2 - i1:
+                hunk("equal", i1, i2, j1, j2, text="".join(a[i1:i2]))
+                continue
+            if head:
+                hunk("equal", i1, i1 + head, j1, j1 + head, text="".join(a[i1:i1 + head]))
+            hunk("skip", i1 + head, i2 - tail, j1 + head, j2 - tail)
+            if tail:
+                hunk("equal", i2 - tail, i2, j2 - tail, j2, text="".join(a[i2 - tail:i2]))
+            continue
+
+        removed = "".join(a[i1:i2])
+        added = "".join(b[j1:j2])
+        stats["removed"] += i2 - i1
+        stats["added"] += j2 - j1
+        if tag == "delete":
+            hunk("delete", i1, i2, j1, j2, removed=removed)
+        elif tag == "insert":
+            hunk("insert", i1, i2, j1, j2, added=added)
+        else:
+            fields: dict[str, Any] = {"removed": removed, "added": added}
+            if len(removed) + len(added) <= _WORD_DIFF_MAX_CHARS:
+                fields["words"] = word_diff(removed, added)
+            hunk("replace", i1, i2, j1, j2, **fields)
+
+    return {
+        "base_hash": content_hash(base),
+        "revised_hash": content_hash(revised),
+        "context": context,
+        "stats": stats,
+        "hunks": hunks,
+    }
+
+
+def _build_diff_cache() -> SharedCache:
+    settings = get_settings()
+    return SharedCache(
+        "diffs",
+        maxsize=settings.diff_cache_max_entries,
+        ttl=settings.diff_cache_ttl,
+        backend=cache_backend,
+    )
+
+
+diff_cache = _build_diff_cache()
+
+
+async def prompt_diff(base: str, revised: str, *, context: Optional[int] = None) -> dict[str, Any]:
+    """``diff_prompts`` cached by the content hashes of both sides."""
+    key = f"{content_hash(base)}:{content_hash(revised)}:{'' if context is None else context}"
+    cached = await diff_cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = await run_blocking("diff", diff_prompts, base, revised, context=context)
+    await diff_cache.set(key, result)
+    return result
+
+
+__all__ = [
+    "content_hash",
+    "diff_cache",
+    "diff_prompts",
+    "opcodes",
+    "prompt_diff",
+    "strip_code_fence",
+    "word_diff",
+]
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+
+from ..config import Settings, get_settings
+from .prompt_diff import content_hash, opcodes
+
+logger = logging.getLogger(__name__)
+
+# Above this share of the snapshot's size a delta is not worth it.
+_DELTA_MAX_RATIO = 0.5
+
+
+@dataclass(frozen=True)
+class Revision:
+    agent_id: str
+    revision: int
+    created_at: float
+    source: str
+    kind: str
+    stored_bytes: int
+    prompt_hash: str
+    restored_from: Optional[int] = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def encode_delta(snapshot: str, prompt: str) -> list[Any]:
+    """Line delta from ``snapshot`` to ``prompt``.
+
+    ``[start, end]`` items copy snapshot lines, strings are inserted as-is.
+    """
+    base = snapshot.splitlines(keepends=True)
+    revised = prompt.splitlines(keepends=True)
+    ops: list[Any] = []
+    for tag, i1, i2, j1, j2 in opcodes(base, revised):
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j1 < j2:
+            ops.append("".join(revised[j1:j2]))
+    return ops
+
+
+def apply_delta(snapshot: str, ops: list[Any]) -> str:
+    base = snapshot.splitlines(keepends=True)
+    return "".join(
+        op if isinstance(op, str) else "".join(base[op[0]:op[1]])
+        for op in ops
+    )
+
+
+def _pack(document: dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(document, separators=(",", ":")).encode(), 6)
+
+
+def _unpack(data: bytes) -> dict[str, Any]:
+    return json.loads(zlib.decompress(data))
+
+
+class PromptHistory:
+    """Append-only prompt revisions per agent, in a local SQLite file.
+
+    Every ``snapshot_interval``-th revision (and any revision whose delta
+    would be large) is stored as a full zlib-compressed snapshot; the rest
+    are compressed line deltas against the latest snapshot. Reading any
+    revision therefore costs at most two row lookups and one delta
+    application, never a chain walk or a call to ElevenLabs.
+
+    Blocking: callers run it on the ``history`` executor.
+    """
+
+    def __init__(self, path: str | None, *, snapshot_interval: int):
+        self.path = path
+        self.snapshot_interval = max(1, snapshot_interval)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None and self.path:
+            try:
+                conn = sqlite3.connect(
+                    self.path, timeout=5.0, check_same_thread=False, isolation_level=None
+                )
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS prompt_revisions ("
+                    " agent_id TEXT NOT NULL,"
+                    " revision INTEGER NOT NULL,"
+                    " created_at REAL NOT NULL,"
+                    " source TEXT NOT NULL,"
+                    " kind TEXT NOT NULL,"
+                    " snapshot_revision INTEGER NOT NULL,"
+                    " prompt_hash TEXT NOT NULL,"
+                    " restored_from INTEGER,"
+                    " data BLOB NOT NULL,"
+                    " PRIMARY KEY (agent_id, revision))"
+                )
+            except sqlite3.Error as exc:
+                logger.warning("Prompt history file %s unavailable: %s", self.path, exc)
+                self.path = None
+                return None
+            self._conn = conn
+        return self._conn
+
+    def record(
+        self,
+        agent_id: str,
+        *,
+        prompt: str,
+        first_message: Optional[str],
+        source: str,
+        restored_from: Optional[int] = None,
+    ) -> Optional[Revision]:
+        """Append a revision unless it matches the latest one; return what was stored."""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+
+            prompt_hash = content_hash(json.dumps([prompt, first_message]))
+            # BEGIN IMMEDIATE serialises revision numbering across workers.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                latest = conn.execute(
+                    "SELECT revision, prompt_hash, snapshot_revision FROM prompt_revisions"
+                    " WHERE agent_id = ? ORDER BY revision DESC LIMIT 1",
+                    (agent_id,),
+                ).fetchone()
+                if latest is not None and latest[1] == prompt_hash and restored_from is None:
+                    conn.execute("COMMIT")
+                    return None
+
+                revision = latest[0] + 1 if latest else 1
+                kind, snapshot_revision = "snapshot", revision
+                data = _pack({"prompt": prompt, "first_message": first_message})
+                if latest is not None and (revision - latest[2]) % self.snapshot_interval:
+                    snapshot = self._snapshot(conn, agent_id, latest[2])
+                    delta = _pack({
+                        "ops": encode_delta(snapshot["prompt"], prompt),
+                        "first_message": first_message,
+                    })
+                    if len(delta) <= len(data) * _DELTA_MAX_RATIO:
+                        kind, snapshot_revision, data = "delta", latest[2], delta
+
+                created_at = time.time()
+                conn.execute(
+                    "INSERT INTO prompt_revisions (agent_id, revision, created_at, source, kind,"
+                    " snapshot_revision, prompt_hash, restored_from, data)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (agent_id, revision, created_at, source, kind, snapshot_revision,
+                     prompt_hash, restored_from, data),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        return Revision(
+            agent_id=agent_id,
+            revision=revision,
+            created_at=created_at,
+            source=source,
+            kind=kind,
+            stored_bytes=len(data),
+            prompt_hash=prompt_hash,
+            restored_from=restored_from,
+        )
+
+    def _snapshot(self, conn: sqlite3.Connection, agent_id: str, revision: int) -> dict[str, Any]:
+        row = conn.execute(
+            "SELECT data FROM prompt_revisions WHERE agent_id = ? AND revision = ?",
+            (agent_id, revision),
+        ).fetchone()
+        return _unpack(row[0])
+
+    def revisions(
+        self, agent_id: str, *, limit: int = 50, before: Optional[int] = None
+    ) -> list[Revision]:
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return []
+            rows = conn.execute(
+                "SELECT agent_id, revision, created_at, source, kind, length(data),"
+                " prompt_hash, restored_from FROM prompt_revisions"
+                " WHERE agent_id = ? AND revision < ? ORDER BY revision DESC LIMIT ?",
+                (agent_id, before if before is not None else 2**62, limit),
+            ).fetchall()
+        return [Revision(*row) for row in rows]
+
+    def get(self, agent_id: str, revision: int) -> Optional[dict[str, Any]]:
+        """The revision's metadata plus its full ``prompt`` and ``first_message``."""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            row = conn.execute(
+                "SELECT agent_id, revision, created_at, source, kind, length(data),"
+                " prompt_hash, restored_from, snapshot_revision, data FROM prompt_revisions"
+                " WHERE agent_id = ? AND revision = ?",
+                (agent_id, revision),
+            ).fetchone()
+            if row is None:
+                return None
+            meta, snapshot_revision, data = Revision(*row[:8]), row[8], row[9]
+            document = _unpack(data)
+            if meta.kind == "delta":
+                snapshot = self._snapshot(conn, agent_id, snapshot_revision)
+                document["prompt"] = apply_delta(snapshot["prompt"], document.pop("ops"))
+        return {**meta.as_dict(), **document}
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return {"enabled": False}
+            agents, revisions, snapshots, stored = conn.execute(
+                "SELECT COUNT(DISTINCT agent_id), COUNT(*),"
+                " COALESCE(SUM(kind = 'snapshot'), 0), COALESCE(SUM(length(data)), 0)"
+                " FROM prompt_revisions"
+            ).fetchone()
+        return {
+            "enabled": True,
+            "path": self.path,
+            "agents": agents,
+            "revisions": revisions,
+            "snapshots": snapshots,
+            "stored_bytes": stored,
+        }
+
+    def configure(self, path: str | None, *, snapshot_interval: int) -> None:
+        """Switch to ``path``, closing the connection to any other file."""
+        with self._lock:
+            if path != self.path and self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self.path = path
+            self.snapshot_interval = max(1, snapshot_interval)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def configure_prompt_history(settings: Settings | None = None) -> None:
+    """Apply the current settings to ``prompt_history``; called from the app lifespan."""
+    settings = settings or get_settings()
+    prompt_history.configure(
+        settings.prompt_history_path,
+        snapshot_interval=settings.prompt_history_snapshot_interval,
+    )
+
+
+def _build_prompt_history() -> PromptHistory:
+    settings = get_settings()
+    return PromptHistory(
+        settings.prompt_history_path,
+        snapshot_interval=settings.prompt_history_snapshot_interval,
+    )
+
+
+prompt_history = _build_prompt_history()
+
+
+__all__ = [
+    "PromptHistory",
+    "Revision",
+    "apply_delta",
+    "configure_prompt_history",
+    "encode_delta",
+    "prompt_history",
+]
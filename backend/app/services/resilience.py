@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from ..config import get_settings
+from .metrics import Counter, Gauge, registry
+
+T = TypeVar("T")
+
+# Hedging only kicks in once this many latency samples have been seen.
+_HEDGE_MIN_SAMPLES = 20
+_LATENCY_WINDOW = 200
+
+_CIRCUIT_STATES = {"closed": 0, "open": 1, "half_open": 2}
+
+circuit_state = registry.register(Gauge(
+    "voice_test_upstream_circuit_state",
+    "Circuit breaker state per upstream (0 closed, 1 open, 2 half-open).",
+    ("upstream",),
+))
+retries_total = registry.register(Counter(
+    "voice_test_upstream_retries_total",
+    "Retried idempotent upstream calls.",
+    ("operation",),
+))
+hedges_total = registry.register(Counter(
+    "voice_test_upstream_hedges_total",
+    "Hedged second requests, by which attempt answered first.",
+    ("operation", "winner"),
+))
+
+
+class CircuitOpen(Exception):
+    def __init__(self, upstream: str, retry_after: int):
+        super().__init__(f"{upstream} circuit is open")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Fail fast while an upstream keeps failing.
+
+    ``failure_threshold`` consecutive failures (5xx or no response) open the
+    circuit for ``reset_timeout`` seconds. After that a single probe call is
+    let through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, upstream: str, *, failure_threshold: int, reset_timeout: float):
+        self.upstream = upstream
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        circuit_state.set(0, upstream)
+
+    def before_call(self) -> bool:
+        """Return whether this call is the half-open probe; raise if open."""
+        if self.state == "closed" or self.failure_threshold <= 0:
+            return False
+
+        remaining = self.opened_at + self.reset_timeout - time.monotonic()
+        if self.state == "open" and remaining <= 0:
+            self._set_state("half_open")
+        if self.state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        raise CircuitOpen(self.upstream, max(1, math.ceil(remaining)))
+
+    def record(self, *, failed: Optional[bool], probe: bool) -> None:
+        """Record a call outcome; ``failed=None`` means the call was abandoned."""
+        if probe:
+            self._probe_in_flight = False
+        if failed is None:
+            return
+        if not failed:
+            self.failures = 0
+            if self.state != "closed":
+                self._set_state("closed")
+            return
+
+        self.failures += 1
+        if probe or (self.failure_threshold > 0 and self.failures >= self.failure_threshold):
+            self.opened_at = time.monotonic()
+            self._set_state("open")
+
+    def stats(self) -> dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures}
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        circuit_state.set(_CIRCUIT_STATES[state], self.upstream)
+
+
+class LatencyWindow:
+    """Recent successful call latencies, for picking a hedge delay."""
+
+    def __init__(self, size: int = _LATENCY_WINDOW):
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def add(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self._samples) < _HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class Resilience:
+    """Circuit breakers per upstream and latency windows per operation."""
+
+    def __init__(self) -> None:
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._latencies: dict[str, LatencyWindow] = {}
+
+    def breaker(self, upstream: str) -> CircuitBreaker:
+        breaker = self._breakers.get(upstream)
+        if breaker is None:
+            settings = get_settings()
+            breaker = self._breakers[upstream] = CircuitBreaker(
+                upstream,
+                failure_threshold=settings.circuit_failure_threshold,
+                reset_timeout=settings.circuit_reset_timeout,
+            )
+        return breaker
+
+    def latencies(self, operation: str) -> LatencyWindow:
+        return self._latencies.setdefault(operation, LatencyWindow())
+
+    def hedge_delay(self, operation: str) -> Optional[float]:
+        settings = get_settings()
+        if not settings.upstream_hedge_enabled:
+            return None
+        observed = self.latencies(operation).percentile(settings.upstream_hedge_percentile)
+        if observed is None:
+            return None
+        return max(settings.upstream_hedge_min_delay, observed)
+
+    async def hedged(self, operation: str, attempt: Callable[[], Awaitable[T]]) -> T:
+        """Run ``attempt``; if it is slower than the hedge delay, race a second one."""
+        delay = self.hedge_delay(operation)
+        if delay is None:
+            return await attempt()
+
+        primary = asyncio.ensure_future(attempt())
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        if done:
+            return primary.result()
+
+        hedge = asyncio.ensure_future(attempt())
+        pending = {primary, hedge}
+        try:
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        hedges_total.inc(operation, "hedge" if task is hedge else "primary")
+                        return task.result()
+                if not pending:
+                    # Both failed: report the primary's error.
+                    return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            for task in (primary, hedge):
+                if task.done() and not task.cancelled():
+                    task.exception()  # mark retrieved
+
+    async def retrying(
+        self,
+        operation: str,
+        attempt: Callable[[], Awaitable[T]],
+        *,
+        retryable: Callable[[BaseException], Optional[float]],
+    ) -> T:
+        """Retry ``attempt`` with full-jitter exponential backoff.
+
+        ``retryable`` returns ``None`` for errors that must not be retried,
+        or the server's requested Retry-After in seconds (``0`` if none).
+        A Retry-After beyond the maximum backoff is not waited out.
+        """
+        settings = get_settings()
+        retry = 0
+        while True:
+            try:
+                return await self.hedged(operation, attempt)
+            except Exception as exc:
+                retry_after = retryable(exc)
+                if (
+                    retry >= settings.upstream_retries
+                    or retry_after is None
+                    or retry_after > settings.upstream_retry_max_delay
+                ):
+                    raise
+                backoff = random.uniform(
+                    0,
+                    min(settings.upstream_retry_max_delay, settings.upstream_retry_base_delay * 2 ** retry),
+                )
+                retry += 1
+                retries_total.inc(operation)
+                await asyncio.sleep(max(backoff, retry_after))
+
+    def stats(self) -> dict[str, Any]:
+        return {upstream: breaker.stats() for upstream, breaker in self._breakers.items()}
+
+
+resilience = Resilience()
+
+
+__all__ = ["CircuitBreaker", "CircuitOpen", "LatencyWindow", "Resilience", "resilience"]
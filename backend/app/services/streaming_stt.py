@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from http import HTTPStatus
+from typing import Awaitable, Callable, Optional
+
+from ..config import get_settings
+from .elevenlabs import ElevenLabsError, transcribe_audio_bytes
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalTranscriber:
+    """Turn a live stream of MediaRecorder chunks into partial transcripts.
+
+    Chunks are appended to a growing clip. Whenever new audio has arrived, a
+    background pass transcribes it and reports the text as a partial; passes
+    never overlap. To keep a long clip from costing quadratic upload and STT
+    time, a pass sends at most ``window_bytes``: the first chunk, which holds
+    the container header, followed by the newest chunks that fit, so the
+    partial shows the most recent speech. The pause between passes is
+    ``interval`` stretched by the number of windows the clip spans, and a
+    clip gets at most ``max_passes`` of them. ``finish`` returns the final
+    transcript of the whole clip, reusing the last partial when it covered
+    everything received.
+    """
+
+    def __init__(
+        self,
+        *,
+        on_partial: Callable[[str], Awaitable[None]],
+        fmt: str = "webm",
+        mime_type: str | None = None,
+        language_code: str | None = None,
+        model_id: str | None = None,
+        interval: float | None = None,
+        window_bytes: int | None = None,
+        max_passes: int | None = None,
+        max_bytes: int | None = None,
+    ):
+        settings = get_settings()
+        self._on_partial = on_partial
+        self._fmt = fmt
+        self._mime_type = mime_type
+        self._language_code = language_code
+        self._model_id = model_id
+        self._interval = (
+            settings.stt_partial_interval if interval is None else interval
+        )
+        self._window_bytes = max(1, (
+            settings.stt_partial_window_bytes if window_bytes is None else window_bytes
+        ))
+        self._max_passes = (
+            settings.stt_partial_max_passes if max_passes is None else max_passes
+        )
+        self._max_bytes = settings.transcribe_max_bytes if max_bytes is None else max_bytes
+        self._chunks: list[bytes] = []
+        self._size = 0
+        self._new_audio = asyncio.Event()
+        self._last_partial: Optional[tuple[int, str]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None and self._interval > 0 and self._max_passes > 0:
+            self._task = asyncio.create_task(self._partial_loop())
+
+    def feed(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        if self._size + len(chunk) > self._max_bytes:
+            raise ElevenLabsError(
+                f"Audio stream exceeds the {self._max_bytes} byte limit",
+                status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+            )
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+        self._new_audio.set()
+
+    async def finish(self) -> str:
+        await self.aclose()
+        if not self._size:
+            raise ElevenLabsError(
+                "Audio payload is empty",
+                status_code=HTTPStatus.BAD_REQUEST,
+            )
+
+        if self._last_partial and self._last_partial[0] == self._size:
+            return self._last_partial[1]
+
+        result = await self._transcribe(b"".join(self._chunks), use_cache=True)
+        return result["text"]
+
+    async def aclose(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _transcribe(self, audio: bytes, *, use_cache: bool) -> dict[str, str]:
+        return await transcribe_audio_bytes(
+            audio,
+            fmt=self._fmt,
+            mime_type=self._mime_type,
+            language_code=self._language_code,
+            model_id=self._model_id,
+            use_cache=use_cache,
+        )
+
+    def _window(self) -> bytes:
+        """The whole clip while it fits the window, else header chunk + tail."""
+        if self._size <= self._window_bytes:
+            return b"".join(self._chunks)
+        head = self._chunks[0]
+        tail: list[bytes] = []
+        budget = self._window_bytes - len(head)
+        for chunk in reversed(self._chunks[1:]):
+            if tail and len(chunk) > budget:
+                break
+            tail.append(chunk)
+            budget -= len(chunk)
+        tail.reverse()
+        return b"".join([head, *tail])
+
+    async def _partial_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        for _ in range(self._max_passes):
+            await self._new_audio.wait()
+            self._new_audio.clear()
+            started = loop.time()
+            size = self._size
+            audio = self._window()
+            try:
+                # Prefixes of a clip never repeat; keep them out of the cache.
+                result = await self._transcribe(audio, use_cache=False)
+            except ElevenLabsError as exc:
+                # Partials are best effort: a very short prefix or a window cut
+                # mid-frame may not decode, and the final pass reports real
+                # failures.
+                logger.debug("Partial transcription failed: %s", exc)
+            else:
+                if len(audio) == size:
+                    self._last_partial = (size, result["text"])
+                await self._on_partial(result["text"])
+            interval = self._interval * max(1.0, self._size / self._window_bytes)
+            await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+
+
+__all__ = ["IncrementalTranscriber"]
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any
+
+from ..config import get_settings
+from .cache import SharedCache, cache_backend
+from .cache_backends import CacheBackend, SQLiteCacheBackend
+
+
+def suggestion_cache_key(payload: dict[str, Any]) -> str:
+    """Content address of an OpenAI chat payload.
+
+    The payload already carries everything that determines the answer: the
+    model, temperature, system prompt and a user message built from the
+    current prompt and the feedback.
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _build_suggestion_cache() -> SharedCache:
+    """Suggestions share the node-wide backend unless they have their own file.
+
+    ``SUGGESTION_CACHE_PATH`` keeps suggestions across restarts even with
+    the in-memory backend; with ``CACHE_BACKEND=sqlite`` the shared file
+    already does that.
+    """
+    settings = get_settings()
+    backend: CacheBackend = cache_backend
+    if settings.suggestion_cache_path:
+        backend = SQLiteCacheBackend(settings.suggestion_cache_path)
+    return SharedCache(
+        "suggestions",
+        maxsize=settings.suggestion_cache_max_entries,
+        ttl=settings.suggestion_cache_ttl,
+        backend=backend,
+    )
+
+
+suggestion_cache = _build_suggestion_cache()
+
+
+__all__ = ["suggestion_cache", "suggestion_cache_key"]
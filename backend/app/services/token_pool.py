@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Tokens are handed out only while they have at least this long left.
+_EXPIRY_MARGIN_SECONDS = 10.0
+_RETRY_DELAY_SECONDS = 5.0
+
+
+def _jwt_expiry(token: Any) -> Optional[float]:
+    """Return the ``exp`` claim of a JWT as a wall-clock timestamp, if any."""
+    if not isinstance(token, str):
+        return None
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        padded = parts[1] + "=" * (-len(parts[1]) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, binascii.Error):
+        return None
+    exp = claims.get("exp") if isinstance(claims, dict) else None
+    return float(exp) if isinstance(exp, (int, float)) else None
+
+
+@dataclass
+class _PooledToken:
+    payload: dict[str, Any]
+    expires_at: float  # time.monotonic() deadline
+
+
+@dataclass
+class _AgentPool:
+    tokens: deque[_PooledToken] = field(default_factory=deque)
+    wake: asyncio.Event = field(default_factory=asyncio.Event)
+    hits: int = 0
+    misses: int = 0
+    evicted: int = 0
+    refills: int = 0
+    refill_errors: int = 0
+    refill_seconds_total: float = 0.0
+    refill_seconds_last: float = 0.0
+    refill_seconds_max: float = 0.0
+
+
+class ConversationTokenPool:
+    """Keep ``size`` pre-minted conversation tokens per agent.
+
+    A background task per agent tops the pool up whenever a token is taken
+    or goes stale. Expiry comes from the token's JWT ``exp`` claim when
+    present, capped by ``max_age`` seconds after minting.
+    """
+
+    def __init__(
+        self,
+        *,
+        mint: Callable[[str], Awaitable[dict[str, Any]]],
+        size: int,
+        max_age: float,
+    ):
+        self._mint = mint
+        self.size = size
+        self.max_age = max_age
+        self._pools: dict[str, _AgentPool] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self, agent_ids: list[str]) -> None:
+        if self.running or self.size <= 0:
+            return
+        for agent_id in dict.fromkeys(agent_ids):
+            pool = self._pools.setdefault(agent_id, _AgentPool())
+            self._tasks.append(
+                asyncio.create_task(self._refill_loop(agent_id, pool))
+            )
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for pool in self._pools.values():
+            pool.tokens.clear()
+
+    def take(self, agent_id: str) -> Optional[dict[str, Any]]:
+        pool = self._pools.get(agent_id)
+        if pool is None or not self.running:
+            return None
+
+        self._evict_stale(pool)
+        pool.wake.set()
+        if not pool.tokens:
+            pool.misses += 1
+            return None
+
+        pool.hits += 1
+        return pool.tokens.popleft().payload
+
+    def stats(self) -> dict[str, Any]:
+        agents: dict[str, Any] = {}
+        for agent_id, pool in self._pools.items():
+            lookups = pool.hits + pool.misses
+            agents[agent_id] = {
+                "available": len(pool.tokens),
+                "hits": pool.hits,
+                "misses": pool.misses,
+                "hit_rate": (pool.hits / lookups) if lookups else 0.0,
+                "evicted": pool.evicted,
+                "refills": pool.refills,
+                "refill_errors": pool.refill_errors,
+                "refill_latency_avg": (
+                    pool.refill_seconds_total / pool.refills if pool.refills else 0.0
+                ),
+                "refill_latency_last": pool.refill_seconds_last,
+                "refill_latency_max": pool.refill_seconds_max,
+            }
+        return {
+            "enabled": self.running,
+            "target_size": self.size,
+            "max_age_seconds": self.max_age,
+            "agents": agents,
+        }
+
+    def _expiry(self, payload: dict[str, Any]) -> float:
+        now = time.monotonic()
+        expires_at = now + self.max_age
+        jwt_exp = _jwt_expiry(payload.get("token"))
+        if jwt_exp is not None:
+            expires_at = min(expires_at, now + (jwt_exp - time.time()))
+        return expires_at - _EXPIRY_MARGIN_SECONDS
+
+    def _evict_stale(self, pool: _AgentPool) -> None:
+        now = time.monotonic()
+        fresh = [token for token in pool.tokens if token.expires_at > now]
+        pool.evicted += len(pool.tokens) - len(fresh)
+        pool.tokens = deque(fresh)
+
+    async def _refill_loop(self, agent_id: str, pool: _AgentPool) -> None:
+        while True:
+            self._evict_stale(pool)
+            if len(pool.tokens) < self.size:
+                started = time.monotonic()
+                try:
+                    payload = await self._mint(agent_id)
+                except Exception as exc:  # noqa: BLE001
+                    pool.refill_errors += 1
+                    logger.warning("Token pool refill for %s failed: %s", agent_id, exc)
+                    await asyncio.sleep(_RETRY_DELAY_SECONDS)
+                    continue
+
+                elapsed = time.monotonic() - started
+                pool.refills += 1
+                pool.refill_seconds_total += elapsed
+                pool.refill_seconds_last = elapsed
+                pool.refill_seconds_max = max(pool.refill_seconds_max, elapsed)
+
+                token = _PooledToken(payload=payload, expires_at=self._expiry(payload))
+                if token.expires_at > time.monotonic():
+                    pool.tokens.append(token)
+                else:
+                    pool.evicted += 1
+                    await asyncio.sleep(_RETRY_DELAY_SECONDS)
+                continue
+
+            # Full: sleep until a token is taken or the oldest one goes stale.
+            pool.wake.clear()
+            timeout = max(0.1, min(t.expires_at for t in pool.tokens) - time.monotonic())
+            try:
+                await asyncio.wait_for(pool.wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+__all__ = ["ConversationTokenPool"]
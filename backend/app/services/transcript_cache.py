@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import hashlib
+import sys
+from collections import OrderedDict
+from typing import Any, Optional
+
+from ..config import Settings, get_settings
+from .metrics import Counter, registry
+
+transcript_cache_lookups = registry.register(Counter(
+    "voice_test_transcript_cache_lookups_total",
+    "Speech-to-text cache lookups by result (hit or miss).",
+    ("result",),
+))
+
+
+def audio_hasher() -> hashlib.blake2b:
+    """Incremental hash used to identify an audio clip by content."""
+    return hashlib.blake2b(digest_size=16)
+
+
+def audio_digest(audio: bytes) -> str:
+    hasher = audio_hasher()
+    hasher.update(audio)
+    return hasher.hexdigest()
+
+
+def transcript_cache_key(digest: str, *, model_id: str, language_code: str | None) -> str:
+    return f"{digest}:{model_id}:{language_code or ''}"
+
+
+def _entry_size(key: str, value: dict[str, str]) -> int:
+    return sys.getsizeof(key) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+
+
+class TranscriptCache:
+    """LRU of transcripts bounded by entry count and by approximate memory.
+
+    Keys come from ``transcript_cache_key``: a blake2b digest of the audio
+    bytes plus the STT model and language, so a re-submitted recording is
+    answered without uploading it again.
+    """
+
+    def __init__(self, *, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: OrderedDict[str, tuple[int, dict[str, str]]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key: str) -> Optional[dict[str, str]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            transcript_cache_lookups.inc("miss")
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        transcript_cache_lookups.inc("hit")
+        return dict(entry[1])
+
+    def set(self, key: str, value: dict[str, str]) -> None:
+        if not self.enabled:
+            return
+
+        size = _entry_size(key, value)
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[0]
+        self._entries[key] = (size, dict(value))
+        self._bytes += size
+        self._evict()
+
+    def configure(self, *, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+def configure_transcript_cache(settings: Settings | None = None) -> None:
+    """Apply the current settings to ``transcript_cache``; called from the app lifespan."""
+    settings = settings or get_settings()
+    transcript_cache.configure(
+        max_entries=settings.transcript_cache_max_entries,
+        max_bytes=settings.transcript_cache_max_bytes,
+    )
+
+
+def _build_transcript_cache() -> TranscriptCache:
+    settings = get_settings()
+    return TranscriptCache(
+        max_entries=settings.transcript_cache_max_entries,
+        max_bytes=settings.transcript_cache_max_bytes,
+    )
+
+
+transcript_cache = _build_transcript_cache()
+
+
+__all__ = [
+    "TranscriptCache",
+    "audio_digest",
+    "audio_hasher",
+    "configure_transcript_cache",
+    "transcript_cache",
+    "transcript_cache_key",
+]
@@ -0,0 +1,50 @@
+"""Shared fixtures: the app in-process, talking to the bench's local fakes."""
+
+from __future__ import annotations
+
+import unittest
+import uuid
+
+import httpx
+
+from app.bench.fakes import FakeUpstreamConfig, FakeUpstreamServer
+from app.bench.runner import configure_environment
+
+
+def unique_agent_id() -> str:
+    # Caches are module-level singletons, so every test uses its own agent.
+    return f"test-{uuid.uuid4().hex[:12]}"
+
+
+class AppTestCase(unittest.IsolatedAsyncioTestCase):
+    """Runs ``create_app()`` with its lifespan against ``FakeUpstreamServer``.
+
+    ``self.client`` talks to the app; ``self.upstream`` talks to the fakes
+    directly, to change or inspect "ElevenLabs" behind the app's back.
+    """
+
+    upstream_config = FakeUpstreamConfig()
+    fakes: FakeUpstreamServer
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.fakes = FakeUpstreamServer(cls.upstream_config).start()
+        configure_environment(cls.fakes.base_url)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.fakes.stop()
+
+    async def asyncSetUp(self) -> None:
+        from app import create_app
+
+        self.app = create_app()
+        self._lifespan = self.app.router.lifespan_context(self.app)
+        await self._lifespan.__aenter__()
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app), base_url="http://test")
+        self.upstream = httpx.AsyncClient(base_url=self.fakes.base_url)
+
+    async def asyncTearDown(self) -> None:
+        await self.client.aclose()
+        await self.upstream.aclose()
+        await self._lifespan.__aexit__(None, None, None)
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import io
+import os
+import unittest
+import wave
+from typing import Any
+from unittest import mock
+
+from app.config import get_settings
+from app.services.audio_preprocess import (
+    numpy_available,
+    preprocess_outcomes,
+    preprocess_saved_bytes,
+    preprocess_wav,
+    synthetic_wav,
+)
+from app.services.elevenlabs import transcribe_audio_bytes
+from app.services.metrics import Counter, Histogram
+
+TARGET_RATE = 16_000
+
+
+def read_wav(data: bytes) -> tuple[int, int, int, float]:
+    """Channels, sample width, frame rate and duration in seconds."""
+    with wave.open(io.BytesIO(data)) as reader:
+        return (
+            reader.getnchannels(),
+            reader.getsampwidth(),
+            reader.getframerate(),
+            reader.getnframes() / reader.getframerate(),
+        )
+
+
+def metric_sample(metric: Counter | Histogram, line_prefix: str) -> float:
+    for line in metric.render():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def preprocess(data: bytes, **overrides: Any):
+    options = {"target_rate": TARGET_RATE, "silence_threshold_db": -45.0, "padding_ms": 200, **overrides}
+    return preprocess_wav(data, **options)
+
+
+@unittest.skipUnless(numpy_available(), "needs the audio extra (numpy)")
+class PreprocessWavTests(unittest.TestCase):
+    def test_stereo_is_downmixed_and_resampled(self) -> None:
+        result = preprocess(synthetic_wav(rate=48_000, channels=2))
+
+        self.assertIsNotNone(result)
+        self.assertEqual(read_wav(result.audio)[:3], (1, 2, TARGET_RATE))
+        self.assertEqual(result.sample_rate, TARGET_RATE)
+
+    def test_lower_rates_are_not_upsampled(self) -> None:
+        result = preprocess(synthetic_wav(rate=8_000, channels=2))
+
+        self.assertIsNotNone(result)
+        self.assertEqual(read_wav(result.audio)[2], 8_000)
+
+    def test_leading_and_trailing_silence_is_trimmed_to_the_padding(self) -> None:
+        # 1 s silence, 2 s tone, 1 s silence; 200 ms of padding is kept on each side.
+        result = preprocess(synthetic_wav(silence_seconds=1.0, tone_seconds=2.0), padding_ms=200)
+
+        self.assertIsNotNone(result)
+        self.assertAlmostEqual(read_wav(result.audio)[3], 2.4, delta=0.05)
+        self.assertAlmostEqual(result.trimmed_seconds, 1.6, delta=0.05)
+
+    def test_bytes_saved_is_the_size_difference(self) -> None:
+        original = synthetic_wav()
+        result = preprocess(original)
+
+        self.assertIsNotNone(result)
+        self.assertEqual(result.original_bytes, len(original))
+        self.assertEqual(result.bytes_saved, len(original) - len(result.audio))
+        self.assertGreater(result.bytes_saved, 0)
+
+    def test_all_silent_clip_is_left_alone(self) -> None:
+        self.assertIsNone(preprocess(synthetic_wav(tone_seconds=0.0)))
+
+    def test_non_wav_input_is_left_alone(self) -> None:
+        self.assertIsNone(preprocess(b"\x1aE\xdf\xa3 not a wav file"))
+
+    def test_non_pcm_sample_width_is_left_alone(self) -> None:
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as writer:
+            writer.setnchannels(1)
+            writer.setsampwidth(3)
+            writer.setframerate(48_000)
+            writer.writeframes(b"\x00\x10\x00" * 48_000)
+
+        self.assertIsNone(preprocess(buffer.getvalue()))
+
+    def test_clip_that_would_not_shrink_is_left_alone(self) -> None:
+        already_small = preprocess(synthetic_wav(rate=TARGET_RATE, channels=1, silence_seconds=0.0))
+
+        self.assertIsNone(already_small)
+
+
+@unittest.skipUnless(numpy_available(), "needs the audio extra (numpy)")
+class TranscribePreprocessingTests(unittest.IsolatedAsyncioTestCase):
+    """``AUDIO_PREPROCESS`` on the upload path, with the upstream call captured."""
+
+    async def asyncSetUp(self) -> None:
+        self.uploads: list[bytes] = []
+
+        async def request_json(method: str, path: str, **kwargs: Any) -> dict[str, str]:
+            self.uploads.append(kwargs["files"]["file"][1])
+            return {"text": "ok"}
+
+        patches = [
+            mock.patch.dict(os.environ, {"AUDIO_PREPROCESS": "true"}),
+            mock.patch("app.services.elevenlabs._request_json", request_json),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        get_settings.cache_clear()
+        self.addCleanup(get_settings.cache_clear)
+
+    async def test_wav_upload_is_preprocessed_and_savings_are_reported(self) -> None:
+        original = synthetic_wav()
+        saved_before = metric_sample(preprocess_saved_bytes, "voice_test_audio_preprocess_saved_bytes_sum")
+        applied_before = metric_sample(preprocess_outcomes, 'voice_test_audio_preprocess_total{outcome="applied"}')
+
+        await transcribe_audio_bytes(original, fmt="wav", use_cache=False)
+
+        (upload,) = self.uploads
+        self.assertEqual(read_wav(upload)[:3], (1, 2, TARGET_RATE))
+        self.assertEqual(
+            metric_sample(preprocess_saved_bytes, "voice_test_audio_preprocess_saved_bytes_sum") - saved_before,
+            len(original) - len(upload),
+        )
+        self.assertEqual(
+            metric_sample(preprocess_outcomes, 'voice_test_audio_preprocess_total{outcome="applied"}'),
+            applied_before + 1,
+        )
+
+    async def test_other_formats_are_uploaded_unchanged(self) -> None:
+        webm = b"\x1aE\xdf\xa3" + bytes(4096)
+
+        await transcribe_audio_bytes(webm, fmt="webm", use_cache=False)
+
+        self.assertEqual(self.uploads, [webm])
+
+    async def test_silent_wav_is_uploaded_unchanged(self) -> None:
+        silent = synthetic_wav(tone_seconds=0.0)
+
+        await transcribe_audio_bytes(silent, fmt="wav", use_cache=False)
+
+        self.assertEqual(self.uploads, [silent])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import base64
+import unittest
+
+from app.bench.runner import BenchConfig, build_scenarios
+
+
+class BenchScenarioTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.config = BenchConfig()
+        self.scenarios = {scenario.name: scenario for scenario in build_scenarios(self.config)}
+
+    def clip(self, name: str, i: int) -> bytes:
+        return base64.b64decode(self.scenarios[name].build(i)["json"]["audio"])
+
+    def test_transcribe_uploads_a_new_clip_per_request(self) -> None:
+        clips = {self.clip("transcribe", i) for i in range(50)}
+
+        self.assertEqual(len(clips), 50)
+        self.assertEqual({len(clip) for clip in clips}, {self.config.audio_bytes})
+
+    def test_transcribe_cached_repeats_one_clip(self) -> None:
+        self.assertEqual(self.clip("transcribe_cached", 0), self.clip("transcribe_cached", 7))
+
+
+if __name__ == "__main__":
+    unittest.main()
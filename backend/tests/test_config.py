@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from app.config import get_settings
+
+
+class PromptHistorySettingsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        get_settings.cache_clear()
+        self.addCleanup(get_settings.cache_clear)
+
+    def test_history_is_off_without_a_path(self) -> None:
+        for value in (None, ""):
+            with self.subTest(value=value):
+                environment = {k: v for k, v in os.environ.items() if k != "PROMPT_HISTORY_PATH"}
+                if value is not None:
+                    environment["PROMPT_HISTORY_PATH"] = value
+                with mock.patch.dict(os.environ, environment, clear=True):
+                    get_settings.cache_clear()
+                    self.assertIsNone(get_settings().prompt_history_path)
+
+    def test_history_uses_the_configured_path(self) -> None:
+        with mock.patch.dict(os.environ, {"PROMPT_HISTORY_PATH": "/tmp/history.sqlite3"}):
+            self.assertEqual(get_settings().prompt_history_path, "/tmp/history.sqlite3")
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+class SettingsAppliedAtStartupTests(unittest.IsolatedAsyncioTestCase):
+    """Services built at import time pick up settings changed before startup."""
+
+    async def asyncSetUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.history_path = os.path.join(directory.name, "history.sqlite3")
+
+    async def test_lifespan_applies_the_current_settings(self) -> None:
+        from app import create_app
+        from app.services.cache import agent_config_cache
+        from app.services.prompt_history import prompt_history
+        from app.services.transcript_cache import transcript_cache
+
+        environment = {
+            "PROMPT_HISTORY_PATH": self.history_path,
+            "AGENT_CACHE_TTL": "7",
+            "TRANSCRIPT_CACHE_MAX_ENTRIES": "3",
+        }
+        with mock.patch.dict(os.environ, environment):
+            get_settings.cache_clear()
+            app = create_app()
+            async with app.router.lifespan_context(app):
+                self.assertEqual(prompt_history.path, self.history_path)
+                self.assertEqual(agent_config_cache.stats()["ttl_seconds"], 7)
+                self.assertEqual(transcript_cache.max_entries, 3)
+
+        get_settings.cache_clear()
+        app = create_app()
+        async with app.router.lifespan_context(app):
+            self.assertNotEqual(prompt_history.path, self.history_path)
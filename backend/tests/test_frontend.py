@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import httpx
+
+from tests.support import AppTestCase
+
+INDEX = b"<!doctype html><div id=root></div>"
+SCRIPT = b"console.log('app');" * 64
+
+
+class FrontendFallbackTests(AppTestCase):
+    """The app with a frontend build mounted at ``/``."""
+
+    async def asyncSetUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        root = Path(directory.name)
+        (root / "index.html").write_bytes(INDEX)
+        (root / "assets").mkdir()
+        (root / "assets" / "app.js").write_bytes(SCRIPT)
+        (root / "assets" / "app.js.br").write_bytes(b"br-" + SCRIPT)
+        (root / "assets" / "app.js.gz").write_bytes(b"gz-" + SCRIPT)
+        with mock.patch("app.FRONTEND_DIST", Path(directory.name)):
+            await super().asyncSetUp()
+
+    async def test_client_side_route_gets_the_app_shell(self) -> None:
+        response = await self.client.get("/agents/settings")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, INDEX)
+
+    async def test_unknown_api_path_is_a_json_404(self) -> None:
+        for method, path in (("GET", "/api/does-not-exist"), ("POST", "/api/does-not-exist"), ("GET", "/api")):
+            with self.subTest(method=method, path=path):
+                response = await self.client.request(method, path)
+
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.headers["content-type"], "application/json")
+                self.assertEqual(response.json(), {"detail": "Not Found"})
+
+    async def test_backend_routes_are_still_served(self) -> None:
+        response = await self.client.get("/health")
+
+        self.assertEqual(response.json(), {"status": "ok"})
+
+    async def get_script(self, encoding: str, **headers: str) -> httpx.Response:
+        # HEAD: the compressed siblings here are not real br/gzip for httpx to decode.
+        method = "GET" if encoding == "identity" else "HEAD"
+        return await self.client.request(
+            method, "/assets/app.js", headers={"Accept-Encoding": encoding, **headers}
+        )
+
+    async def test_each_encoding_has_its_own_etag(self) -> None:
+        responses = {encoding: await self.get_script(encoding) for encoding in ("br", "gzip", "identity")}
+
+        self.assertEqual(responses["br"].headers["content-encoding"], "br")
+        self.assertEqual(len({response.headers["etag"] for response in responses.values()}), 3)
+
+    async def test_if_none_match_compares_against_the_negotiated_variant(self) -> None:
+        br_etag = (await self.get_script("br")).headers["etag"]
+
+        self.assertEqual((await self.get_script("br", **{"If-None-Match": br_etag})).status_code, 304)
+        refetched = await self.get_script("identity", **{"If-None-Match": br_etag})
+        self.assertEqual(refetched.status_code, 200)
+        self.assertEqual(refetched.content, SCRIPT)
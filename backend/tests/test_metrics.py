@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import unittest
+from types import SimpleNamespace
+
+from app.services.metrics import route_label
+
+from tests.support import AppTestCase, unique_agent_id
+
+
+class RouteLabelTests(AppTestCase):
+    async def test_api_routes_are_labelled_with_their_full_path(self) -> None:
+        agent_id = unique_agent_id()
+        response = await self.client.get("/api/elevenlabs/prompt", params={"agent_id": agent_id})
+        self.assertEqual(response.status_code, 200)
+
+        metrics = (await self.client.get("/metrics")).text
+
+        self.assertIn('route="/api/elevenlabs/prompt",method="GET",status="200"', metrics)
+        self.assertNotIn('route="/elevenlabs/prompt"', metrics)
+        self.assertNotIn(agent_id, metrics)
+
+
+class MountedRouteLabelTests(unittest.TestCase):
+    def test_mount_prefix_is_kept(self) -> None:
+        scope = {"route": SimpleNamespace(path="/items/{id}"), "root_path": "/proxy/sub", "app_root_path": "/proxy"}
+
+        self.assertEqual(route_label(scope), "/sub/items/{id}")
+
+    def test_server_root_path_is_not_part_of_the_label(self) -> None:
+        scope = {"route": SimpleNamespace(path="/health"), "root_path": "/proxy"}
+
+        self.assertEqual(route_label(scope), "/health")
+
+    def test_unrouted_requests_are_other(self) -> None:
+        self.assertEqual(route_label({"root_path": ""}), "other")
+
+
+if __name__ == "__main__":
+    unittest.main()
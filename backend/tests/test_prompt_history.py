@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from tests.support import AppTestCase, unique_agent_id
+
+
+class PromptHistoryTests(AppTestCase):
+    async def history(self, agent_id: str) -> list[tuple[str, str]]:
+        listed = await self.client.get("/api/elevenlabs/prompt/history", params={"agent_id": agent_id})
+        self.assertEqual(listed.status_code, 200)
+        history = []
+        for summary in reversed(listed.json()["revisions"]):
+            revision = await self.client.get(
+                f"/api/elevenlabs/prompt/history/{summary['revision']}", params={"agent_id": agent_id}
+            )
+            history.append((summary["source"], revision.json()["prompt"]))
+        return history
+
+    async def test_if_match_save_records_the_version_it_replaced(self) -> None:
+        agent_id = unique_agent_id()
+        loaded = await self.client.get("/api/elevenlabs/prompt", params={"agent_id": agent_id})
+
+        await self.client.put(
+            "/api/elevenlabs/prompt",
+            json={"prompt": "My edit", "agent_id": agent_id},
+            headers={"If-Match": loaded.headers["etag"]},
+        )
+
+        self.assertEqual(await self.history(agent_id), [("upstream", loaded.json()["prompt"]), ("save", "My edit")])
+
+    async def test_cached_copy_is_never_recorded_as_the_upstream_version(self) -> None:
+        agent_id = unique_agent_id()
+        await self.client.get("/api/elevenlabs/prompt", params={"agent_id": agent_id})
+        # The cached copy is now stale; it was never the version just before the save.
+        await self.upstream.patch(
+            f"/v1/convai/agents/{agent_id}",
+            json={"conversation_config": {"agent": {"prompt": {"prompt": "changed elsewhere"}}}},
+        )
+
+        await self.client.put("/api/elevenlabs/prompt", json={"prompt": "My edit", "agent_id": agent_id})
+
+        self.assertEqual(await self.history(agent_id), [("save", "My edit")])
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from tests.support import AppTestCase, unique_agent_id
+
+
+class PromptSaveTests(AppTestCase):
+    async def upstream_prompt(self, agent_id: str) -> str:
+        response = await self.upstream.get(f"/v1/convai/agents/{agent_id}")
+        return response.json()["conversation_config"]["agent"]["prompt"]["prompt"]
+
+    async def test_save_reaches_upstream_when_the_cache_is_stale(self) -> None:
+        agent_id = unique_agent_id()
+        loaded = await self.client.get("/api/elevenlabs/prompt", params={"agent_id": agent_id})
+        original = loaded.json()["prompt"]
+
+        # Someone edits the agent on ElevenLabs; the app's cached copy is now stale.
+        await self.upstream.patch(
+            f"/v1/convai/agents/{agent_id}",
+            json={"conversation_config": {"agent": {"prompt": {"prompt": "changed elsewhere"}}}},
+        )
+
+        saved = await self.client.put(
+            "/api/elevenlabs/prompt", json={"prompt": original, "agent_id": agent_id}
+        )
+
+        self.assertEqual(saved.status_code, 200)
+        self.assertEqual(saved.json()["prompt"], original)
+        self.assertEqual(await self.upstream_prompt(agent_id), original)
+
+    async def test_save_sends_the_first_message_when_given(self) -> None:
+        agent_id = unique_agent_id()
+        await self.client.get("/api/elevenlabs/prompt", params={"agent_id": agent_id})
+
+        saved = await self.client.put(
+            "/api/elevenlabs/prompt",
+            json={"prompt": "New prompt", "first_message": "Hi there", "agent_id": agent_id},
+        )
+
+        self.assertEqual(saved.status_code, 200)
+        agent = (await self.upstream.get(f"/v1/convai/agents/{agent_id}")).json()
+        self.assertEqual(agent["conversation_config"]["agent"]["first_message"], "Hi there")
+        self.assertEqual(await self.upstream_prompt(agent_id), "New prompt")
+
+    async def test_if_match_is_checked_against_upstream_not_the_cache(self) -> None:
+        agent_id = unique_agent_id()
+        loaded = await self.client.get("/api/elevenlabs/prompt", params={"agent_id": agent_id})
+        etag = loaded.headers["etag"]
+
+        # Edited elsewhere after the ETag was handed out; the cache still matches it.
+        await self.upstream.patch(
+            f"/v1/convai/agents/{agent_id}",
+            json={"conversation_config": {"agent": {"prompt": {"prompt": "changed elsewhere"}}}},
+        )
+
+        saved = await self.client.put(
+            "/api/elevenlabs/prompt",
+            json={"prompt": "My edit", "agent_id": agent_id},
+            headers={"If-Match": etag},
+        )
+
+        self.assertEqual(saved.status_code, 412)
+        self.assertEqual(await self.upstream_prompt(agent_id), "changed elsewhere")
+
+    async def test_if_match_save_succeeds_when_upstream_is_unchanged(self) -> None:
+        agent_id = unique_agent_id()
+        loaded = await self.client.get("/api/elevenlabs/prompt", params={"agent_id": agent_id})
+
+        saved = await self.client.put(
+            "/api/elevenlabs/prompt",
+            json={"prompt": "My edit", "agent_id": agent_id},
+            headers={"If-Match": loaded.headers["etag"]},
+        )
+
+        self.assertEqual(saved.status_code, 200)
+        self.assertEqual(await self.upstream_prompt(agent_id), "My edit")
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from unittest import mock
+
+from app.services.streaming_stt import IncrementalTranscriber
+
+CHUNK = 4096
+WINDOW = 8 * CHUNK
+
+
+class PartialTranscriptionTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.uploads: list[tuple[int, bool]] = []
+
+        async def transcribe(audio: bytes, *, use_cache: bool, **_: object) -> dict[str, str]:
+            self.uploads.append((len(audio), use_cache))
+            await asyncio.sleep(0)
+            return {"text": f"{len(audio)} bytes"}
+
+        patcher = mock.patch("app.services.streaming_stt.transcribe_audio_bytes", transcribe)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.partials: list[str] = []
+
+    async def on_partial(self, text: str) -> None:
+        self.partials.append(text)
+
+    async def stream(self, transcriber: IncrementalTranscriber, chunks: int) -> str:
+        transcriber.start()
+        for index in range(chunks):
+            transcriber.feed(bytes([index % 256]) * CHUNK)
+            await asyncio.sleep(0.002)
+        return await transcriber.finish()
+
+    async def test_long_clip_partials_stay_bounded(self) -> None:
+        chunks = 300
+        transcriber = IncrementalTranscriber(
+            on_partial=self.on_partial, interval=0.005, window_bytes=WINDOW, max_passes=12
+        )
+        final = await self.stream(transcriber, chunks)
+
+        *partials, last = self.uploads
+        self.assertTrue(partials)
+        self.assertLessEqual(len(partials), 12)
+        self.assertTrue(all(size <= WINDOW and not cached for size, cached in partials))
+        self.assertEqual(last, (chunks * CHUNK, True))
+        self.assertEqual(final, f"{chunks * CHUNK} bytes")
+
+    async def test_final_reuses_a_partial_that_covered_the_clip(self) -> None:
+        transcriber = IncrementalTranscriber(
+            on_partial=self.on_partial, interval=0.001, window_bytes=WINDOW, max_passes=5
+        )
+        transcriber.start()
+        transcriber.feed(b"\0" * CHUNK)
+        for _ in range(50):
+            if self.partials:
+                break
+            await asyncio.sleep(0.002)
+
+        self.assertEqual(await transcriber.finish(), f"{CHUNK} bytes")
+        self.assertEqual(self.uploads, [(CHUNK, False)])
+
+
+if __name__ == "__main__":
+    unittest.main()
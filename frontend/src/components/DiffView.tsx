@@ -1,22 +1,86 @@
-import { Change } from "diff";
+import { DiffHunk } from "../utils/diff";
 
 type DiffViewProps = {
-  parts: Change[];
+  hunks: DiffHunk[];
 };
 
-export const DiffView = ({ parts }: DiffViewProps) => (
-  <div className="diff">
-    {parts.map((part, index) => {
-      const className = part.added
-        ? "diff-line diff-line--added"
-        : part.removed
-          ? "diff-line diff-line--removed"
-          : "diff-line";
+const WordSegments = ({
+  words,
+  side,
+}: {
+  words: NonNullable<DiffHunk["words"]>;
+  side: "delete" | "insert";
+}) => (
+  <>
+    {words.map(([op, text], index) => {
+      if (op === "equal") {
+        return <span key={index}>{text}</span>;
+      }
+      if (op !== side) {
+        return null;
+      }
+      const className =
+        op === "insert" ? "diff-word diff-word--added" : "diff-word diff-word--removed";
       return (
-        <pre key={index} className={className}>
-          {part.value}
-        </pre>
+        <span key={index} className={className}>
+          {text}
+        </span>
       );
     })}
+  </>
+);
+
+// Hunks come precomputed from the backend; this only renders them.
+export const DiffView = ({ hunks }: DiffViewProps) => (
+  <div className="diff">
+    {hunks.map((hunk, index) => {
+      switch (hunk.op) {
+        case "equal":
+          return (
+            <pre key={index} className="diff-line">
+              {hunk.text}
+            </pre>
+          );
+        case "skip":
+          return (
+            <pre key={index} className="diff-line diff-line--skipped">
+              … {hunk.base_count} unchanged lines …
+            </pre>
+          );
+        case "delete":
+          return (
+            <pre key={index} className="diff-line diff-line--removed">
+              {hunk.removed}
+            </pre>
+          );
+        case "insert":
+          return (
+            <pre key={index} className="diff-line diff-line--added">
+              {hunk.added}
+            </pre>
+          );
+        case "replace":
+          return (
+            <div key={index}>
+              <pre className="diff-line diff-line--removed">
+                {hunk.words ? (
+                  <WordSegments words={hunk.words} side="delete" />
+                ) : (
+                  hunk.removed
+                )}
+              </pre>
+              <pre className="diff-line diff-line--added">
+                {hunk.words ? (
+                  <WordSegments words={hunk.words} side="insert" />
+                ) : (
+                  hunk.added
+                )}
+              </pre>
+            </div>
+          );
+        default:
+          return null;
+      }
+    })}
   </div>
 );
@@ -12,6 +12,7 @@ type RecorderControls = {
   isRecording: boolean;
   showStopIcon: boolean;
   recordingError: string | null;
+  partialTranscript: string;
   waveformRef: RefObject<HTMLSpanElement | null>;
   onToggleRecording: () => void;
 };
@@ -30,8 +31,14 @@ export const EditPanel = ({
   prompt,
   recorderControls,
 }: EditPanelProps) => {
-  const { isRecording, showStopIcon, recordingError, waveformRef, onToggleRecording } =
-    recorderControls;
+  const {
+    isRecording,
+    showStopIcon,
+    recordingError,
+    partialTranscript,
+    waveformRef,
+    onToggleRecording,
+  } = recorderControls;
   const { state, actions } = prompt;
   const {
     editStage,
@@ -40,8 +47,9 @@ export const EditPanel = ({
     isPromptLoading,
     isPromptSaving,
     suggestError,
-    diffParts,
+    diffHunks,
     suggestedPrompt,
+    streamingSuggestion,
     manualPrompt,
     isManualStage,
     firstMessageExpanded,
@@ -130,6 +138,11 @@ export const EditPanel = ({
               </button>
             </div>
           </div>
+          {isRecording && partialTranscript && (
+            <p className="prompt-input__partial" aria-live="polite">
+              {partialTranscript}
+            </p>
+          )}
           {recordingError && (
             <div className="panel__error" role="alert">
               {recordingError}
@@ -155,11 +168,19 @@ export const EditPanel = ({
         </section>
       )}
 
-      {editStage === "loading" && (
-        <section className="prompt-block loading">
-          <span className="label">Generating suggestion…</span>
-        </section>
-      )}
+      {editStage === "loading" &&
+        (streamingSuggestion ? (
+          <section className="prompt-block">
+            <span className="label">Generating suggestion…</span>
+            <pre className="suggestion-stream" aria-live="polite">
+              {streamingSuggestion}
+            </pre>
+          </section>
+        ) : (
+          <section className="prompt-block loading">
+            <span className="label">Generating suggestion…</span>
+          </section>
+        ))}
 
       {editStage === "result" && suggestedPrompt && (
         <section className="prompt-block">
@@ -174,7 +195,7 @@ export const EditPanel = ({
               <Edit3 size={16} />
             </button>
           </div>
-          <DiffView parts={diffParts} />
+          <DiffView hunks={diffHunks} />
           <div className="prompt-actions">
             <button
               type="button"
@@ -12,6 +12,7 @@ export const EditPanelContainer = () => {
         isRecording: recorder.isRecording,
         showStopIcon: recorder.showStopIcon,
         recordingError: recorder.recordingError,
+        partialTranscript: recorder.partialTranscript,
         waveformRef: recorder.waveformRef,
         onToggleRecording: () => {
           void recorder.toggleRecording();
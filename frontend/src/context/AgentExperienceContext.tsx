@@ -48,6 +48,7 @@ export type RecorderView = {
   isRecording: boolean;
   showStopIcon: boolean;
   recordingError: string | null;
+  partialTranscript: string;
   waveformRef: RefObject<HTMLSpanElement | null>;
   toggleRecording: () => Promise<void>;
 };
@@ -82,6 +83,7 @@ export const AgentExperienceProvider = ({
     isRecording,
     showStopIcon,
     recordingError,
+    partialTranscript,
     waveformRef,
     toggleRecording,
     reset: resetRecorder,
@@ -185,10 +187,18 @@ export const AgentExperienceProvider = ({
       isRecording,
       showStopIcon,
       recordingError,
+      partialTranscript,
       waveformRef,
       toggleRecording,
     }),
-    [isRecording, recordingError, showStopIcon, toggleRecording, waveformRef],
+    [
+      isRecording,
+      partialTranscript,
+      recordingError,
+      showStopIcon,
+      toggleRecording,
+      waveformRef,
+    ],
   );
 
   const agentConfigView = useAgentConfigControls({
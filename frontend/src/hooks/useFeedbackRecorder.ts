@@ -1,17 +1,86 @@
 import { useCallback, useEffect, useRef, useState } from "react";
-import { arrayBufferToBase64 } from "../utils/audio";
-import { buildEndpointUrl } from "../utils/api";
+import { buildEndpointUrl, buildWebSocketUrl } from "../utils/api";
 
 type UseFeedbackRecorderOptions = {
   onTranscript: (text: string) => void;
 };
 
+type LiveTranscription = {
+  socket: WebSocket;
+  result: Promise<string>;
+};
+
+type LiveTranscriptEvent = {
+  type: "partial" | "final" | "error";
+  text?: string;
+  detail?: string;
+};
+
+// MediaRecorder timeslice; each slice is streamed to the server as it lands.
+const RECORDER_TIMESLICE_MS = 250;
+
+const openLiveTranscription = (
+  onPartial: (text: string) => void,
+  getPendingChunks: () => BlobPart[],
+): LiveTranscription => {
+  const socket = new WebSocket(
+    buildWebSocketUrl("/api/elevenlabs/transcribe/ws?format=webm"),
+  );
+
+  socket.addEventListener("open", () => {
+    getPendingChunks().forEach((chunk) => socket.send(chunk));
+  });
+
+  const result = new Promise<string>((resolve, reject) => {
+    socket.addEventListener("message", (event) => {
+      if (typeof event.data !== "string") {
+        return;
+      }
+      const payload = JSON.parse(event.data) as LiveTranscriptEvent;
+      if (payload.type === "partial" && payload.text) {
+        onPartial(payload.text);
+      } else if (payload.type === "final") {
+        resolve(payload.text ?? "");
+      } else if (payload.type === "error") {
+        reject(new Error(payload.detail || "Failed to transcribe audio."));
+      }
+    });
+    socket.addEventListener("close", () => {
+      reject(new Error("Live transcription connection closed."));
+    });
+  });
+  // Rejections are only observed once recording stops.
+  result.catch(() => undefined);
+
+  return { socket, result };
+};
+
+const uploadRecording = async (blob: Blob) => {
+  const response = await fetch(
+    buildEndpointUrl("/api/elevenlabs/transcribe/stream?format=webm"),
+    {
+      method: "POST",
+      headers: { "Content-Type": blob.type },
+      body: blob,
+    },
+  );
+
+  if (!response.ok) {
+    const detail = await response.text();
+    throw new Error(detail || "Failed to transcribe audio.");
+  }
+
+  const payload = (await response.json()) as { text: string };
+  return payload.text;
+};
+
 export const useFeedbackRecorder = ({
   onTranscript,
 }: UseFeedbackRecorderOptions) => {
   const [isRecording, setIsRecording] = useState(false);
   const [showStopIcon, setShowStopIcon] = useState(false);
   const [recordingError, setRecordingError] = useState<string | null>(null);
+  const [partialTranscript, setPartialTranscript] = useState("");
 
   const mediaRecorderRef = useRef<MediaRecorder | null>(null);
   const recordedChunksRef = useRef<BlobPart[]>([]);
@@ -20,6 +89,12 @@ export const useFeedbackRecorder = ({
   const audioContextRef = useRef<AudioContext | null>(null);
   const waveformRef = useRef<HTMLSpanElement | null>(null);
   const skipTranscriptionRef = useRef(false);
+  const liveTranscriptionRef = useRef<LiveTranscription | null>(null);
+
+  const closeLiveTranscription = useCallback(() => {
+    liveTranscriptionRef.current?.socket.close();
+    liveTranscriptionRef.current = null;
+  }, []);
 
   const reset = useCallback(() => {
     if (mediaRecorderRef.current) {
@@ -48,12 +123,14 @@ export const useFeedbackRecorder = ({
       audioContextRef.current = null;
     }
 
+    closeLiveTranscription();
     waveformRef.current?.style.setProperty("--waveform-scale", "0");
     recordedChunksRef.current = [];
     setIsRecording(false);
     setShowStopIcon(false);
     setRecordingError(null);
-  }, []);
+    setPartialTranscript("");
+  }, [closeLiveTranscription]);
 
   useEffect(
     () => () => {
@@ -110,28 +187,22 @@ export const useFeedbackRecorder = ({
         const blob = new Blob(recordedChunksRef.current, {
           type: "audio/webm",
         });
-        const arrayBuffer = await blob.arrayBuffer();
-        const base64Audio = arrayBufferToBase64(arrayBuffer);
-
-        const response = await fetch(
-          buildEndpointUrl("/api/elevenlabs/transcribe"),
-          {
-            method: "POST",
-            headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({
-              audio: base64Audio,
-              format: "webm",
-            }),
-          },
-        );
 
-        if (!response.ok) {
-          const detail = await response.text();
-          throw new Error(detail || "Failed to transcribe audio.");
+        let transcript: string | null = null;
+        const live = liveTranscriptionRef.current;
+        if (live && live.socket.readyState === WebSocket.OPEN) {
+          live.socket.send(JSON.stringify({ type: "stop" }));
+          try {
+            transcript = await live.result;
+          } catch {
+            // Fall back to uploading the whole clip below.
+          }
+        }
+        if (transcript === null) {
+          transcript = await uploadRecording(blob);
         }
 
-        const payload = (await response.json()) as { text: string };
-        const transcript = payload.text.trim();
+        transcript = transcript.trim();
         if (transcript) {
           onTranscript(transcript);
         }
@@ -144,9 +215,11 @@ export const useFeedbackRecorder = ({
       }
     }
 
+    closeLiveTranscription();
+    setPartialTranscript("");
     recordedChunksRef.current = [];
     mediaRecorderRef.current = null;
-  }, [onTranscript]);
+  }, [closeLiveTranscription, onTranscript]);
 
   const toggleRecording = useCallback(async () => {
     if (isRecording) {
@@ -180,6 +253,10 @@ export const useFeedbackRecorder = ({
       recorder.addEventListener("dataavailable", (event) => {
         if (event.data.size > 0) {
           recordedChunksRef.current.push(event.data);
+          const socket = liveTranscriptionRef.current?.socket;
+          if (socket?.readyState === WebSocket.OPEN) {
+            socket.send(event.data);
+          }
         }
       });
 
@@ -196,7 +273,13 @@ export const useFeedbackRecorder = ({
         animationFrameRef.current = requestAnimationFrame(renderWaveform);
       });
 
-      recorder.start();
+      setPartialTranscript("");
+      liveTranscriptionRef.current = openLiveTranscription(
+        setPartialTranscript,
+        () => recordedChunksRef.current,
+      );
+
+      recorder.start(RECORDER_TIMESLICE_MS);
       skipTranscriptionRef.current = false;
       setIsRecording(true);
       setShowStopIcon(false);
@@ -212,6 +295,7 @@ export const useFeedbackRecorder = ({
     isRecording,
     showStopIcon,
     recordingError,
+    partialTranscript,
     waveformRef,
     toggleRecording,
     reset,
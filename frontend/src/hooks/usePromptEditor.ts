@@ -1,17 +1,26 @@
-import { Change, diffLines } from "diff";
 import {
   Dispatch,
   SetStateAction,
   useCallback,
   useEffect,
   useMemo,
+  useRef,
   useState,
 } from "react";
-import { buildEndpointUrl } from "../utils/api";
+import { buildEndpointUrl, readServerSentEvents } from "../utils/api";
+import { DiffHunk, PromptDiff, fetchPromptDiff } from "../utils/diff";
 import { stripCodeFence } from "../utils/text";
 
 export type EditStage = "input" | "loading" | "result" | "manual";
 
+type PromptSuggestionPayload = {
+  agent_id?: string | null;
+  display_name?: string | null;
+  current_prompt: string;
+  suggested_prompt: string;
+  diff?: PromptDiff | null;
+};
+
 type UsePromptEditorArgs = {
   effectiveAgentId: string | null;
   resetRecorder: () => void;
@@ -31,8 +40,9 @@ export type PromptEditorState = {
   firstMessageDraft: string;
   feedback: string;
   suggestedPrompt: string | null;
+  streamingSuggestion: string;
   manualPrompt: string | null;
-  diffParts: Change[];
+  diffHunks: DiffHunk[];
   editStage: EditStage;
   firstMessageExpanded: boolean;
   promptError: string | null;
@@ -80,8 +90,9 @@ export const usePromptEditor = ({
   const [feedback, setFeedback] = useState("");
 
   const [suggestedPrompt, setSuggestedPrompt] = useState<string | null>(null);
+  const [streamingSuggestion, setStreamingSuggestion] = useState("");
   const [manualPrompt, setManualPrompt] = useState<string | null>(null);
-  const [diffParts, setDiffParts] = useState<Change[]>([]);
+  const [diffHunks, setDiffHunks] = useState<DiffHunk[]>([]);
   const [editStage, setEditStage] = useState<EditStage>("input");
   const [firstMessageExpanded, setFirstMessageExpanded] = useState(false);
 
@@ -95,12 +106,15 @@ export const usePromptEditor = ({
 
   const [currentAgentId, setCurrentAgentId] = useState<string | null>(null);
   const [currentAgentName, setCurrentAgentName] = useState<string | null>(null);
+  // ETag of the prompt as last loaded/saved; sent as If-Match so a save
+  // fails with 412 instead of overwriting someone else's edit.
+  const promptEtagRef = useRef<string | null>(null);
 
   const resetSuggestionState = useCallback(() => {
     resetRecorder();
     setSuggestedPrompt(null);
     setManualPrompt(null);
-    setDiffParts([]);
+    setDiffHunks([]);
     setSuggestError(null);
     setFeedback("");
   }, [resetRecorder]);
@@ -129,6 +143,9 @@ export const usePromptEditor = ({
           const detail = await response.text();
           throw new Error(detail || "Failed to fetch agent prompt.");
         }
+        if (!cancelled) {
+          promptEtagRef.current = response.headers.get("ETag");
+        }
 
         const data = (await response.json()) as {
           agent_id?: string | null;
@@ -238,13 +255,14 @@ export const usePromptEditor = ({
     setIsSuggesting(true);
     try {
       const response = await fetch(
-        buildEndpointUrl("/api/elevenlabs/prompt/suggest"),
+        buildEndpointUrl("/api/elevenlabs/prompt/suggest/stream"),
         {
           method: "POST",
           headers: { "Content-Type": "application/json" },
           body: JSON.stringify({
             feedback,
             agent_id: effectiveAgentId ?? undefined,
+            include_diff: true,
           }),
         },
       );
@@ -254,12 +272,23 @@ export const usePromptEditor = ({
         throw new Error(detail || "Failed to generate suggestion.");
       }
 
-      const data = (await response.json()) as {
-        agent_id?: string | null;
-        display_name?: string | null;
-        current_prompt: string;
-        suggested_prompt: string;
-      };
+      let data: PromptSuggestionPayload | null = null;
+      let streamed = "";
+      for await (const event of readServerSentEvents(response)) {
+        if (event.event === "token") {
+          streamed += (JSON.parse(event.data) as { text: string }).text;
+          setStreamingSuggestion(streamed);
+        } else if (event.event === "done") {
+          data = JSON.parse(event.data) as PromptSuggestionPayload;
+        } else if (event.event === "error") {
+          const payload = JSON.parse(event.data) as { detail?: string };
+          throw new Error(payload.detail || "Failed to generate suggestion.");
+        }
+      }
+
+      if (!data) {
+        throw new Error("Suggestion stream ended before completing.");
+      }
 
       const basePrompt = stripCodeFence(data.current_prompt);
       const revisedPrompt = stripCodeFence(data.suggested_prompt);
@@ -273,7 +302,8 @@ export const usePromptEditor = ({
 
       setCurrentPrompt(basePrompt);
       setSuggestedPrompt(revisedPrompt);
-      setDiffParts(diffLines(basePrompt, revisedPrompt));
+      const diff = data.diff ?? (await fetchPromptDiff(basePrompt, revisedPrompt));
+      setDiffHunks(diff.hunks);
       setCurrentAgentId(resolvedAgentId);
       setCurrentAgentName(resolvedDisplayName ?? null);
       setEditStage("result");
@@ -282,9 +312,10 @@ export const usePromptEditor = ({
         err instanceof Error ? err.message : "Failed to generate suggestion.",
       );
       setSuggestedPrompt(null);
-      setDiffParts([]);
+      setDiffHunks([]);
       setEditStage("input");
     } finally {
+      setStreamingSuggestion("");
       setIsSuggesting(false);
     }
   }, [
@@ -308,19 +339,32 @@ export const usePromptEditor = ({
           payload.agent_id = effectiveAgentId;
         }
 
+        const headers: Record<string, string> = {
+          "Content-Type": "application/json",
+        };
+        if (promptEtagRef.current) {
+          headers["If-Match"] = promptEtagRef.current;
+        }
+
         const response = await fetch(
           buildEndpointUrl("/api/elevenlabs/prompt"),
           {
             method: "PUT",
-            headers: { "Content-Type": "application/json" },
+            headers,
             body: JSON.stringify(payload),
           },
         );
 
+        if (response.status === 412) {
+          throw new Error(
+            "This prompt was changed elsewhere since you opened it. Reload the agent before saving.",
+          );
+        }
         if (!response.ok) {
           const detail = await response.text();
           throw new Error(detail || "Failed to save prompt.");
         }
+        promptEtagRef.current = response.headers.get("ETag");
 
         const data = (await response.json()) as {
           agent_id?: string | null;
@@ -466,8 +510,9 @@ export const usePromptEditor = ({
       firstMessageDraft,
       feedback,
       suggestedPrompt,
+      streamingSuggestion,
       manualPrompt,
-      diffParts,
+      diffHunks,
       editStage,
       firstMessageExpanded,
       promptError,
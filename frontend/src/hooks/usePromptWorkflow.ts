@@ -1,5 +1,4 @@
 import { useCallback, useMemo, useState } from "react";
-import { Change } from "diff";
 import {
   AgentDetails,
   PromptEditorState,
@@ -21,8 +20,9 @@ export type PromptViewState = Pick<
   | "isPromptLoading"
   | "isPromptSaving"
   | "suggestError"
-  | "diffParts"
+  | "diffHunks"
   | "suggestedPrompt"
+  | "streamingSuggestion"
   | "manualPrompt"
   | "isManualStage"
   | "firstMessageExpanded"
@@ -119,8 +119,9 @@ export const usePromptWorkflow = ({
       isPromptLoading: promptState.isPromptLoading,
       isPromptSaving: promptState.isPromptSaving,
       suggestError: promptState.suggestError,
-      diffParts: promptState.diffParts as Change[],
+      diffHunks: promptState.diffHunks,
       suggestedPrompt: promptState.suggestedPrompt,
+      streamingSuggestion: promptState.streamingSuggestion,
       manualPrompt: promptState.manualPrompt,
       isManualStage: promptState.isManualStage,
       firstMessageExpanded: promptState.firstMessageExpanded,
@@ -5,6 +5,55 @@ const API_BASE_URL =
 export const buildEndpointUrl = (path: string) =>
   API_BASE_URL ? `${API_BASE_URL}${path}` : path;
 
+export const buildWebSocketUrl = (path: string) => {
+  const url = new URL(buildEndpointUrl(path), window.location.href);
+  url.protocol = url.protocol === "https:" ? "wss:" : "ws:";
+  return url.toString();
+};
+
+export type ServerSentEvent = {
+  event: string;
+  data: string;
+};
+
+export async function* readServerSentEvents(
+  response: Response,
+): AsyncGenerator<ServerSentEvent> {
+  if (!response.body) {
+    return;
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) {
+      return;
+    }
+    buffer += value.replace(/\r\n/g, "\n");
+
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = "message";
+      const dataLines: string[] = [];
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event:")) {
+          event = line.slice("event:".length).trim();
+        } else if (line.startsWith("data:")) {
+          dataLines.push(line.slice("data:".length).trimStart());
+        }
+      }
+      if (dataLines.length > 0) {
+        yield { event, data: dataLines.join("\n") };
+      }
+      boundary = buffer.indexOf("\n\n");
+    }
+  }
+}
+
 const POSSIBLE_TOKEN_KEYS = [
   "token",
   "conversationToken",
@@ -0,0 +1,40 @@
+import { buildEndpointUrl } from "./api";
+
+export type DiffOp = "equal" | "delete" | "insert" | "replace" | "skip";
+
+export type DiffHunk = {
+  op: DiffOp;
+  base_start: number;
+  base_count: number;
+  revised_start: number;
+  revised_count: number;
+  text?: string;
+  removed?: string;
+  added?: string;
+  words?: ["equal" | "delete" | "insert", string][];
+};
+
+export type PromptDiff = {
+  base_hash: string;
+  revised_hash: string;
+  context: number | null;
+  stats: { added: number; removed: number; unchanged: number };
+  hunks: DiffHunk[];
+};
+
+// Fallback for responses without an inline diff; the server caches by content hash.
+export const fetchPromptDiff = async (base: string, revised: string) => {
+  const response = await fetch(
+    buildEndpointUrl("/api/elevenlabs/prompt/diff"),
+    {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ base, revised }),
+    },
+  );
+  if (!response.ok) {
+    const detail = await response.text();
+    throw new Error(detail || "Failed to diff prompts.");
+  }
+  return (await response.json()) as PromptDiff;
+};
@@ -1,20 +1,80 @@
-import { dirname, resolve } from 'node:path';
+import { readdir, readFile, writeFile } from 'node:fs/promises';
+import { dirname, extname, join, resolve } from 'node:path';
 import { fileURLToPath } from 'node:url';
-import { defineConfig } from 'vite';
+import { promisify } from 'node:util';
+import { brotliCompress, constants as zlibConstants, gzip } from 'node:zlib';
+import { defineConfig, type Plugin } from 'vite';
 import react from '@vitejs/plugin-react';
 
 const __dirname = dirname(fileURLToPath(import.meta.url));
 const frontendOutputDir = resolve(__dirname, '../backend/app/static');
 
+const gzipAsync = promisify(gzip);
+const brotliAsync = promisify(brotliCompress);
+
+// Text formats worth compressing; images and fonts are already compressed.
+const COMPRESSIBLE_EXTENSIONS = new Set(['.html', '.js', '.mjs', '.css', '.json', '.svg', '.txt', '.map', '.webmanifest']);
+const MIN_COMPRESS_BYTES = 1024;
+
+async function listFiles(dir: string): Promise<string[]> {
+  const entries = await readdir(dir, { withFileTypes: true });
+  const nested = await Promise.all(
+    entries.map((entry) => {
+      const path = join(dir, entry.name);
+      return entry.isDirectory() ? listFiles(path) : Promise.resolve([path]);
+    })
+  );
+  return nested.flat();
+}
+
+/**
+ * Writes `.gz` and `.br` siblings next to every compressible build output so
+ * the backend can serve them as-is instead of compressing per request.
+ * Variants that do not save space are skipped.
+ */
+function precompress(outDir: string): Plugin {
+  return {
+    name: 'voice-test:precompress',
+    apply: 'build',
+    async closeBundle() {
+      const files = (await listFiles(outDir)).filter((file) => COMPRESSIBLE_EXTENSIONS.has(extname(file)));
+      await Promise.all(
+        files.map(async (file) => {
+          const source = await readFile(file);
+          if (source.length < MIN_COMPRESS_BYTES) {
+            return;
+          }
+          const [gz, br] = await Promise.all([
+            gzipAsync(source, { level: 9 }),
+            brotliAsync(source, {
+              params: {
+                [zlibConstants.BROTLI_PARAM_QUALITY]: zlibConstants.BROTLI_MAX_QUALITY,
+                [zlibConstants.BROTLI_PARAM_SIZE_HINT]: source.length
+              }
+            })
+          ]);
+          if (gz.length < source.length) {
+            await writeFile(`${file}.gz`, gz);
+          }
+          if (br.length < source.length) {
+            await writeFile(`${file}.br`, br);
+          }
+        })
+      );
+    }
+  };
+}
+
 export default defineConfig({
-  plugins: [react()],
+  plugins: [react(), precompress(frontendOutputDir)],
   server: {
     host: true,
     proxy: {
       '/api': {
         target: 'http://127.0.0.1:8000',
         changeOrigin: true,
-        secure: false
+        secure: false,
+        ws: true
       }
     }
   },